@@ -0,0 +1,373 @@
+# analyticsHelper.py
+#
+# Batch grade analytics across many students (a multi-account deployment). Every
+# assignment of every student, class and marking period is loaded into flat NumPy
+# arrays once, and the statistics are computed for all combinations together:
+#     weighted averages per (student, class, marking period) - same rules and
+#         summation order as modelHelper.calculate_grade_for_mp
+#     letter grade distributions per class, marking period or student
+#     percentiles of category scores per (class, marking period, category)
+#     year-end averages per (student, class) - as gpaHelper.year_average
+# Data can come from saved output.json files / loaded data dicts, or from the
+# columnar export written by exportHelper. Requires the optional `numpy` package.
+# verify_against_gpa() checks the averages against gpaHelper on saved data.
+
+import csv
+import os
+import time
+from urllib.parse import unquote
+from modelHelper import LETTER_GRADE_CUTOFFS, Assignment
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# --- Configuration ---
+DEFAULT_PERCENTILES = (25, 50, 75, 90)
+
+# Letters in the column order of letter_distribution, worst first
+LETTERS = ("F",) + tuple(letter for _, letter in reversed(LETTER_GRADE_CUTOFFS))
+
+def _factorize(values):
+    """Returns (sorted unique labels, integer code of each value)."""
+    labels, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return labels.tolist(), codes.reshape(-1)
+
+def _round_tenths(values):
+    """
+    Rounds to 0.1 exactly like Python's round(x, 1), which the dashboard uses;
+    np.round scales by 10 first and can land on the other side of a tie.
+    """
+    rounded = np.round(values, 1)
+    scaled = values * 10
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    rounded[near_tie] = [round(value, 1) for value in values[near_tie].tolist()]
+    return rounded
+
+def _points(item):
+    """(category, points earned, total points) of an assignment dict or Assignment."""
+    if isinstance(item, Assignment):
+        return item.category, item.points_earned, item.total_points
+    try:
+        return item.get("category", "") or "", float(item.get("pointsEarned", 0) or 0), float(item.get("totalPoints", 0) or 0)
+    except (TypeError, ValueError):
+        return item.get("category", "") or "", 0.0, 0.0
+
+class GradeBatch:
+    """
+    The assignments and category weights of many students as parallel arrays.
+    Each (student, class, marking period) present in the data is one "combo";
+    combo_student, combo_class and combo_mp hold its codes into students, classes
+    and marking_periods, and the per-combo results line up with them.
+    """
+    def __init__(self, assignments, weights):
+        """
+        assignments: (student, class, mp, category, earned, total) column sequences.
+        weights: (student, class, mp, category, weight) column sequences.
+        """
+        if np is None:
+            raise ImportError("Grade analytics require numpy. Install it with: pip install numpy")
+
+        a_count = len(assignments[0])
+        labels = []
+        codes = []
+        for column in range(4):
+            column_labels, column_codes = _factorize(list(assignments[column]) + list(weights[column]))
+            labels.append(column_labels)
+            codes.append(column_codes)
+        self.students, self.classes, self.marking_periods, self.categories = labels
+        student, class_, mp, category = codes
+
+        # Combo and combo-category keys, packed into single integers
+        combo_keys = (student * len(self.classes) + class_) * len(self.marking_periods) + mp
+        combo_keys, first_row, combo = np.unique(combo_keys, return_index=True, return_inverse=True)
+        self.combo_mp = combo_keys % len(self.marking_periods)
+        self.combo_class = combo_keys // len(self.marking_periods) % len(self.classes)
+        self.combo_student = combo_keys // len(self.marking_periods) // len(self.classes)
+        # Combos in the order they first appear in the input (a class's marking periods in saved order)
+        self.combo_order = np.argsort(first_row, kind="stable")
+
+        cell_keys, cell = np.unique(combo * len(self.categories) + category, return_inverse=True)
+        self.cell_combo = cell_keys // len(self.categories)
+        self.cell_category = cell_keys % len(self.categories)
+
+        a_cell, w_cell = cell[:a_count], cell[a_count:]
+        cell_count = len(cell_keys)
+        self.cell_earned = np.bincount(a_cell, weights=np.asarray(assignments[4], dtype=float), minlength=cell_count)
+        self.cell_total = np.bincount(a_cell, weights=np.asarray(assignments[5], dtype=float), minlength=cell_count)
+        self.cell_weight = np.zeros(cell_count)
+        self.cell_weight[w_cell] = np.asarray(weights[4], dtype=float)
+        # The weighted cells in the order of the weight rows, which is the order
+        # calculate_grade_for_mp adds a marking period's categories in
+        self.weight_cells = w_cell
+        self._averages = None
+
+    @classmethod
+    def from_data(cls, datasets):
+        """
+        Builds a batch from loaded data dicts ({"user": ..., "classes": ...}) or paths
+        to saved output.json files. A student appearing twice keeps the later data.
+        """
+        from jsonHelper import load_file
+
+        by_student = {}
+        for data in datasets:
+            if isinstance(data, str):
+                data, _ = load_file(data)
+            student_id = str((data.get("user") or {}).get("studentID") or "unknown")
+            by_student[student_id] = data.get("classes") or {}
+
+        assignment_rows = []
+        weight_rows = []
+        for student_id, classes in by_student.items():
+            for class_name, class_info in classes.items():
+                for mp, items in (class_info.get("grades") or {}).items():
+                    key = (student_id, class_name, mp)
+                    assignment_rows.extend(key + _points(item) for item in items)
+                for mp, cat_weights in (class_info.get("categoryWeights") or {}).items():
+                    weight_rows.extend((student_id, class_name, mp, category, float(weight)) for category, weight in cat_weights.items())
+        return cls(
+            tuple(zip(*assignment_rows)) or ((),) * 6,
+            tuple(zip(*weight_rows)) or ((),) * 5
+        )
+
+    @classmethod
+    def from_export(cls, directory=None):
+        """
+        Builds a batch from the columnar export (Parquet or CSV), using the latest
+        part of every student/marking period partition.
+        """
+        if directory is None:
+            from exportHelper import EXPORT_DIRECTORY
+            directory = EXPORT_DIRECTORY
+
+        assignments = _read_export_table(
+            os.path.join(directory, "assignments"), ("class_name", "category", "points_earned", "total_points")
+        )
+        weights = _read_export_table(os.path.join(directory, "category_weights"), ("class_name", "category", "weight"))
+        return cls(
+            (assignments["student"], assignments["class_name"], assignments["mp"], assignments["category"],
+             assignments["points_earned"], assignments["total_points"]),
+            (weights["student"], weights["class_name"], weights["mp"], weights["category"], weights["weight"])
+        )
+
+    def combo_labels(self):
+        """Returns the (student, class, marking period) of every combo."""
+        return [
+            (self.students[s], self.classes[c], self.marking_periods[m])
+            for s, c, m in zip(self.combo_student.tolist(), self.combo_class.tolist(), self.combo_mp.tolist())
+        ]
+
+    def category_scores(self):
+        """Fraction earned of every combo-category cell, NaN where the category has no points."""
+        scores = np.full(len(self.cell_total), np.nan)
+        np.divide(self.cell_earned, self.cell_total, out=scores, where=self.cell_total > 0)
+        return scores
+
+    def mp_averages(self):
+        """
+        Weighted average percentage of every combo, rounded to 0.1 like the
+        dashboard; NaN where no weighted category has points. bincount adds in
+        array order, so summing over the weight rows adds the categories in the
+        same order as calculate_grade_for_mp and averages on a rounding tie round
+        the same way.
+        """
+        if self._averages is None:
+            cells = self.weight_cells
+            counted = self.cell_total[cells] > 0
+            weight = np.where(counted, self.cell_weight[cells], 0.0)
+            combos = self.cell_combo[cells]
+            effective_weight = np.bincount(combos, weights=weight, minlength=len(self.combo_mp))
+            weighted_sum = np.bincount(
+                combos, weights=np.where(counted, self.category_scores()[cells], 0.0) * weight, minlength=len(self.combo_mp)
+            )
+            averages = np.full(len(self.combo_mp), np.nan)
+            np.divide(weighted_sum, effective_weight, out=averages, where=effective_weight > 0)
+            self._averages = _round_tenths(averages * 100)
+        return self._averages
+
+    def letter_grades(self):
+        """Index into LETTERS of every combo's average, -1 where it has none."""
+        averages = self.mp_averages()
+        cutoffs = [cutoff for cutoff, _ in reversed(LETTER_GRADE_CUTOFFS)]
+        letters = np.searchsorted(cutoffs, np.nan_to_num(averages, nan=-np.inf), side="right")
+        return np.where(np.isnan(averages), -1, letters)
+
+    def letter_distribution(self, by="class"):
+        """
+        Counts the letter grades of all combos grouped by "class", "mp" or "student".
+        Returns (group labels, counts array of shape (groups, len(LETTERS))).
+        """
+        groups, labels = {
+            "class": (self.combo_class, self.classes),
+            "mp": (self.combo_mp, self.marking_periods),
+            "student": (self.combo_student, self.students),
+        }[by]
+        letters = self.letter_grades()
+        graded = letters >= 0
+        counts = np.zeros((len(labels), len(LETTERS)), dtype=np.int64)
+        np.add.at(counts, (groups[graded], letters[graded]), 1)
+        return labels, counts
+
+    def category_percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """
+        Percentiles of the category score (in %) across students for every
+        (class, marking period, category) with points. Returns (group labels as
+        (class, mp, category) tuples, array of shape (groups, len(percentiles))).
+        """
+        scores = self.category_scores() * 100
+        scored = ~np.isnan(scores)
+        cell_combo = self.cell_combo[scored]
+        group_keys = (
+            (self.combo_class[cell_combo] * len(self.marking_periods) + self.combo_mp[cell_combo]) * len(self.categories)
+            + self.cell_category[scored]
+        )
+        group_keys, group = np.unique(group_keys, return_inverse=True)
+
+        # One row per group, padded with NaN to the largest group, so one nanpercentile call covers all of them
+        order = np.argsort(group, kind="stable")
+        group, values = group[order], scores[scored][order]
+        sizes = np.bincount(group, minlength=len(group_keys))
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        table = np.full((len(group_keys), sizes.max() if len(sizes) else 0), np.nan)
+        table[group, np.arange(len(group)) - starts[group]] = values
+        result = np.nanpercentile(table, percentiles, axis=1).T if len(group_keys) else np.empty((0, len(percentiles)))
+
+        category_count, mp_count = len(self.categories), len(self.marking_periods)
+        labels = [
+            (self.classes[key // category_count // mp_count], self.marking_periods[key // category_count % mp_count],
+             self.categories[key % category_count])
+            for key in group_keys.tolist()
+        ]
+        return labels, result
+
+    def year_averages(self, mp_weights=None):
+        """
+        Year-end average of every (student, class), as gpaHelper.year_average
+        computes it: the mean of its marking period averages weighted by mp_weights
+        ({mp: weight}, default gpaHelper.MARKING_PERIOD_WEIGHTS), over the marking
+        periods that have one, summed in the order they appear in the data. Returns ((student, class) labels, averages rounded
+        to 0.1, NaN where no marking period has an average).
+        """
+        from gpaHelper import MARKING_PERIOD_WEIGHTS
+
+        mp_weights = MARKING_PERIOD_WEIGHTS if mp_weights is None else mp_weights
+        averages = self.mp_averages()
+        if mp_weights:
+            mp_weight = np.array([float(mp_weights.get(mp, 0)) for mp in self.marking_periods])
+            weight = mp_weight[self.combo_mp]
+        else:
+            weight = np.ones(len(averages))
+        weight = np.where(np.isnan(averages), 0.0, weight)
+
+        pair_keys, pair = np.unique(self.combo_student * len(self.classes) + self.combo_class, return_inverse=True)
+        order = self.combo_order
+        total_weight = np.bincount(pair[order], weights=weight[order], minlength=len(pair_keys))
+        weighted_sum = np.bincount(pair[order], weights=(np.nan_to_num(averages) * weight)[order], minlength=len(pair_keys))
+        result = np.full(len(pair_keys), np.nan)
+        np.divide(weighted_sum, total_weight, out=result, where=total_weight > 0)
+
+        labels = [(self.students[key // len(self.classes)], self.classes[key % len(self.classes)]) for key in pair_keys.tolist()]
+        return labels, _round_tenths(result)
+
+def verify_against_gpa(datasets):
+    """
+    Computes the marking period and year averages of saved data (data dicts or
+    output.json paths, as for GradeBatch.from_data) both with a GradeBatch and
+    with gpaHelper, reporting every average that differs. Returns the number of
+    mismatches.
+    """
+    from gpaHelper import class_year_summary
+    from jsonHelper import load_file
+
+    by_student = {}
+    for data in datasets:
+        if isinstance(data, str):
+            data, _ = load_file(data)
+        by_student[str((data.get("user") or {}).get("studentID") or "unknown")] = data.get("classes") or {}
+    batch = GradeBatch.from_data([{"user": {"studentID": s}, "classes": c} for s, c in by_student.items()])
+
+    def as_float(value):
+        return float("nan") if value is None else float(value)
+
+    batch_mp = dict(zip(batch.combo_labels(), batch.mp_averages().tolist()))
+    year_labels, year_values = batch.year_averages()
+    batch_year = dict(zip(year_labels, year_values.tolist()))
+    checked = mismatches = 0
+    for student_id, classes in by_student.items():
+        for class_name, class_info in classes.items():
+            summary = class_year_summary(class_name, class_info)
+            expected = [((student_id, class_name, mp), pct, batch_mp) for mp, pct in summary["mpAverages"].items()]
+            expected.append(((student_id, class_name), summary["yearAverage"], batch_year))
+            for key, pct, computed in expected:
+                checked += 1
+                value = computed.get(key, float("nan"))
+                if value != as_float(pct) and not (np.isnan(value) and pct is None):
+                    mismatches += 1
+                    print(f"  - MISMATCH {' / '.join(key)}: gpaHelper {pct}, GradeBatch {value}")
+    print(f"Checked {checked} averages against gpaHelper: {mismatches} mismatched.")
+    return mismatches
+
+def _latest_parts(table_directory):
+    """Yields (student, mp, path) for the newest part file of every partition of an export table."""
+    for root, _, filenames in os.walk(table_directory):
+        parts = sorted(name for name in filenames if name.startswith("part-"))
+        if not parts:
+            continue
+        partition = dict(
+            segment.split("=", 1) for segment in os.path.relpath(root, table_directory).split(os.sep) if "=" in segment
+        )
+        yield unquote(partition.get("student", "")), unquote(partition.get("mp", "")), os.path.join(root, parts[-1])
+
+def _read_part(path, columns):
+    """Reads the given columns of one export part file as {column: sequence}."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(path, columns=list(columns))
+        return {name: table.column(name).to_numpy(zero_copy_only=False) for name in columns}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    return {name: [row[name] for row in rows] for name in columns}
+
+def _read_export_table(table_directory, columns):
+    """Concatenates the latest part of every partition, adding student and mp columns."""
+    collected = {name: [] for name in ("student", "mp") + tuple(columns)}
+    for student_id, mp, path in _latest_parts(table_directory):
+        part = _read_part(path, columns)
+        count = len(part[columns[0]])
+        collected["student"].append(np.full(count, student_id, dtype=object))
+        collected["mp"].append(np.full(count, mp, dtype=object))
+        for name in columns:
+            collected[name].append(np.asarray(part[name], dtype=object))
+    result = {}
+    for name, chunks in collected.items():
+        values = np.concatenate(chunks) if chunks else np.array([], dtype=object)
+        if name in ("points_earned", "total_points", "weight"):
+            values = np.array([float(v) if v not in (None, "") else 0.0 for v in values], dtype=float)
+        result[name] = values
+    return result
+
+# --- Main execution: summarize saved output.json files or the export directory ---
+# (--verify FILE... checks the averages of the files against gpaHelper instead)
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["--verify"]:
+        sys.exit(1 if verify_against_gpa(sys.argv[2:]) else 0)
+
+    start = time.perf_counter()
+    batch = GradeBatch.from_data(sys.argv[1:]) if len(sys.argv) > 1 else GradeBatch.from_export()
+    loaded = time.perf_counter()
+    averages = batch.mp_averages()
+    class_labels, letter_counts = batch.letter_distribution("class")
+    _, percentile_values = batch.category_percentiles()
+    _, year_values = batch.year_averages()
+    computed = time.perf_counter()
+
+    print(f"{len(batch.students)} students, {len(averages)} class/marking period averages, "
+          f"{len(percentile_values)} category groups, {len(year_values)} year-end averages.")
+    print(f"Loaded in {(loaded - start) * 1000:.1f} ms, computed in {(computed - loaded) * 1000:.1f} ms.")
+    print("Letter grades by class (" + " ".join(LETTERS) + "):")
+    for class_name, counts in zip(class_labels, letter_counts.tolist()):
+        print(f"  - {class_name}: {' '.join(str(count) for count in counts)}")
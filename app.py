@@ -1,10 +1,14 @@
-import webview
+import json
 import os
+import time
+from datetime import date
 from pathlib import Path
 
 class Api:
-    def __init__(self, update_callback=None):
+    def __init__(self, update_callback=None, data_file="output.json"):
         self.update_callback = update_callback
+        self.data_file = data_file
+        self._search_student = None
     
     def update_grades(self):
         """Update grades by calling the provided callback function."""
@@ -22,7 +26,45 @@ class Api:
             print(f"Error updating grades: {e}")
             return {"success": False, "message": f"Error: {str(e)}"}
 
-def start_dashboard(update_callback=None, dashboard_file="dashboard.html", fullscreen=True):
+    def get_year_summary(self):
+        """Year averages per class and GPA from the saved grades (cached until they change)."""
+        from gpaHelper import load_year_summary
+        summary = load_year_summary(self.data_file)
+        if summary is None:
+            return {"success": False, "message": f"Could not read '{self.data_file}'"}
+        return {"success": True, "summary": summary}
+
+    def search(self, query, limit=50):
+        """
+        Full-text search over the data file student's assignment names, descriptions
+        and categories, best matches first.
+        """
+        import searchHelper
+        from jsonHelper import load_file
+        
+        start = time.perf_counter()
+        if self._search_student is None:
+            # Data saved before the index existed (or with INDEX_SEARCH off) is indexed on first use
+            try:
+                data, _ = load_file(self.data_file)
+                saved_on = date.fromtimestamp(os.path.getmtime(self.data_file))
+            except (IOError, OSError, ValueError) as e:
+                print(f"Could not index '{self.data_file}' for search: {e}")
+                return {"success": False, "message": "No saved grades to search"}
+            searchHelper.update_search_index(data, saved_on=saved_on)
+            self._search_student = searchHelper.student_key(data)
+        results = searchHelper.search(query, limit, student=self._search_student)
+        if results is None:
+            return {"success": False, "message": "Search is unavailable"}
+        return {"success": True, "results": results, "elapsedMs": round((time.perf_counter() - start) * 1000, 2)}
+
+    def get_changes(self, since=0):
+        """Grade change events published after the event with id `since`, oldest first."""
+        from changeHelper import CHANGE_FEED
+        return {"success": True, "events": CHANGE_FEED.since(since)}
+
+def start_dashboard(update_callback=None, dashboard_file="dashboard.html", fullscreen=True, startup_time=None,
+                    background_task=None, data_file="output.json"):
     """
     Start the pywebview dashboard application.
     
@@ -30,6 +72,11 @@ def start_dashboard(update_callback=None, dashboard_file="dashboard.html", fulls
         update_callback: Function to call when update_grades is triggered
         dashboard_file: Path to the dashboard HTML file
         fullscreen: Whether to start in fullscreen mode
+        startup_time: time.perf_counter() value at process start; if given, the
+            time to the first loaded page is printed
+        background_task: Function called with the window on a separate thread once
+            the GUI has started (e.g. to refresh data behind the open window)
+        data_file: Path to the saved output.json, read by the API's year summary
     """
     # Check if dashboard file exists
     if not os.path.exists(dashboard_file):
@@ -37,8 +84,10 @@ def start_dashboard(update_callback=None, dashboard_file="dashboard.html", fulls
         print("Please run the grade scraping first to generate the dashboard.")
         return False
     
+    import webview
+    
     # Create API instance with the update callback
-    api = Api(update_callback)
+    api = Api(update_callback, data_file)
     
     # Create and start the webview window
     try:
@@ -52,8 +101,26 @@ def start_dashboard(update_callback=None, dashboard_file="dashboard.html", fulls
             min_size=(800, 600)
         )
         
+        if startup_time is not None:
+            first_load = {"pending": True}
+            def on_loaded():
+                if first_load["pending"]:
+                    first_load["pending"] = False
+                    print(f"Dashboard loaded {(time.perf_counter() - startup_time) * 1000:.0f} ms after startup.")
+            window.events.loaded += on_loaded
+        
+        # Grade changes found by refreshes are pushed into the open page
+        from changeHelper import CHANGE_FEED
+        unsubscribe = CHANGE_FEED.subscribe(lambda event: window.evaluate_js(f"onGradeChanges({json.dumps(event)})"))
+        
         print(f"Starting dashboard from: {Path(dashboard_file).resolve()}")
-        webview.start(debug=False)
+        try:
+            if background_task is not None:
+                webview.start(background_task, window, debug=False)
+            else:
+                webview.start(debug=False)
+        finally:
+            unsubscribe()
         return True
         
     except Exception as e:
@@ -0,0 +1,277 @@
+# archiveHelper.py
+#
+# Append-only archive of every page fetched from Genesis, so output.json can be
+# rebuilt offline after a parser fix or a markup change (`python main.py --reparse`).
+#
+# Each account has one segment file per month under ARCHIVE_DIRECTORY. A segment is
+# a sequence of records, each a one-line JSON header followed by `size` bytes of the
+# compressed page:
+#     {"page": "course_summary", "class": "...", "mp": "MP1", "fetchedAt": ..., "codec": "gzip", "size": ..., "sha1": "..."}\n<body>
+# A page identical to the last one archived for the same key is not written again.
+# Segments are never rewritten: a record torn by a crash (or one another process is
+# still writing) is skipped when reading, and the next complete record is found by
+# its header.
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# --- Configuration ---
+# Opt-in: every changed page is kept, so the archive grows until old segments are deleted
+ARCHIVE_PAGES = False
+ARCHIVE_DIRECTORY = "archive"
+# "auto" uses zstd when the `zstandard` package is installed and gzip otherwise
+ARCHIVE_CODEC = "auto"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+# Worker processes used by reparse_archive (None = one per CPU)
+REPARSE_WORKERS = None
+
+PAGE_USER = "user_summary"
+PAGE_CLASS_LIST = "class_list"
+PAGE_COURSE = "course_summary"
+
+# Every header line starts with this (json.dumps keeps the key order of archive_page)
+RECORD_START = b'{"page":'
+# Bytes read at a time when looking for the next record after a torn one
+SCAN_CHUNK_SIZE = 64 * 1024
+
+_ARCHIVE_LOCK = threading.Lock()
+# (account, page, class, mp) -> sha1 of the last page archived for it, loaded per account on first write
+_LAST_DIGESTS = {}
+_LOADED_SEGMENTS = set()
+
+def _codec():
+    if ARCHIVE_CODEC in ("auto", "zstd"):
+        try:
+            import zstandard  # noqa: F401
+            return "zstd"
+        except ImportError:
+            if ARCHIVE_CODEC == "zstd":
+                print("  - Warning: zstandard is not installed; archiving with gzip.")
+    return "gzip"
+
+def _compress(codec, data):
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+def _decompress(codec, data):
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+def _account_directory(account):
+    safe_name = re.sub(r'[^\w.@-]', "_", account)
+    return os.path.join(ARCHIVE_DIRECTORY, safe_name)
+
+def _segment_path(account, fetched_at):
+    return os.path.join(_account_directory(account), time.strftime("%Y-%m", time.localtime(fetched_at)) + ".pages")
+
+def _header_at(f, offset, file_size):
+    """Parses the record header at offset. Returns (header, body offset) or None if there is no complete one."""
+    f.seek(offset)
+    line = f.readline()
+    if not line.startswith(RECORD_START) or not line.endswith(b"\n"):
+        return None
+    try:
+        header = json.loads(line)
+        size = int(header["size"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    body_offset = offset + len(line)
+    if size < 0 or body_offset + size > file_size:
+        return None
+    return header, body_offset
+
+def _next_record_start(f, offset, file_size):
+    """Returns the offset of the first RECORD_START at or after offset, or None."""
+    while offset < file_size:
+        f.seek(offset)
+        chunk = f.read(SCAN_CHUNK_SIZE + len(RECORD_START) - 1)
+        found = chunk.find(RECORD_START)
+        if found >= 0:
+            return offset + found
+        offset += SCAN_CHUNK_SIZE
+    return None
+
+def _read_records(path, with_body=True):
+    """
+    Yields (header, body) for each complete record in a segment (body is None when
+    with_body is False). A record is complete when its body is followed by the end
+    of the file or by the start of another header; torn records are skipped and the
+    scan resumes at the next header.
+    """
+    try:
+        with open(path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            offset = 0
+            skipped = False
+            while offset < file_size:
+                parsed = _header_at(f, offset, file_size)
+                if parsed is not None:
+                    header, body_offset = parsed
+                    end = body_offset + int(header["size"])
+                    f.seek(end)
+                    # Also accepts the first bytes of a record that is still being appended
+                    if RECORD_START.startswith(f.read(len(RECORD_START))):
+                        if skipped:
+                            print(f"  - Warning: Skipped a damaged record in '{path}'.")
+                            skipped = False
+                        body = None
+                        if with_body:
+                            f.seek(body_offset)
+                            body = f.read(end - body_offset)
+                        yield header, body
+                        offset = end
+                        continue
+                skipped = True
+                offset = _next_record_start(f, offset + 1, file_size)
+                if offset is None:
+                    return
+    except IOError:
+        return
+
+def _record_key(account, header):
+    return (account, header.get("page"), header.get("class"), header.get("mp"))
+
+def _load_segment(account, path):
+    """
+    Remembers the last digest per key in a segment. A torn record is left in place
+    (another process may still be writing it); readers skip it.
+    """
+    for header, _ in _read_records(path, with_body=False):
+        _LAST_DIGESTS[_record_key(account, header)] = header.get("sha1")
+    _LOADED_SEGMENTS.add(path)
+
+def archive_page(session, page, html_content, class_name=None, marking_period=None):
+    """
+    Appends a fetched page to the archive of the session's account. Does nothing if
+    archiving is disabled, the session has no account, or the page is unchanged
+    since it was last archived. Errors are reported and otherwise ignored.
+    """
+    credentials = getattr(session, "genesis_credentials", None)
+    if not ARCHIVE_PAGES or not credentials or not html_content:
+        return
+    account = credentials[0]
+    raw = html_content.encode("utf-8")
+    digest = hashlib.sha1(raw).hexdigest()
+    fetched_at = time.time()
+    path = _segment_path(account, fetched_at)
+    key = (account, page, class_name, marking_period)
+
+    try:
+        with _ARCHIVE_LOCK:
+            if path not in _LOADED_SEGMENTS:
+                _load_segment(account, path)
+            if _LAST_DIGESTS.get(key) == digest:
+                return
+        # Compressed outside the lock so concurrent fetches don't queue behind each other
+        codec = _codec()
+        body = _compress(codec, raw)
+        header = {
+            "page": page, "class": class_name, "mp": marking_period, "fetchedAt": fetched_at,
+            "codec": codec, "size": len(body), "sha1": digest
+        }
+        with _ARCHIVE_LOCK:
+            # Another fetch may have archived the same page meanwhile
+            if _LAST_DIGESTS.get(key) == digest:
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "ab") as f:
+                f.write(json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n" + body)
+            _LAST_DIGESTS[key] = digest
+    except (IOError, OSError) as e:
+        print(f"  - Warning: Could not archive the {page} page. Reason: {e}")
+
+def list_archived_accounts():
+    """Returns the account directories present in the archive."""
+    if not os.path.isdir(ARCHIVE_DIRECTORY):
+        return []
+    return sorted(name for name in os.listdir(ARCHIVE_DIRECTORY) if os.path.isdir(os.path.join(ARCHIVE_DIRECTORY, name)))
+
+def latest_pages(account):
+    """
+    Returns {(page, class, mp): (header, compressed_body)} holding the most recently
+    fetched version of every page archived for the account.
+    """
+    directory = _account_directory(account)
+    latest = {}
+    if not os.path.isdir(directory):
+        return latest
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".pages"):
+            continue
+        for header, body in _read_records(os.path.join(directory, filename)):
+            key = (header.get("page"), header.get("class"), header.get("mp"))
+            if key not in latest or header.get("fetchedAt", 0) >= latest[key][0].get("fetchedAt", 0):
+                latest[key] = (header, body)
+    return latest
+
+def _reparse_page(page, codec, body):
+    """Worker: decompresses one archived page and parses it with the configured parser."""
+    from parserHelper import get_parser
+
+    html_content = _decompress(codec, body).decode("utf-8")
+    parser = get_parser()
+    if page == PAGE_USER:
+        return parser.parse_user_data(html_content)
+    if page == PAGE_CLASS_LIST:
+        return parser.parse_classes(html_content)
+    return (
+        parser.parse_assignments(html_content), parser.parse_category_weights(html_content),
+        parser.parse_marking_periods(html_content)
+    )
+
+def reparse_archive(account, previous_classes=None, max_workers=REPARSE_WORKERS):
+    """
+    Rebuilds {"user": ..., "classes": ...} for an account from the latest archived
+    version of each page, parsing them in parallel worker processes. No requests are
+    made. Classes come from the archived class list (or previous_classes if none was
+    archived). Returns None if the archive has nothing usable for the account.
+    """
+    latest = latest_pages(account)
+    if not latest:
+        return None
+
+    keys = list(latest)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_reparse_page, key[0], latest[key][0].get("codec"), latest[key][1]) for key in keys]
+        results = {}
+        for key, future in zip(keys, futures):
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                print(f"  - Could not re-parse archived {key[0]} page {key[1] or ''} {key[2] or ''}: {e}")
+
+    from gpaHelper import update_mp_totals
+
+    user_data = results.get((PAGE_USER, None, None))
+    class_list = results.get((PAGE_CLASS_LIST, None, None))
+    if not class_list:
+        class_list = {
+            name: {k: info[k] for k in ("courseCode", "courseSelection", "markingPeriod", "markingPeriods") if k in info}
+            for name, info in (previous_classes or {}).items()
+        }
+
+    classes = {}
+    for class_name, class_info in class_list.items():
+        classes[class_name] = dict(class_info, grades={}, categoryWeights={})
+    for (page, class_name, mp), result in sorted(results.items(), key=lambda item: str(item[0][2])):
+        if page == PAGE_COURSE and class_name in classes:
+            class_info = classes[class_name]
+            class_info['grades'][mp], class_info['categoryWeights'][mp], periods = result
+            update_mp_totals(class_info, mp)
+            if periods:
+                class_info['markingPeriods'] = periods
+
+    if not classes:
+        return None
+    return {"user": user_data, "classes": classes}
@@ -0,0 +1,281 @@
+# asyncHelper.py
+#
+# asyncio transport for the scraper. Exposes the same operations as classHelper,
+# userHelper and gradeHelper as coroutines over one shared httpx.AsyncClient, so
+# many pages can be in flight on a single thread. Parsing and return shapes are
+# shared with the synchronous helpers. Requires the optional `httpx` package.
+# run_with_session runs them on one long-lived event loop thread, reusing one
+# client (and its open connections) per account across scrapes and updates.
+
+import asyncio
+import atexit
+import threading
+from archiveHelper import PAGE_CLASS_LIST, PAGE_COURSE, PAGE_USER, archive_page
+from changeHelper import publish_grade_changes
+from classHelper import _build_class_list_request, _own_copy, _parse_classes_from_html
+from fetchHelper import SessionExpiredError, get_page_async
+from flightHelper import PAGE_FLIGHTS, page_key
+from gradeHelper import (
+    BASE_URL, _build_course_page_request, _course_page_key, _handle_course_page, _seed_from_previous, _store_mp_result,
+    _store_refreshed_mp, class_marking_periods, next_marking_period
+)
+from userHelper import REQUEST_HEADERS, TARGET_URL, _parse_user_data
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# --- Configuration ---
+MAX_CONCURRENT_REQUESTS = 16
+REQUEST_TIMEOUT_SECONDS = 30.0
+# How long to wait for the shared clients to close when the program exits
+CLOSE_TIMEOUT_SECONDS = 5.0
+
+def _copy_cookies(session, client):
+    for cookie in session.cookies:
+        client.cookies.set(cookie.name, cookie.value, domain=cookie.domain, path=cookie.path)
+
+def create_async_client(session):
+    """
+    Creates an httpx.AsyncClient carrying the User-Agent and cookie jar of an
+    authenticated requests session.
+    """
+    if httpx is None:
+        raise ImportError("The async backend requires httpx. Install it with: pip install httpx")
+
+    client = httpx.AsyncClient(
+        headers={"User-Agent": session.headers.get("User-Agent", "")},
+        follow_redirects=True,
+        timeout=REQUEST_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=MAX_CONCURRENT_REQUESTS)
+    )
+    _copy_cookies(session, client)
+    # Lets fetchHelper re-authenticate through the session when cookies expire mid-scrape
+    client.genesis_session = session
+    return client
+
+async def get_user_summary_data_async(client):
+    """Coroutine version of userHelper.get_user_summary_data."""
+    session = getattr(client, "genesis_session", None)
+    return await PAGE_FLIGHTS.do_async(
+        page_key(session, PAGE_USER), lambda: _fetch_user_summary_data_async(client), kind=PAGE_USER
+    )
+
+async def _fetch_user_summary_data_async(client):
+    try:
+        response = await get_page_async(client, PAGE_USER, TARGET_URL, headers=REQUEST_HEADERS)
+        response.raise_for_status()
+        archive_page(getattr(client, "genesis_session", None), PAGE_USER, response.text)
+        return _parse_user_data(response.text)
+    except (httpx.HTTPError, SessionExpiredError) as e:
+        print(f"  - An error occurred while fetching the user summary page: {e}")
+        return None
+
+async def get_all_classes_async(client, student_id):
+    """Coroutine version of classHelper.get_all_classes. Returns None if the session is invalid."""
+    if not student_id:
+        print("Error in get_all_classes_async: student_id was not provided.")
+        return None
+
+    target_url, headers = _build_class_list_request(student_id)
+    session = getattr(client, "genesis_session", None)
+    classes_data = await PAGE_FLIGHTS.do_async(
+        page_key(session, PAGE_CLASS_LIST, student_id),
+        lambda: _fetch_classes_async(client, target_url, headers),
+        kind=PAGE_CLASS_LIST
+    )
+    return _own_copy(classes_data)
+
+async def _fetch_classes_async(client, target_url, headers):
+    try:
+        response = await get_page_async(client, PAGE_CLASS_LIST, target_url, headers=headers)
+        response.raise_for_status()
+        if "gohome=true" in str(response.url):
+            return None
+    except (httpx.HTTPError, SessionExpiredError) as e:
+        print(f"An error occurred while fetching the class list: {e}")
+        return None
+
+    classes_data = _parse_classes_from_html(response.text)
+    if classes_data:
+        archive_page(getattr(client, "genesis_session", None), PAGE_CLASS_LIST, response.text)
+    return classes_data
+
+async def process_class_page_for_mp_async(client, class_name, class_details, student_id, marking_period, save_html):
+    """Coroutine version of gradeHelper._process_class_page_for_mp. Returns (None, None, None) on failure."""
+    session = getattr(client, "genesis_session", None)
+    return await PAGE_FLIGHTS.do_async(
+        _course_page_key(session, class_details, student_id, marking_period),
+        lambda: _fetch_class_page_for_mp_async(client, class_name, class_details, student_id, marking_period, save_html),
+        kind=PAGE_COURSE
+    )
+
+async def _fetch_class_page_for_mp_async(client, class_name, class_details, student_id, marking_period, save_html):
+    params, headers = _build_course_page_request(class_details, student_id, marking_period)
+    try:
+        response = await get_page_async(client, PAGE_COURSE, BASE_URL, params=params, headers=headers)
+        response.raise_for_status()
+        archive_page(getattr(client, "genesis_session", None), PAGE_COURSE, response.text, class_name, marking_period)
+        return _handle_course_page(class_name, marking_period, response.text, save_html)
+    except (httpx.HTTPError, SessionExpiredError) as e:
+        print(f"  - An error occurred while fetching data for '{class_name}' {marking_period}: {e}")
+        print("    Keeping previously saved data for this marking period.")
+        return None, None, None
+
+async def _gather_pages(client, all_classes_data, student_id, jobs, save_html):
+    """Fetches (class_name, marking_period) jobs concurrently and returns their results in order."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def run(class_name, mp):
+        async with semaphore:
+            return await process_class_page_for_mp_async(
+                client, class_name, all_classes_data[class_name], student_id, mp, save_html
+            )
+
+    return await asyncio.gather(*(run(class_name, mp) for class_name, mp in jobs))
+
+async def _fetch_pages(client, all_classes_data, student_id, jobs, save_html, previous_classes=None):
+    """
+    Fetches (class_name, marking_period) jobs concurrently and stores the results in
+    all_classes_data. Failed pages keep their previous data and are marked stale.
+    """
+    results = await _gather_pages(client, all_classes_data, student_id, jobs, save_html)
+    for (class_name, mp), (grades_list, weights_dict, periods) in zip(jobs, results):
+        previous_info = previous_classes.get(class_name, {}) if previous_classes is not None else None
+        _store_mp_result(all_classes_data[class_name], mp, grades_list, weights_dict, previous_info, periods)
+    return all_classes_data
+
+async def get_all_grades_async(client, all_classes_data, student_id, save_html=False, previous_classes=None,
+                               active_mp=None, on_marking_period=None):
+    """
+    Coroutine version of gradeHelper.get_all_grades. Without on_marking_period all
+    class pages are fetched concurrently: every page of classes whose marking
+    periods are already known, plus the first page of the others, then whatever
+    those first pages showed is left. With it, each marking period's pages are
+    fetched concurrently in turn and the callback runs (in the event loop's thread)
+    after each one but the last.
+    """
+    previous_classes = previous_classes or {}
+    if not student_id:
+        print("Error in get_all_grades_async: student_id was not provided.")
+        return all_classes_data
+
+    _seed_from_previous(all_classes_data, previous_classes)
+
+    if not on_marking_period:
+        fetched = set()
+        for first_round in (True, False):
+            jobs = []
+            for class_name, class_info in all_classes_data.items():
+                periods = class_marking_periods(class_info)
+                if first_round and not class_info.get('markingPeriods'):
+                    periods = periods[:1]
+                jobs.extend((class_name, mp) for mp in periods if (class_name, mp) not in fetched)
+            if jobs:
+                print(f"  - Fetching {len(jobs)} class pages concurrently...")
+                fetched.update(jobs)
+                await _fetch_pages(client, all_classes_data, student_id, jobs, save_html, previous_classes)
+        return all_classes_data
+
+    if active_mp is None:
+        active_mp = next((c.get('markingPeriod') for c in all_classes_data.values() if c.get('markingPeriod')), None)
+    done = []
+    mp = next_marking_period(all_classes_data, active_mp, done)
+    while mp:
+        jobs = [(class_name, mp) for class_name, class_info in all_classes_data.items() if mp in class_marking_periods(class_info)]
+        print(f"  - Fetching {mp} for {len(jobs)} classes concurrently...")
+        await _fetch_pages(client, all_classes_data, student_id, jobs, save_html, previous_classes)
+        done.append(mp)
+        mp = next_marking_period(all_classes_data, active_mp, done)
+        if mp:
+            on_marking_period(done[-1], all_classes_data)
+    return all_classes_data
+
+async def update_active_mp_grades_async(client, all_classes_data, student_id, active_mp, save_html=False):
+    """Coroutine version of gradeHelper.update_active_mp_grades, including the change feed event."""
+    if not student_id:
+        print("Error in update_active_mp_grades_async: student_id was not provided.")
+        return all_classes_data
+
+    if not active_mp:
+        print("Error in update_active_mp_grades_async: active_mp was not provided.")
+        return all_classes_data
+
+    jobs = [
+        (class_name, active_mp) for class_name, class_info in all_classes_data.items()
+        if active_mp in class_marking_periods(class_info)
+    ]
+    print(f"  - Updating {active_mp} for {len(jobs)} classes concurrently...")
+    results = await _gather_pages(client, all_classes_data, student_id, jobs, save_html)
+    changes = []
+    for (class_name, _), (grades_list, weights_dict, periods) in zip(jobs, results):
+        change = _store_refreshed_mp(class_name, all_classes_data[class_name], active_mp, grades_list, weights_dict, periods)
+        if change:
+            changes.append(change)
+    publish_grade_changes(active_mp, changes)
+    return all_classes_data
+
+_LOOP = None
+_LOOP_THREAD = None
+_LOOP_LOCK = threading.Lock()
+# Long-lived AsyncClient of each account (or session), only used on the loop thread
+_CLIENTS = {}
+
+def _get_loop():
+    """Returns the shared event loop, starting its daemon thread on first use."""
+    global _LOOP, _LOOP_THREAD
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            _LOOP_THREAD = threading.Thread(target=_LOOP.run_forever, name="async-scraper", daemon=True)
+            _LOOP_THREAD.start()
+            atexit.register(close_async_clients)
+        return _LOOP
+
+def _client_for(session):
+    """
+    Returns the shared client of session's account, creating it on first use.
+    The session's cookies are copied in each time, since logins and the
+    keep-alive renew them on the session. Runs on the loop thread.
+    """
+    credentials = getattr(session, "genesis_credentials", None)
+    key = credentials[0] if credentials else id(session)
+    client = _CLIENTS.get(key)
+    if client is None or client.is_closed:
+        client = _CLIENTS[key] = create_async_client(session)
+    else:
+        _copy_cookies(session, client)
+        client.genesis_session = session
+    return client
+
+def run_with_session(session, coroutine_function, *args, **kwargs):
+    """
+    Runs coroutine_function(client, *args, **kwargs) to completion on the shared
+    event loop thread, using the long-lived AsyncClient of session's account, and
+    returns its result. For use from synchronous code such as main.py, the
+    scheduler thread or the pywebview bridge; calls from several threads run
+    concurrently on the one loop.
+    """
+    loop = _get_loop()
+    if threading.current_thread() is _LOOP_THREAD:
+        raise RuntimeError("run_with_session can't be called from the async scraper's own event loop.")
+
+    async def runner():
+        return await coroutine_function(_client_for(session), *args, **kwargs)
+    return asyncio.run_coroutine_threadsafe(runner(), loop).result()
+
+def close_async_clients():
+    """Closes the shared clients (registered to run at exit)."""
+    if _LOOP is None or not _LOOP.is_running():
+        return
+
+    async def close_all():
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+        for client in clients:
+            await client.aclose()
+    try:
+        asyncio.run_coroutine_threadsafe(close_all(), _LOOP).result(CLOSE_TIMEOUT_SECONDS)
+    except Exception as e:
+        print(f"  - Warning: Could not close the async HTTP clients. Reason: {e}")
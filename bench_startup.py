@@ -0,0 +1,109 @@
+# bench_startup.py
+#
+# Measures cold-start cost of the `main.py --dashboard-only` path: the time to
+# import main in a fresh interpreter, the time until run_dashboard_only opens the
+# window (with credentials set, so the session keep-alive is enabled), and which
+# heavy scraping dependencies get pulled in along the way.
+# Run with:  python bench_startup.py [--runs N] [--max-ms MS]
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# --- Configuration ---
+DEFAULT_RUNS = 10
+DEFAULT_MAX_MS = 250.0
+# Modules that must not be imported just to open the dashboard
+HEAVY_MODULES = ("requests", "bs4", "lxml", "dotenv", "loginHelper", "classHelper", "gradeHelper", "userHelper", "parserHelper", "dashboardHelper")
+
+PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import main\n"
+    "elapsed = (time.perf_counter() - start) * 1000\n"
+    "loaded = [m for m in {heavy!r} if m in sys.modules]\n"
+    "print(elapsed)\n"
+    "print(','.join(loaded))\n"
+)
+
+# Runs run_dashboard_only with start_dashboard replaced by a stand-in that reports
+# the time and loaded modules at the moment the window would open, then exits.
+# main's own output is discarded so background threads can't interleave with the report.
+DASHBOARD_ONLY_PROBE = (
+    "import os, sys, time\n"
+    "report, sys.stdout = sys.stdout, open(os.devnull, 'w')\n"
+    "start = time.perf_counter()\n"
+    "import main\n"
+    "def window_opened(*args, **kwargs):\n"
+    "    report.write(f'{{(time.perf_counter() - start) * 1000}}\\n')\n"
+    "    report.write(','.join(m for m in {heavy!r} if m in sys.modules) + '\\n')\n"
+    "    report.flush()\n"
+    "    os._exit(0)\n"
+    "main.start_dashboard = window_opened\n"
+    "main.run_dashboard_only()\n"
+)
+
+def _run_probe(repo_dir, probe=PROBE):
+    """
+    Runs a probe in a fresh interpreter in an empty directory; returns (process ms,
+    probe ms, heavy modules loaded).
+    """
+    env = dict(os.environ, PYTHONPATH=repo_dir, GENESIS_USERNAME="bench", GENESIS_PASSWORD="bench")
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as work_dir:
+        result = subprocess.run(
+            [sys.executable, "-c", probe.format(heavy=HEAVY_MODULES)],
+            cwd=work_dir, env=env, capture_output=True, text=True
+        )
+    process_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Probe failed:\n{result.stderr}")
+    lines = result.stdout.splitlines()
+    import_ms = float(lines[-2])
+    loaded = [m for m in lines[-1].split(",") if m]
+    return process_ms, import_ms, loaded
+
+def run_benchmark(runs=DEFAULT_RUNS, max_ms=DEFAULT_MAX_MS):
+    """Runs the startup probe several times and reports medians. Returns True if within budget."""
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    process_times, import_times, window_times, loaded, window_loaded = [], [], [], [], []
+    for _ in range(runs):
+        process_ms, import_ms, loaded = _run_probe(repo_dir)
+        process_times.append(process_ms)
+        import_times.append(import_ms)
+        _, window_ms, window_loaded = _run_probe(repo_dir, DASHBOARD_ONLY_PROBE)
+        window_times.append(window_ms)
+
+    process_median = statistics.median(process_times)
+    import_median = statistics.median(import_times)
+    window_median = statistics.median(window_times)
+    print(f"Runs: {runs}")
+    print(f"  - Interpreter start + import main: {process_median:.1f} ms (median)")
+    print(f"  - import main alone:               {import_median:.1f} ms (median)")
+    print(f"  - import main to window opening:   {window_median:.1f} ms (median, --dashboard-only)")
+
+    ok = True
+    if loaded:
+        print(f"  - FAIL: heavy modules imported at startup: {', '.join(loaded)}")
+        ok = False
+    elif window_loaded:
+        print(f"  - FAIL: heavy modules imported before the window opens: {', '.join(window_loaded)}")
+        ok = False
+    else:
+        print("  - No scraping dependencies imported at startup.")
+    if process_median > max_ms:
+        print(f"  - FAIL: startup exceeded budget of {max_ms:.0f} ms.")
+        ok = False
+    if window_median > max_ms:
+        print(f"  - FAIL: opening the window exceeded budget of {max_ms:.0f} ms.")
+        ok = False
+    return ok
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    runs = int(args[args.index("--runs") + 1]) if "--runs" in args else DEFAULT_RUNS
+    max_ms = float(args[args.index("--max-ms") + 1]) if "--max-ms" in args else DEFAULT_MAX_MS
+    sys.exit(0 if run_benchmark(runs, max_ms) else 1)
@@ -0,0 +1,220 @@
+# changeHelper.py
+#
+# In-process change feed for grade refreshes. update_active_mp_grades compares each
+# class's marking period before and after it is refreshed and publishes one event
+# per refresh that changed anything (a full scrape publishes one per marking period):
+#     {"id": 3, "type": "grades_changed", "time": ..., "markingPeriod": "MP2",
+#      "classes": [{"class": "Algebra 2", "new": [...], "changed": [{"before": ..., "after": ...}],
+#                   "removed": [...], "previousAverage": 88.1, "average": 89.4, "delta": 1.3}]}
+# Subscribers (desktop notifications, a local webhook, the open dashboard) are called
+# on a single background thread, so a slow consumer never holds up a refresh.
+
+import queue
+import threading
+import time
+from collections import deque
+from metricsHelper import GRADE_CHANGES
+from modelHelper import assignments_from_dicts
+
+# --- Configuration ---
+# Show a desktop notification for new or changed grades (needs the optional `plyer` package;
+# without it the notification is printed to the console)
+NOTIFY_DESKTOP = True
+# POST every event as JSON to this URL, e.g. "http://127.0.0.1:8765/grades" (None = disabled)
+WEBHOOK_URL = None
+WEBHOOK_TIMEOUT_SECONDS = 5
+# Events kept for consumers that poll (Api.get_changes)
+FEED_HISTORY = 100
+
+def _assignment_key(assignment):
+    return (assignment.name, assignment.date, assignment.category)
+
+def diff_assignments(old_grades, new_grades):
+    """
+    Compares two versions of a marking period's assignments. Assignments are matched
+    by name, date and category (in order, if several share them). Returns
+    (new, changed as (before, after) pairs, removed) lists of Assignments.
+    """
+    unmatched = {}
+    for assignment in assignments_from_dicts(old_grades):
+        unmatched.setdefault(_assignment_key(assignment), deque()).append(assignment)
+
+    new, changed = [], []
+    for assignment in assignments_from_dicts(new_grades):
+        candidates = unmatched.get(_assignment_key(assignment))
+        if not candidates:
+            new.append(assignment)
+            continue
+        before = candidates.popleft()
+        if before != assignment:
+            changed.append((before, assignment))
+    removed = [assignment for candidates in unmatched.values() for assignment in candidates]
+    return new, changed, removed
+
+def class_change(class_name, old_grades, new_grades, previous_average, average):
+    """
+    Returns the change entry of one class's refreshed marking period, or None if
+    none of its assignments changed.
+    """
+    new, changed, removed = diff_assignments(old_grades, new_grades)
+    if not (new or changed or removed):
+        return None
+    return {
+        "class": class_name,
+        "new": [a.to_dict() for a in new],
+        "changed": [{"before": before.to_dict(), "after": after.to_dict()} for before, after in changed],
+        "removed": [a.to_dict() for a in removed],
+        "previousAverage": previous_average,
+        "average": average,
+        "delta": round(average - previous_average, 1) if average is not None and previous_average is not None else None,
+    }
+
+def describe_change(change):
+    """One-line summary of a class change, e.g. "Algebra 2: 2 new, 1 changed (88.1% -> 89.4%)"."""
+    parts = [f"{len(change[kind])} {kind}" for kind in ("new", "changed", "removed") if change[kind]]
+    text = f"{change['class']}: {', '.join(parts)}"
+    if change["average"] is not None:
+        previous = f"{change['previousAverage']}%" if change["previousAverage"] is not None else "N/A"
+        text += f" ({previous} -> {change['average']}%)"
+    return text
+
+class ChangeFeed:
+    """
+    Publishes change events to subscribers and keeps the last FEED_HISTORY events.
+    Subscribers are called in order on one daemon thread; an exception in one is
+    reported and does not stop the others.
+    """
+    def __init__(self, history=FEED_HISTORY):
+        self._subscribers = []
+        self._history = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._next_id = 1
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Calls callback(event) for every event published from now on. Returns an unsubscribe function."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def publish(self, event_type, **fields):
+        """Adds an id, type and time to the event, records it and queues it for the subscribers. Returns the event."""
+        with self._lock:
+            event = dict(id=self._next_id, type=event_type, time=time.time(), **fields)
+            self._next_id += 1
+            self._history.append(event)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name="change-feed", daemon=True)
+                self._thread.start()
+        self._queue.put(event)
+        return event
+
+    def since(self, event_id=0):
+        """Returns the recorded events with an id greater than event_id, oldest first."""
+        with self._lock:
+            return [event for event in self._history if event["id"] > event_id]
+
+    def _dispatch(self):
+        while True:
+            event = self._queue.get()
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"  - Warning: A change feed consumer failed. Reason: {e}")
+
+CHANGE_FEED = ChangeFeed()
+
+def publish_grade_changes(marking_period, changes):
+    """Publishes the class changes of one refresh, if there are any. Returns the event or None."""
+    if not changes:
+        return None
+    for change in changes:
+        for kind in ("new", "changed", "removed"):
+            if change[kind]:
+                GRADE_CHANGES.inc(len(change[kind]), kind=kind)
+    return CHANGE_FEED.publish("grades_changed", markingPeriod=marking_period, classes=changes)
+
+# --- Consumers ---
+
+def notify_desktop(event):
+    """Shows a desktop notification for a grades_changed event."""
+    if event.get("type") != "grades_changed":
+        return
+    # Imported here rather than at module level, since plyer is slow to import and
+    # this module is loaded before the dashboard window opens
+    try:
+        from plyer import notification
+    except ImportError:
+        notification = None
+
+    title = f"New grades in {event['markingPeriod']}"
+    lines = [describe_change(change) for change in event["classes"]]
+    if notification is None:
+        print(f"  - {title}:")
+        for line in lines:
+            print(f"    {line}")
+        return
+    message = "\n".join(lines)
+    notification.notify(title=title, message=message[:256], app_name="Grades Dashboard", timeout=10)
+
+def post_webhook(event, url=None):
+    """POSTs an event as JSON to url (default WEBHOOK_URL)."""
+    import requests
+
+    url = url or WEBHOOK_URL
+    if not url:
+        return
+    try:
+        response = requests.post(url, json=event, timeout=WEBHOOK_TIMEOUT_SECONDS)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"  - Warning: Could not deliver change event {event['id']} to {url}. Reason: {e}")
+
+_CONSUMERS_LOCK = threading.Lock()
+_CONSUMERS_STARTED = []
+
+def start_default_consumers():
+    """Subscribes the configured desktop and webhook consumers (once per process)."""
+    with _CONSUMERS_LOCK:
+        if _CONSUMERS_STARTED:
+            return
+        _CONSUMERS_STARTED.append(True)
+    if NOTIFY_DESKTOP:
+        CHANGE_FEED.subscribe(notify_desktop)
+    if WEBHOOK_URL:
+        CHANGE_FEED.subscribe(post_webhook)
+
+# --- Main execution: a stand-in webhook receiver that prints the events it gets ---
+if __name__ == "__main__":
+    import json
+    import sys
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class _WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                event = json.loads(body)
+                print(f"Event {event.get('id')} ({event.get('type')}, {event.get('markingPeriod')}):")
+                for change in event.get("classes", []):
+                    print(f"  - {describe_change(change)}")
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Unreadable event: {e}")
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    print(f"Listening for change events on http://127.0.0.1:{port}/ (set WEBHOOK_URL to it)")
+    HTTPServer(("127.0.0.1", port), _WebhookHandler).serve_forever()
@@ -0,0 +1,63 @@
+# check_parsers.py
+#
+# Checks that the lxml parser backend gives exactly the same results as the
+# BeautifulSoup reference on the saved Genesis pages in fixtures/genesis (course
+# pages, the weekly summary and the student summary, with the markup quirks seen
+# on the live site). Each fixture must also yield something from the extractors
+# listed for it, so a page that both backends fail to parse doesn't pass as "equal".
+# Run with:  python check_parsers.py   (exits with status 1 on any failure)
+
+import os
+import sys
+
+# --- Configuration ---
+FIXTURE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "genesis")
+# Extractors that must return a non-empty result on each fixture page
+EXPECTED_EXTRACTORS = {
+    "course_page_mp2.html": ("parse_assignments", "parse_category_weights", "parse_marking_periods"),
+    "course_page_no_assignments.html": ("parse_category_weights", "parse_marking_periods"),
+    "course_page_semester.html": ("parse_assignments", "parse_category_weights", "parse_marking_periods"),
+    "weekly_summary.html": ("parse_classes",),
+    "user_summary.html": ("parse_user_data",),
+}
+
+def check_expected(directory=FIXTURE_DIRECTORY):
+    """
+    Runs the reference backend over every fixture with expectations and reports
+    extractors that came back empty, or fixtures that are missing. Returns the
+    number of failures.
+    """
+    from parserHelper import _results, get_parser
+
+    parser = get_parser("bs4")
+    failures = 0
+    for filename, extractors in sorted(EXPECTED_EXTRACTORS.items()):
+        path = os.path.join(directory, filename)
+        if not os.path.exists(path):
+            print(f"  - MISSING fixture {filename}")
+            failures += 1
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            results = _results(parser, f.read())
+        for extractor in extractors:
+            value = results[extractor]
+            if not value or isinstance(value, str):
+                print(f"  - EMPTY {extractor} in {filename}: {value!r}")
+                failures += 1
+    return failures
+
+def main():
+    from parserHelper import verify_parsers
+
+    print(f"--- Comparing parser backends on '{FIXTURE_DIRECTORY}' ---")
+    try:
+        mismatches = verify_parsers(FIXTURE_DIRECTORY, candidate="lxml", reference="bs4")
+        failures = check_expected()
+    except ImportError as e:
+        print(f"Both parser backends are needed for this check. Reason: {e}")
+        return 1
+    print(f"{failures} expected results missing.")
+    return 1 if mismatches or failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
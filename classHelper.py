@@ -1,30 +1,151 @@
 # classHelper.py
 
+import codecs
 import requests
-import re
+from archiveHelper import PAGE_CLASS_LIST, archive_page
+from fetchHelper import get_page
+from flightHelper import PAGE_FLIGHTS, page_key
+from metricsHelper import RESPONSE_BYTES
+from parserHelper import CLASS_PATTERN, get_parser
 
 # --- File reading and global variables have been REMOVED ---
 
-def get_all_classes(session, student_id):
+# --- Configuration ---
+STREAM_CHUNK_SIZE = 8192
+# Longest goToCourseSummary(...) entry the streaming scan will hold in memory while waiting for its end
+MAX_ENTRY_CHARS = 4096
+CLASS_ENTRY_MARKER = "goToCourseSummary("
+
+def _build_class_list_request(student_id):
+    """Returns the (url, headers) used to fetch the weekly summary page."""
+    target_url = f"https://students.ww-p.org/genesis/parents?tab1=studentdata&tab2=gradebook&tab3=weeklysummary&action=form&studentid={student_id}"
+    referer_url = f"https://students.ww-p.org/genesis/parents?tab1=studentdata&tab2=gradebook&tab3=coursesummary&studentid={student_id}&action=form"
+    headers = {"Accept": "text/html,application/xhtml+xml", "Referer": referer_url}
+    return target_url, headers
+
+def _parse_classes_from_html(html_content):
+    """Extracts every goToCourseSummary(...) entry from the weekly summary page."""
+    return get_parser().parse_classes(html_content)
+
+def _scan_class_entries(chunks):
+    """
+    Yields CLASS_PATTERN matches from an iterable of text chunks as soon as each is
+    complete, with the same results as CLASS_PATTERN.findall over the joined text.
+    Between chunks only the unmatched tail that could still start an entry is kept
+    (at most MAX_ENTRY_CHARS per pending entry).
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        consumed = 0
+        for match in CLASS_PATTERN.finditer(buffer):
+            yield match.groups()
+            consumed = match.end()
+
+        start = buffer.find(CLASS_ENTRY_MARKER, consumed)
+        while start != -1 and len(buffer) - start > MAX_ENTRY_CHARS:
+            start = buffer.find(CLASS_ENTRY_MARKER, start + 1)
+        if start == -1:
+            start = max(consumed, len(buffer) - len(CLASS_ENTRY_MARKER) + 1)
+        buffer = buffer[start:]
+
+def _iter_response_text(response, page_type):
+    """Decodes a streamed response chunk by chunk, recording the bytes read."""
+    try:
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+        RESPONSE_BYTES.inc(len(chunk), page_type=page_type)
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+def _stream_classes(session, target_url, headers, on_class):
+    """
+    Streams the weekly summary page, calling on_class(class_name, class_info) as each
+    class is found. Returns the same dict as _parse_classes_from_html, or None if the
+    session is invalid.
+    """
+    classes_data = {}
+    # The decoded page is kept for the archive
+    page_text = []
+
+    def read_text(response):
+        for text in _iter_response_text(response, PAGE_CLASS_LIST):
+            page_text.append(text)
+            yield text
+
+    try:
+        with get_page(session, PAGE_CLASS_LIST, target_url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            if "gohome=true" in response.url:
+                return None
+            for course_code, course_selection, marking_period, class_name in _scan_class_entries(read_text(response)):
+                class_name = class_name.strip()
+                if not class_name:
+                    continue
+                class_info = {
+                    "courseCode": course_code,
+                    "courseSelection": course_selection,
+                    "markingPeriod": marking_period
+                }
+                # Later duplicates win, as in _parse_classes_from_html
+                if classes_data.get(class_name) != class_info:
+                    classes_data[class_name] = class_info
+                    on_class(class_name, class_info)
+    except requests.exceptions.RequestException as e:
+        print(f"An error occurred while fetching the class list: {e}")
+        return None
+    if classes_data:
+        archive_page(session, PAGE_CLASS_LIST, "".join(page_text))
+    return classes_data
+
+def get_all_classes(session, student_id, on_class=None):
     """
     Fetches the Gradebook Summary page to discover all available classes.
 
     Args:
         session (requests.Session): An authenticated requests session object.
         student_id (str): The student's ID, required for building the URLs.
-    """
-    # --- URLs are now built inside the function using the provided student_id ---
-    target_url = f"https://students.ww-p.org/genesis/parents?tab1=studentdata&tab2=gradebook&tab3=weeklysummary&action=form&studentid={student_id}"
-    referer_url = f"https://students.ww-p.org/genesis/parents?tab1=studentdata&tab2=gradebook&tab3=coursesummary&studentid={student_id}&action=form"
+        on_class (callable): If given, the page is streamed and on_class(class_name,
+            class_info) is called as soon as each class is found, so work for it
+            can start while the rest of the page downloads.
 
+    Without on_class, concurrent calls for the same account and student share one fetch.
+    """
     if not student_id:
         print("Error in get_all_classes: student_id was not provided.")
         return None
 
-    headers = {"Accept": "text/html,application/xhtml+xml", "Referer": referer_url}
+    target_url, headers = _build_class_list_request(student_id)
+
+    if on_class is not None:
+        classes_data = _stream_classes(session, target_url, headers, on_class)
+        if classes_data:
+            return classes_data
+        # Nothing found while streaming (e.g. a login page served without a redirect):
+        # fall back to a normal fetch, which can re-authenticate and retry
+        classes_data = get_all_classes(session, student_id)
+        for class_name, class_info in (classes_data or {}).items():
+            on_class(class_name, class_info)
+        return classes_data
 
+    classes_data = PAGE_FLIGHTS.do(
+        page_key(session, PAGE_CLASS_LIST, student_id),
+        lambda: _fetch_classes(session, target_url, headers),
+        kind=PAGE_CLASS_LIST
+    )
+    return _own_copy(classes_data)
+
+def _own_copy(classes_data):
+    """Copies a (possibly shared) class list, since callers fill grades into the class dicts."""
+    if not classes_data:
+        return classes_data
+    return {class_name: dict(class_info) for class_name, class_info in classes_data.items()}
+
+def _fetch_classes(session, target_url, headers):
     try:
-        response = session.get(target_url, headers=headers)
+        response = get_page(session, PAGE_CLASS_LIST, target_url, headers=headers)
         response.raise_for_status()
         if "gohome=true" in response.url:
             return None
@@ -32,21 +153,7 @@ def get_all_classes(session, student_id):
         print(f"An error occurred while fetching the class list: {e}")
         return None
 
-    pattern = re.compile(r"goToCourseSummary\('([^']*)','([^']*)','([^']*)'\)\">(.*?)<\/span>")
-    matches = pattern.findall(response.text)
-
-    classes_data = {}
-    if not matches:
-        return {}
-
-    for match in matches:
-        course_code, course_selection, marking_period, class_name = match
-        class_name = class_name.strip()
-        if class_name:
-            classes_data[class_name] = {
-                "courseCode": course_code,
-                "courseSelection": course_selection,
-                "markingPeriod": marking_period
-            }
-            
+    classes_data = _parse_classes_from_html(response.text)
+    if classes_data:
+        archive_page(session, PAGE_CLASS_LIST, response.text)
     return classes_data
\ No newline at end of file
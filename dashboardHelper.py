@@ -1,606 +1,1103 @@
+import hashlib
 import json
+import os
+import re
 import webbrowser
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from html import escape
 from string import Template
-
-def generate_dashboard(json_file="output.json", html_file="dashboard.html"):
-    """
-    Generate a clean, table-based dashboard matching the provided design mockups.
-    """
-    try:
-        with open(json_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: '{json_file}' not found.")
-        return
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON: {e}")
-        return
-
-    user = data.get("user", {})
-    classes = data.get("classes", {})
-
-    def get_letter_grade(pct):
-        if pct is None:
-            return "N/A"
-        if pct >= 89.5: return "A"
-        if pct >= 79.5: return "B"
-        if pct >= 69.5: return "C"
-        if pct >= 59.5: return "D"
-        return "F"
-
-    def get_grade_color(pct):
-        if pct is None:
-            return "#64748b"
-        if pct >= 90: return "#10b981"
-        if pct >= 80: return "#06b6d4"
-        if pct >= 70: return "#f59e0b"
-        if pct >= 60: return "#f97316"
-        return "#ef4444"
-
-    def calculate_grade_for_mp(grades, cat_weights):
-        """Calculate overall grade for a specific marking period."""
-        # Calculate overall grade
-        cat_sums = {}
-        for g in grades:
-            cat = g.get("category", "") or ""
-            cat_entry = cat_sums.setdefault(cat, {"earned": 0.0, "total": 0.0})
-            try:
-                earned = float(g.get("pointsEarned", 0) or 0)
-                total = float(g.get("totalPoints", 0) or 0)
-            except Exception:
-                earned = total = 0.0
-            cat_entry["earned"] += earned
-            cat_entry["total"] += total
-
-        cat_scores = {}
-        for cat, weight in cat_weights.items():
-            sums = cat_sums.get(cat, {"earned": 0.0, "total": 0.0})
-            if sums["total"] > 0:
-                cat_scores[cat] = sums["earned"] / sums["total"]
-            else:
-                cat_scores[cat] = None
-
-        effective_weight = 0.0
-        weighted_sum = 0.0
-        for cat, weight in cat_weights.items():
-            frac = cat_scores.get(cat)
-            if frac is not None:
-                effective_weight += float(weight)
-                weighted_sum += frac * float(weight)
-
-        overall_pct = None
-        if effective_weight > 0:
-            overall_pct = round((weighted_sum / effective_weight) * 100, 1)
-
-        return overall_pct, cat_scores
-
-    # Process classes data
-    classes_data = []
-    active_mp = None
-    
-    for class_name, class_info in classes.items():
-        course_code = class_info.get("courseCode", "")
-        marking_period = class_info.get("markingPeriod", "")
-        if active_mp is None:
-            active_mp = marking_period  # Set active MP from first class
-        
-        all_grades = class_info.get("grades", {})
-        all_cat_weights = class_info.get("categoryWeights", {})
-        
-        # Calculate grades for all marking periods
-        mp_data = {}
-        for mp in ['MP1', 'MP2', 'MP3', 'MP4']:
-            mp_grades = all_grades.get(mp, [])
-            mp_weights = all_cat_weights.get(mp, {})
-            overall_pct, cat_scores = calculate_grade_for_mp(mp_grades, mp_weights)
-            
-            mp_data[mp] = {
-                "overall_pct": overall_pct,
-                "letter_grade": get_letter_grade(overall_pct),
-                "grade_color": get_grade_color(overall_pct),
-                "grades": mp_grades,
-                "cat_weights": mp_weights,
-                "cat_scores": cat_scores
-            }
-
-        classes_data.append({
-            "name": class_name,
-            "course_code": course_code,
-            "active_marking_period": marking_period,
-            "mp_data": mp_data
-        })
-
-    # Generate summary table rows (will be populated by JavaScript)
-    summary_rows = []
-    for i, cls in enumerate(classes_data):
-        summary_rows.append(f"""
-        <tr class="course-row" onclick="openModal({i})" data-class-index="{i}">
-            <td class="course-name">{escape(cls['name'])}</td>
-            <td class="course-average" data-mp-grade></td>
-            <td class="course-grade" data-mp-letter></td>
-        </tr>
-        """)
-
-    # Generate modal content for each class
-    modal_content = []
-    for i, cls in enumerate(classes_data):
-        modal_content.append(f"""
-        <div id="modal-{i}" class="modal">
-            <div class="modal-content">
-                <div class="modal-header">
-                    <div class="modal-title-section">
-                        <h2 class="modal-title">View Assignments for {escape(cls['name'])}</h2>
-                        <button class="close-btn" onclick="closeModal({i})">&times;</button>
-                    </div>
-                    <div class="modal-controls">
-                        <select id="modal-mp-select-{i}" class="mp-select" onchange="updateModalMP({i})">
-                            <option value="MP1">MP1</option>
-                            <option value="MP2">MP2</option>
-                            <option value="MP3">MP3</option>
-                            <option value="MP4">MP4</option>
-                        </select>
-                        <div class="modal-grade">
-                            <span id="modal-grade-percent-{i}" class="modal-grade-percent"></span>
-                            <button id="toggle-categories-{i}" class="toggle-btn" onclick="toggleCategories({i})">
-                                Show Category Averages
-                            </button>
-                        </div>
-                    </div>
+from jsonHelper import dumps, load_file, loads
+from gpaHelper import mp_grade, year_summary
+from modelHelper import letter_grade, load_class_models, marking_period_sort_key
+
+# --- Configuration ---
+# Static CSS/JS are written here once per content hash so the webview can cache them
+ASSETS_DIRECTORY = "dashboard_assets"
+# Per-refresh data script loaded by the dashboard shell
+DATA_SCRIPT_FILE = "dashboard_data.js"
+# Offered in the marking period selectors when the data doesn't list any
+DEFAULT_MARKING_PERIODS = ['MP1', 'MP2', 'MP3', 'MP4']
+# generate_dashboards: worker processes (None = one per CPU) and the per-dashboard
+# file recording the fingerprint of the data it was last rendered from
+RENDER_WORKERS = None
+FINGERPRINT_FILE = ".dashboard_fingerprint"
+
+DASHBOARD_CSS = """
+* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+    background: #f0f9ff;
+    color: #0f172a;
+    min-height: 100vh;
+}
+
+.container {
+    max-width: 800px;
+    margin: 0 auto;
+    padding: 2rem;
+}
+
+.header {
+    text-align: center;
+    margin-bottom: 2rem;
+}
+
+.header h1 {
+    font-size: 2rem;
+    font-weight: 700;
+    color: #0f172a;
+    margin-bottom: 0.5rem;
+}
+
+.header .subtitle {
+    color: #64748b;
+    font-size: 1rem;
+}
+
+.controls {
+    display: flex;
+    justify-content: center;
+    align-items: center;
+    gap: 1rem;
+    margin-bottom: 2rem;
+}
+
+.mp-select {
+    padding: 0.5rem 1rem;
+    border: 1px solid #cbd5e1;
+    border-radius: 8px;
+    background: white;
+    color: #1e293b;
+    font-size: 0.9rem;
+    cursor: pointer;
+}
+
+.mp-select:focus {
+    outline: none;
+    border-color: #0ea5e9;
+    box-shadow: 0 0 0 3px rgba(14, 165, 233, 0.1);
+}
+
+.update-btn {
+    background: #0ea5e9;
+    color: white;
+    border: none;
+    padding: 0.5rem 1rem;
+    border-radius: 8px;
+    cursor: pointer;
+    font-size: 0.9rem;
+    font-weight: 500;
+    transition: all 0.2s;
+}
+
+.update-btn:hover {
+    background: #0284c7;
+}
+
+.update-btn:disabled {
+    background: #94a3b8;
+    cursor: not-allowed;
+}
+
+.summary-table {
+    width: 100%;
+    border-collapse: collapse;
+    background: white;
+    border-radius: 12px;
+    overflow: hidden;
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.05);
+    border: 1px solid #e0f2fe;
+}
+
+.summary-table thead {
+    background: #0ea5e9;
+}
+
+.summary-table th {
+    padding: 1rem 1.5rem;
+    text-align: left;
+    font-weight: 600;
+    font-size: 0.875rem;
+    letter-spacing: 0.05em;
+    text-transform: uppercase;
+    color: white;
+    border-bottom: none;
+}
+
+.summary-table th:first-child {
+    width: 40%;
+}
+
+.summary-table th:not(:first-child) {
+    width: 20%;
+    text-align: center;
+}
+
+.course-row {
+    cursor: pointer;
+    transition: all 0.2s ease;
+    border-bottom: 1px solid #f1f5f9;
+}
+
+.course-row:hover {
+    background: #f0f9ff;
+}
+
+.course-row:last-child {
+    border-bottom: none;
+}
+
+.course-name {
+    padding: 1.25rem 1.5rem;
+    font-weight: 500;
+    color: #0f172a;
+}
+
+.course-average {
+    padding: 1.25rem 1.5rem;
+    text-align: center;
+    font-weight: 600;
+    font-size: 1rem;
+}
+
+.course-grade {
+    padding: 1.25rem 1.5rem;
+    text-align: center;
+    font-weight: 700;
+    font-size: 1.1rem;
+}
+
+.course-year {
+    padding: 1.25rem 1.5rem;
+    text-align: center;
+    font-weight: 600;
+    font-size: 1rem;
+}
+
+.gpa {
+    color: #334155;
+    font-size: 0.9rem;
+    font-weight: 600;
+}
+
+.changes-banner {
+    display: none;
+    margin: -1rem auto 2rem;
+    max-width: 40rem;
+    padding: 0.75rem 1rem;
+    background: #ecfdf5;
+    border: 1px solid #6ee7b7;
+    border-radius: 8px;
+    color: #065f46;
+    font-size: 0.9rem;
+    cursor: pointer;
+}
+
+.changes-banner ul {
+    margin: 0.25rem 0 0 1.25rem;
+}
+
+.search-box {
+    position: relative;
+}
+
+.search-input {
+    padding: 0.5rem 1rem;
+    border: 1px solid #cbd5e1;
+    border-radius: 8px;
+    font-size: 0.9rem;
+    width: 16rem;
+}
+
+.search-input:focus {
+    outline: none;
+    border-color: #0ea5e9;
+    box-shadow: 0 0 0 3px rgba(14, 165, 233, 0.1);
+}
+
+.search-results {
+    display: none;
+    position: absolute;
+    top: calc(100% + 0.25rem);
+    right: 0;
+    z-index: 500;
+    width: 28rem;
+    max-height: 24rem;
+    overflow-y: auto;
+    background: white;
+    border: 1px solid #e0f2fe;
+    border-radius: 8px;
+    box-shadow: 0 10px 15px rgba(0, 0, 0, 0.1);
+}
+
+.search-result {
+    padding: 0.6rem 1rem;
+    border-bottom: 1px solid #f1f5f9;
+    cursor: pointer;
+    font-size: 0.875rem;
+}
+
+.search-result:hover {
+    background: #f0f9ff;
+}
+
+.search-result-meta,
+.search-result-snippet {
+    color: #64748b;
+    font-size: 0.8rem;
+}
+
+.search-results mark {
+    background: #fef08a;
+    color: inherit;
+}
+
+/* Modal Styles */
+.modal {
+    display: none;
+    position: fixed;
+    z-index: 1000;
+    left: 0;
+    top: 0;
+    width: 100%;
+    height: 100%;
+    background: rgba(0, 0, 0, 0.8);
+    backdrop-filter: blur(4px);
+}
+
+.modal-content {
+    background: #f8fafc;
+    margin: 2% auto;
+    padding: 0;
+    border-radius: 16px;
+    width: 90%;
+    max-width: 1000px;
+    max-height: 90vh;
+    overflow: hidden;
+    box-shadow: 0 20px 25px rgba(0, 0, 0, 0.15);
+}
+
+.modal-header {
+    background: #1e293b;
+    padding: 1.5rem 2rem;
+    border-bottom: 1px solid #cbd5e1;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    flex-wrap: wrap;
+    gap: 1rem;
+}
+
+.modal-title-section {
+    display: flex;
+    align-items: center;
+    gap: 1rem;
+    flex: 1;
+}
+
+.modal-title {
+    color: white;
+    font-size: 1.2rem;
+    font-weight: 600;
+}
+
+.close-btn {
+    background: rgba(255, 255, 255, 0.2);
+    border: none;
+    color: white;
+    font-size: 1.5rem;
+    cursor: pointer;
+    padding: 0.5rem;
+    border-radius: 6px;
+    transition: all 0.2s;
+}
+
+.close-btn:hover {
+    background: rgba(255, 255, 255, 0.3);
+}
+
+.modal-controls {
+    display: flex;
+    align-items: center;
+    gap: 1rem;
+    flex-wrap: wrap;
+}
+
+.modal-grade {
+    display: flex;
+    align-items: center;
+    gap: 1rem;
+}
+
+.modal-grade-percent {
+    font-size: 1.8rem;
+    font-weight: 700;
+    background: white;
+    padding: 0.5rem 0.5rem;
+    border-radius: 8px;
+    box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
+}
+
+.toggle-btn {
+    background: #0ea5e9;
+    color: white;
+    border: none;
+    padding: 0.5rem 1rem;
+    border-radius: 8px;
+    cursor: pointer;
+    font-size: 0.85rem;
+    font-weight: 500;
+    transition: all 0.2s;
+}
+
+.toggle-btn:hover {
+    background: #0284c7;
+}
+
+.modal-body {
+    max-height: 80vh;
+    overflow-y: auto;
+}
+
+.assignments-view {
+    padding: 2rem;
+}
+
+.categories-view {
+    padding: 2rem;
+    border-bottom: 1px solid #e2e8f0;
+}
+
+.assignments-table {
+    width: 100%;
+    border-collapse: collapse;
+}
+
+.assignments-table th {
+    background: #374151;
+    color: white;
+    padding: 1rem;
+    text-align: left;
+    font-size: 0.75rem;
+    font-weight: 600;
+    letter-spacing: 0.05em;
+    text-transform: uppercase;
+    border-bottom: none;
+}
+
+.assignments-table td {
+    padding: 1rem;
+    border-bottom: 1px solid #e2e8f0;
+    color: #1e293b;
+}
+
+.assignments-table tr:hover {
+    background: #f1f5f9;
+}
+
+.due-header { width: 15%; }
+.category-header { width: 25%; }
+.assignment-header { width: 45%; }
+.grade-header { width: 15%; }
+
+.assignments-table th.sortable {
+    cursor: pointer;
+    user-select: none;
+}
+
+.assignments-table th.sorted-asc::after,
+.assignments-table th.sorted-desc::after {
+    padding-left: 0.4em;
+    font-size: 0.7em;
+}
+
+.assignments-table th.sorted-asc::after { content: "\\25B2"; }
+.assignments-table th.sorted-desc::after { content: "\\25BC"; }
+
+/* Long lists are windowed, which needs rows of one fixed height */
+.assignments-table.virtual {
+    table-layout: fixed;
+}
+
+.assignments-table.virtual td {
+    white-space: nowrap;
+    overflow: hidden;
+    text-overflow: ellipsis;
+}
+
+.spacer-row td {
+    padding: 0 !important;
+    border: none !important;
+}
+
+.date-col { color: #64748b; font-size: 0.9rem; }
+.category-col { color: #0ea5e9; font-weight: 500; }
+.assignment-col { color: #1e293b; }
+.grade-col { font-weight: 600; }
+
+.no-data {
+    text-align: center;
+    color: #64748b;
+    font-style: italic;
+    padding: 2rem !important;
+}
+
+/* Category Averages Styles */
+.categories-container {
+    display: flex;
+    flex-direction: column;
+    gap: 1rem;
+}
+
+.category-bar {
+    background: white;
+    border-radius: 8px;
+    padding: 1rem;
+    box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
+    border: 1px solid #e2e8f0;
+}
+
+.category-info {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    margin-bottom: 0.75rem;
+}
+
+.category-name {
+    color: #1e293b;
+    font-weight: 500;
+    font-size: 0.9rem;
+}
+
+.progress-bar {
+    width: 100%;
+    height: 8px;
+    background: #e2e8f0;
+    border-radius: 4px;
+    overflow: hidden;
+}
+
+.progress-fill {
+    height: 100%;
+    border-radius: 4px;
+    transition: width 0.6s ease;
+}
+
+@media (max-width: 768px) {
+    .container {
+        padding: 1rem;
+    }
+
+    .summary-table th,
+    .course-name,
+    .course-average,
+    .course-grade,
+    .course-year {
+        padding: 1rem;
+    }
+
+    .modal-content {
+        width: 95%;
+        margin: 5% auto;
+    }
+
+    .modal-header {
+        padding: 1rem;
+        flex-direction: column;
+        align-items: stretch;
+    }
+
+    .modal-title-section {
+        justify-content: space-between;
+    }
+
+    .assignments-view, .categories-view {
+        padding: 1rem;
+    }
+
+    .assignments-table {
+        font-size: 0.85rem;
+    }
+
+    .assignments-table th,
+    .assignments-table td {
+        padding: 0.75rem 0.5rem;
+    }
+}
+"""
+
+DASHBOARD_JS = r"""
+let gradesData = {classes: {}};
+let classesData = [];
+let currentMainMP = 'MP1';
+let currentModalIndex = null;
+let currentModalMP = 'MP1';
+let markingPeriods = [];
+let dataLoaded = false;
+const STALE_NOTE = 'Could not be refreshed; showing the last saved grades';
+
+// Assignment lists longer than this only render the rows scrolled into view
+const VIRTUALIZE_THRESHOLD = 100;
+const VIRTUAL_OVERSCAN = 10;
+const SCHOOL_YEAR_START_MONTH = 8;
+// Escaped rows and sort indexes per class and MP; cleared when new data arrives
+let assignmentCache = new Map();
+let assignmentSort = {key: null, dir: 1};
+let assignmentFilter = '';
+let assignmentView = null;
+let virtualRowHeight = 0;
+let scrollFrame = null;
+const SEARCH_DELAY_MS = 150;
+let searchTimer = null;
+let searchResults = [];
+
+// Initialize the dashboard
+document.addEventListener('DOMContentLoaded', function() {
+    document.getElementById('modal-body').addEventListener('scroll', onAssignmentsScroll, {passive: true});
+    window.addEventListener('resize', onAssignmentsScroll);
+    loadData();
+});
+
+// Loads the data script written by generate_dashboard. Only this small file
+// changes between refreshes; the shell, CSS and JS stay cached.
+function loadData(onLoaded) {
+    const script = document.createElement('script');
+    script.src = document.body.dataset.dataScript + '?v=' + Date.now();
+    script.onload = function() {
+        script.remove();
+        applyData();
+        if (onLoaded) onLoaded();
+    };
+    script.onerror = function() {
+        script.remove();
+        console.error('Could not load dashboard data');
+    };
+    document.head.appendChild(script);
+}
+
+function applyData() {
+    const summary = window.dashboardSummary;
+    const user = summary.user || {};
+    gradesData = window.gradesData || {classes: {}};
+    classesData = summary.classes;
+    assignmentCache.clear();
+
+    document.title = 'Grades Dashboard — ' + (user.schoolName || '');
+    document.getElementById('subtitle').textContent =
+        `${user.schoolName || ''} • Grade ${user.grade || ''} • Student ID: ${user.studentID || ''}`;
+
+    updateMarkingPeriodOptions(summary.markingPeriods || [summary.activeMP]);
+    if (!dataLoaded || !markingPeriods.includes(currentMainMP)) {
+        // Set active MP in main dropdown on first load (or if the selected one is gone)
+        currentMainMP = summary.activeMP;
+        dataLoaded = true;
+    }
+    if (!markingPeriods.includes(currentModalMP)) {
+        currentModalMP = currentMainMP;
+    }
+    document.getElementById('main-mp-select').value = currentMainMP;
+    document.getElementById('modal-mp-select').value = currentModalMP;
+
+    renderSummaryRows();
+    updateSummaryTable();
+    updateGpa(summary.gpa);
+    if (currentModalIndex !== null && currentModalIndex < classesData.length) {
+        updateModalContent();
+    }
+}
+
+// The selectors offer the marking periods found in the data, not a fixed list
+function updateMarkingPeriodOptions(periods) {
+    if (periods.join('\u0000') === markingPeriods.join('\u0000')) return;
+    markingPeriods = periods.slice();
+    const options = periods.map(mp => `<option value="${escapeHtml(mp)}">${escapeHtml(mp)}</option>`).join('');
+    document.getElementById('main-mp-select').innerHTML = options;
+    document.getElementById('modal-mp-select').innerHTML = options;
+}
+
+// Also called from Python while a background refresh streams in new data
+function setUpdating(updating) {
+    const updateBtn = document.getElementById('update-btn');
+    updateBtn.disabled = updating;
+    updateBtn.textContent = updating ? 'Updating...' : 'Update Grades';
+}
+
+function updateGrades() {
+    // Disable button and show loading state
+    setUpdating(true);
+
+    // Call the Python function via pywebview
+    if (window.pywebview && window.pywebview.api) {
+        window.pywebview.api.update_grades().then(function(result) {
+            // Re-enable button
+            setUpdating(false);
+
+            // Reload only the data to show updated grades
+            loadData();
+        }).catch(function(error) {
+            console.error('Error updating grades:', error);
+
+            // Re-enable button on error
+            setUpdating(false);
+
+            alert('Error updating grades. Please try again.');
+        });
+    } else {
+        // Fallback for development/testing
+        console.log('pywebview not available, update_grades() would be called');
+        setUpdating(false);
+    }
+}
+
+function updateMainMP() {
+    currentMainMP = document.getElementById('main-mp-select').value;
+    updateSummaryTable();
+}
+
+function renderSummaryRows() {
+    let rows = '';
+    classesData.forEach((cls, i) => {
+        rows += `
+            <tr class="course-row" onclick="openModal(${i})" data-class-index="${i}">
+                <td class="course-name">${escapeHtml(cls.name)}</td>
+                <td class="course-average" data-mp-grade></td>
+                <td class="course-grade" data-mp-letter></td>
+                <td class="course-year" style="color: ${cls.year.grade_color}">${cls.year.average !== null ? cls.year.average + '% ' + cls.year.letter : 'N/A'}</td>
+            </tr>
+        `;
+    });
+    document.getElementById('summary-tbody').innerHTML = rows;
+}
+
+function updateSummaryTable() {
+    const rows = document.querySelectorAll('[data-class-index]');
+    rows.forEach((row, index) => {
+        const classData = classesData[index];
+        const mpData = classData.mp_data[currentMainMP];
+
+        const gradeCell = row.querySelector('[data-mp-grade]');
+        const letterCell = row.querySelector('[data-mp-letter]');
+
+        const gradeDisplay = mpData.overall_pct !== null ? mpData.overall_pct + '%' : 'No Grades';
+
+        gradeCell.textContent = gradeDisplay + (mpData.stale ? ' *' : '');
+        gradeCell.title = mpData.stale ? STALE_NOTE : '';
+        gradeCell.style.color = mpData.grade_color;
+
+        letterCell.textContent = mpData.letter_grade;
+        letterCell.style.color = mpData.grade_color;
+    });
+}
+
+function describeChange(change) {
+    const parts = ['new', 'changed', 'removed']
+        .filter(kind => change[kind].length)
+        .map(kind => change[kind].length + ' ' + kind);
+    let text = change.class + ': ' + parts.join(', ');
+    if (change.average !== null) {
+        const previous = change.previousAverage !== null ? change.previousAverage + '%' : 'N/A';
+        text += ` (${previous} → ${change.average}%)`;
+    }
+    return text;
+}
+
+// Called from Python when a refresh finds new, changed or removed grades
+function onGradeChanges(event) {
+    const banner = document.getElementById('changes-banner');
+    const items = event.classes.map(change => `<li>${escapeHtml(describeChange(change))}</li>`).join('');
+    banner.innerHTML = `<strong>New grades in ${escapeHtml(event.markingPeriod)}</strong> — click to show<ul>${items}</ul>`;
+    banner.style.display = 'block';
+}
+
+function showChanges() {
+    document.getElementById('changes-banner').style.display = 'none';
+    loadData();
+}
+
+function onSearchInput() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(runSearch, SEARCH_DELAY_MS);
+}
+
+function runSearch() {
+    const query = document.getElementById('search-input').value.trim();
+    if (!query || !(window.pywebview && window.pywebview.api)) {
+        document.getElementById('search-results').style.display = 'none';
+        return;
+    }
+    window.pywebview.api.search(query).then(function(result) {
+        // Ignore answers to queries that have since been edited
+        if (document.getElementById('search-input').value.trim() !== query) return;
+        searchResults = result.success ? result.results : [];
+        renderSearchResults();
+    });
+}
+
+// The index marks matched words with \u0001...\u0002; they survive escaping and become <mark>
+function markMatches(text) {
+    return escapeHtml(text || '').replace(/\u0001/g, '<mark>').replace(/\u0002/g, '</mark>');
+}
+
+function renderSearchResults() {
+    const panel = document.getElementById('search-results');
+    if (!searchResults.length) {
+        panel.innerHTML = '<div class="search-result search-result-meta">No matching assignments</div>';
+    } else {
+        panel.innerHTML = searchResults.map((r, i) =>
+            `<div class="search-result" onclick="openSearchResult(${i})">` +
+            `<div>${markMatches(r.nameHighlight)}</div>` +
+            `<div class="search-result-meta">${escapeHtml(r.class)} • ${escapeHtml(r.markingPeriod)} • ` +
+            `${escapeHtml(r.category || '')} • ${escapeHtml(r.date || '')}</div>` +
+            (r.description ? `<div class="search-result-snippet">${markMatches(r.descriptionSnippet)}</div>` : '') +
+            `</div>`
+        ).join('');
+    }
+    panel.style.display = 'block';
+}
+
+function openSearchResult(i) {
+    const result = searchResults[i];
+    const index = classesData.findIndex(cls => cls.name === result.class);
+    document.getElementById('search-results').style.display = 'none';
+    if (index < 0) return;
+    openModal(index);
+    if (markingPeriods.includes(result.markingPeriod)) {
+        currentModalMP = result.markingPeriod;
+        document.getElementById('modal-mp-select').value = result.markingPeriod;
+        updateModalContent();
+    }
+}
+
+function updateGpa(gpa) {
+    const element = document.getElementById('gpa');
+    if (!gpa || gpa.unweighted === null) {
+        element.textContent = '';
+        return;
+    }
+    element.textContent = `GPA ${gpa.unweighted.toFixed(2)} • Weighted ${gpa.weighted.toFixed(2)}`;
+}
+
+function openModal(index) {
+    currentModalIndex = index;
+    document.getElementById('modal-title').textContent = 'View Assignments for ' + classesData[index].name;
+    document.getElementById('modal').style.display = 'block';
+    document.body.style.overflow = 'hidden';
+
+    // Set modal MP to current main MP
+    currentModalMP = currentMainMP;
+    document.getElementById('modal-mp-select').value = currentMainMP;
+    updateModalContent();
+}
+
+function closeModal() {
+    document.getElementById('modal').style.display = 'none';
+    document.body.style.overflow = 'auto';
+    currentModalIndex = null;
+}
+
+function updateModalMP() {
+    currentModalMP = document.getElementById('modal-mp-select').value;
+    updateModalContent();
+}
+
+function updateModalContent() {
+    const classData = classesData[currentModalIndex];
+    const mp = currentModalMP || currentMainMP;
+    const mpData = classData.mp_data[mp];
+    const rawClass = gradesData.classes[classData.name] || {};
+    const grades = (rawClass.grades || {})[mp] || [];
+    const catWeights = (rawClass.categoryWeights || {})[mp] || {};
+
+    // Update grade display
+    const gradeElement = document.getElementById('modal-grade-percent');
+    const gradeDisplay = mpData.overall_pct !== null ? mpData.overall_pct + '%' : 'N/A';
+    gradeElement.textContent = gradeDisplay + (mpData.stale ? ' *' : '');
+    gradeElement.title = mpData.stale ? STALE_NOTE : '';
+    gradeElement.style.color = mpData.grade_color;
+    gradeElement.style.borderColor = mpData.grade_color;
+
+    // Update assignments table
+    updateAssignmentsTable(classData.name, mp, grades);
+
+    // Update categories
+    updateCategoriesView(catWeights, mpData.cat_scores);
+}
+
+// Sort key for "MM/DD[/YYYY]" due dates; dates without a year fall in the
+// current school year. Undated assignments sort last.
+function dueDateKey(date) {
+    const m = /^\s*(\d{1,2})\/(\d{1,2})(?:\/(\d{2,4}))?\s*$/.exec(date || '');
+    if (!m) return Infinity;
+    const month = Number(m[1]);
+    let year;
+    if (m[3]) {
+        year = Number(m[3]);
+        if (year < 100) year += 2000;
+    } else {
+        const now = new Date();
+        const start = now.getMonth() + 1 >= SCHOOL_YEAR_START_MONTH ? now.getFullYear() : now.getFullYear() - 1;
+        year = month >= SCHOOL_YEAR_START_MONTH ? start : start + 1;
+    }
+    return year * 10000 + month * 100 + Number(m[2]);
+}
+
+function buildAssignmentRow(g) {
+    const name = escapeHtml(g.name || '');
+    let gradeDisplay = 'N/A';
+    if (g.totalPoints && g.totalPoints > 0) {
+        gradeDisplay = ((g.pointsEarned / g.totalPoints) * 100).toFixed(1) + '%';
+    }
+    const title = g.description ? name + ' — ' + escapeHtml(g.description) : name;
+    return `<tr><td class="date-col">${escapeHtml(g.date || '')}</td>` +
+        `<td class="category-col">${escapeHtml(g.category || '')}</td>` +
+        `<td class="assignment-col" title="${title}">${name}</td>` +
+        `<td class="grade-col">${gradeDisplay}</td></tr>`;
+}
+
+// Builds (once per class and MP) the escaped rows and the orderings used by sort/filter
+function getAssignmentEntry(className, mp, grades) {
+    const key = className + '\u0000' + mp;
+    let entry = assignmentCache.get(key);
+    if (entry) return entry;
+
+    const rows = grades.map(buildAssignmentRow);
+    const dateKeys = grades.map(g => dueDateKey(g.date));
+    const categoryOf = grades.map(g => g.category || '');
+    const original = grades.map((g, i) => i);
+    const byDate = original.slice().sort((a, b) => dateKeys[a] - dateKeys[b] || a - b);
+    const byCategory = original.slice().sort((a, b) =>
+        categoryOf[a].localeCompare(categoryOf[b]) || dateKeys[a] - dateKeys[b] || a - b);
+    const categories = Array.from(new Set(categoryOf)).sort((a, b) => a.localeCompare(b));
+
+    entry = {key, rows, categoryOf, categories, orders: {original, date: byDate, category: byCategory}};
+    assignmentCache.set(key, entry);
+    return entry;
+}
+
+function updateAssignmentsTable(className, mp, grades) {
+    const entry = getAssignmentEntry(className, mp, grades);
+    const select = document.getElementById('modal-category-filter');
+    const changed = !assignmentView || assignmentView.entry !== entry;
+
+    if (select.dataset.key !== entry.key) {
+        select.innerHTML = '<option value="">All categories</option>' + entry.categories
+            .map(c => `<option value="${escapeHtml(c)}">${escapeHtml(c || 'N/A')}</option>`).join('');
+        select.dataset.key = entry.key;
+        if (!entry.categories.includes(assignmentFilter)) assignmentFilter = '';
+        select.value = assignmentFilter;
+    }
+
+    showAssignments(entry);
+    if (changed) document.getElementById('modal-body').scrollTop = 0;
+}
+
+function showAssignments(entry) {
+    let order = entry.orders[assignmentSort.key] || entry.orders.original;
+    if (assignmentFilter) order = order.filter(i => entry.categoryOf[i] === assignmentFilter);
+    if (assignmentSort.key && assignmentSort.dir < 0) order = order.slice().reverse();
+
+    const virtual = order.length > VIRTUALIZE_THRESHOLD;
+    document.querySelector('.assignments-table').classList.toggle('virtual', virtual);
+    assignmentView = {entry, order, virtual, first: -1, last: -1};
+    renderAssignmentRows();
+}
+
+function spacerRow(height) {
+    return height > 0 ? `<tr class="spacer-row"><td colspan="4" style="height:${height}px"></td></tr>` : '';
+}
+
+// Renders the current view; long lists only get the rows in (or near) the viewport,
+// with spacer rows standing in for the rest so the scrollbar stays true
+function renderAssignmentRows() {
+    const view = assignmentView;
+    const tbody = document.getElementById('assignments-tbody');
+    const rows = view.entry.rows;
+
+    if (view.order.length === 0) {
+        const message = rows.length ? 'No assignments in this category' : 'No assignments yet';
+        tbody.innerHTML = `<tr><td colspan="4" class="no-data">${message}</td></tr>`;
+        return;
+    }
+    if (!view.virtual) {
+        tbody.innerHTML = view.order.map(i => rows[i]).join('');
+        return;
+    }
+
+    const scroller = document.getElementById('modal-body');
+    const rowHeight = virtualRowHeight || 53;
+    const tableTop = tbody.getBoundingClientRect().top - scroller.getBoundingClientRect().top + scroller.scrollTop;
+    const firstVisible = Math.max(0, Math.floor((scroller.scrollTop - tableTop) / rowHeight));
+    const first = Math.max(0, firstVisible - VIRTUAL_OVERSCAN);
+    const last = Math.min(view.order.length, firstVisible + Math.ceil(scroller.clientHeight / rowHeight) + VIRTUAL_OVERSCAN);
+    if (first === view.first && last === view.last) return;
+    view.first = first;
+    view.last = last;
+
+    const visible = [];
+    for (let i = first; i < last; i++) visible.push(rows[view.order[i]]);
+    tbody.innerHTML = spacerRow(first * rowHeight) + visible.join('') + spacerRow((view.order.length - last) * rowHeight);
+
+    if (!virtualRowHeight) {
+        const row = tbody.querySelector('tr:not(.spacer-row)');
+        const measured = row ? row.getBoundingClientRect().height : 0;
+        if (measured > 0) {
+            virtualRowHeight = measured;
+            view.first = -1;
+            renderAssignmentRows();
+        }
+    }
+}
+
+function onAssignmentsScroll() {
+    if (!assignmentView || !assignmentView.virtual || scrollFrame !== null) return;
+    scrollFrame = requestAnimationFrame(function() {
+        scrollFrame = null;
+        renderAssignmentRows();
+    });
+}
+
+function sortAssignments(key) {
+    if (assignmentSort.key === key) {
+        assignmentSort.dir = -assignmentSort.dir;
+    } else {
+        assignmentSort = {key, dir: 1};
+    }
+    document.querySelectorAll('.assignments-table th[data-sort]').forEach(th => {
+        th.classList.toggle('sorted-asc', th.dataset.sort === key && assignmentSort.dir > 0);
+        th.classList.toggle('sorted-desc', th.dataset.sort === key && assignmentSort.dir < 0);
+    });
+    if (assignmentView) showAssignments(assignmentView.entry);
+}
+
+function filterAssignments() {
+    assignmentFilter = document.getElementById('modal-category-filter').value;
+    if (assignmentView) showAssignments(assignmentView.entry);
+}
+
+function updateCategoriesView(catWeights, catScores) {
+    const container = document.getElementById('categories-container');
+
+    let html = '';
+    Object.entries(catWeights).forEach(([cat, weight]) => {
+        const score = catScores[cat];
+        let catDisplay = 'No Grades';
+        let color = '#64748b';
+        let barWidth = 0;
+
+        if (score !== null && score !== undefined) {
+            catDisplay = (score * 100).toFixed(1) + '%';
+            color = getGradeColor(score * 100);
+            barWidth = score * 100;
+        }
+
+        const weightDisplay = `(${(weight * 100).toFixed(0)}%)`;
+
+        html += `
+            <div class="category-bar">
+                <div class="category-info">
+                    <span class="category-name">${escapeHtml(cat)} ${weightDisplay}</span>
                 </div>
-                
-                <div class="modal-body">
-                    <div id="categories-view-{i}" class="categories-view" style="display: none;">
-                        <div id="categories-container-{i}" class="categories-container">
-                            <!-- Categories will be populated by JavaScript -->
-                        </div>
-                    </div>
-                    
-                    <div id="assignments-view-{i}" class="assignments-view">
-                        <table class="assignments-table">
-                            <thead>
-                                <tr>
-                                    <th class="due-header">DUE</th>
-                                    <th class="category-header">CATEGORY</th>
-                                    <th class="assignment-header">ASSIGNMENT</th>
-                                    <th class="grade-header">GRADE</th>
-                                </tr>
-                            </thead>
-                            <tbody id="assignments-tbody-{i}">
-                                <!-- Assignments will be populated by JavaScript -->
-                            </tbody>
-                        </table>
-                    </div>
+                <div class="progress-bar">
+                    <div class="progress-fill" style="width: ${barWidth}%; background-color: ${color};"></div>
                 </div>
             </div>
-        </div>
-        """)
-
-    # HTML template
-    page_template = Template("""
-<!doctype html>
+        `;
+    });
+
+    container.innerHTML = html;
+}
+
+function toggleCategories() {
+    const categoriesView = document.getElementById('categories-view');
+    const toggleBtn = document.getElementById('toggle-categories');
+
+    // The assignment rows move down or up, so the rendered window has to follow
+    if (assignmentView && assignmentView.virtual) onAssignmentsScroll();
+
+    if (categoriesView.style.display === 'none') {
+        categoriesView.style.display = 'block';
+        toggleBtn.textContent = 'Hide Category Averages';
+
+        // Animate progress bars when showing categories
+        setTimeout(() => {
+            const progressBars = categoriesView.querySelectorAll('.progress-fill');
+            progressBars.forEach(bar => {
+                const width = bar.style.width;
+                bar.style.width = '0%';
+                setTimeout(() => bar.style.width = width, 100);
+            });
+        }, 50);
+    } else {
+        categoriesView.style.display = 'none';
+        toggleBtn.textContent = 'Show Category Averages';
+    }
+}
+
+function getGradeColor(pct) {
+    if (pct === null || pct === undefined) return "#64748b";
+    if (pct >= 90) return "#10b981";
+    if (pct >= 80) return "#06b6d4";
+    if (pct >= 70) return "#f59e0b";
+    if (pct >= 60) return "#f97316";
+    return "#ef4444";
+}
+
+const HTML_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'};
+
+function escapeHtml(text) {
+    return String(text == null ? '' : text).replace(/[&<>"']/g, c => HTML_ESCAPES[c]);
+}
+
+// Close modal when clicking outside
+window.onclick = function(event) {
+    if (event.target.classList.contains('modal')) {
+        closeModal();
+    }
+}
+
+// Close modal with Escape key
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'Escape' && currentModalIndex !== null) {
+        closeModal();
+    }
+});
+"""
+
+SHELL_TEMPLATE = Template("""<!doctype html>
 <html lang="en">
 <head>
     <meta charset="utf-8">
-    <title>Grades Dashboard — $schoolName</title>
+    <title>Grades Dashboard</title>
     <meta name="viewport" content="width=device-width,initial-scale=1">
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: #f0f9ff;
-            color: #0f172a;
-            min-height: 100vh;
-        }
-
-        .container {
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 2rem;
-        }
-
-        .header {
-            text-align: center;
-            margin-bottom: 2rem;
-        }
-
-        .header h1 {
-            font-size: 2rem;
-            font-weight: 700;
-            color: #0f172a;
-            margin-bottom: 0.5rem;
-        }
-
-        .header .subtitle {
-            color: #64748b;
-            font-size: 1rem;
-        }
-
-        .controls {
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            gap: 1rem;
-            margin-bottom: 2rem;
-        }
-
-        .mp-select {
-            padding: 0.5rem 1rem;
-            border: 1px solid #cbd5e1;
-            border-radius: 8px;
-            background: white;
-            color: #1e293b;
-            font-size: 0.9rem;
-            cursor: pointer;
-        }
-
-        .mp-select:focus {
-            outline: none;
-            border-color: #0ea5e9;
-            box-shadow: 0 0 0 3px rgba(14, 165, 233, 0.1);
-        }
-
-        .update-btn {
-            background: #0ea5e9;
-            color: white;
-            border: none;
-            padding: 0.5rem 1rem;
-            border-radius: 8px;
-            cursor: pointer;
-            font-size: 0.9rem;
-            font-weight: 500;
-            transition: all 0.2s;
-        }
-
-        .update-btn:hover {
-            background: #0284c7;
-        }
-
-        .update-btn:disabled {
-            background: #94a3b8;
-            cursor: not-allowed;
-        }
-
-        .summary-table {
-            width: 100%;
-            border-collapse: collapse;
-            background: white;
-            border-radius: 12px;
-            overflow: hidden;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.05);
-            border: 1px solid #e0f2fe;
-        }
-
-        .summary-table thead {
-            background: #0ea5e9;
-        }
-
-        .summary-table th {
-            padding: 1rem 1.5rem;
-            text-align: left;
-            font-weight: 600;
-            font-size: 0.875rem;
-            letter-spacing: 0.05em;
-            text-transform: uppercase;
-            color: white;
-            border-bottom: none;
-        }
-
-        .summary-table th:first-child {
-            width: 50%;
-        }
-
-        .summary-table th:nth-child(2) {
-            width: 25%;
-            text-align: center;
-        }
-
-        .summary-table th:last-child {
-            width: 25%;
-            text-align: center;
-        }
-
-        .course-row {
-            cursor: pointer;
-            transition: all 0.2s ease;
-            border-bottom: 1px solid #f1f5f9;
-        }
-
-        .course-row:hover {
-            background: #f0f9ff;
-        }
-
-        .course-row:last-child {
-            border-bottom: none;
-        }
-
-        .course-name {
-            padding: 1.25rem 1.5rem;
-            font-weight: 500;
-            color: #0f172a;
-        }
-
-        .course-average {
-            padding: 1.25rem 1.5rem;
-            text-align: center;
-            font-weight: 600;
-            font-size: 1rem;
-        }
-
-        .course-grade {
-            padding: 1.25rem 1.5rem;
-            text-align: center;
-            font-weight: 700;
-            font-size: 1.1rem;
-        }
-
-        /* Modal Styles */
-        .modal {
-            display: none;
-            position: fixed;
-            z-index: 1000;
-            left: 0;
-            top: 0;
-            width: 100%;
-            height: 100%;
-            background: rgba(0, 0, 0, 0.8);
-            backdrop-filter: blur(4px);
-        }
-
-        .modal-content {
-            background: #f8fafc;
-            margin: 2% auto;
-            padding: 0;
-            border-radius: 16px;
-            width: 90%;
-            max-width: 1000px;
-            max-height: 90vh;
-            overflow: hidden;
-            box-shadow: 0 20px 25px rgba(0, 0, 0, 0.15);
-        }
-
-        .modal-header {
-            background: #1e293b;
-            padding: 1.5rem 2rem;
-            border-bottom: 1px solid #cbd5e1;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            flex-wrap: wrap;
-            gap: 1rem;
-        }
-
-        .modal-title-section {
-            display: flex;
-            align-items: center;
-            gap: 1rem;
-            flex: 1;
-        }
-
-        .modal-title {
-            color: white;
-            font-size: 1.2rem;
-            font-weight: 600;
-        }
-
-        .close-btn {
-            background: rgba(255, 255, 255, 0.2);
-            border: none;
-            color: white;
-            font-size: 1.5rem;
-            cursor: pointer;
-            padding: 0.5rem;
-            border-radius: 6px;
-            transition: all 0.2s;
-        }
-
-        .close-btn:hover {
-            background: rgba(255, 255, 255, 0.3);
-        }
-
-        .modal-controls {
-            display: flex;
-            align-items: center;
-            gap: 1rem;
-            flex-wrap: wrap;
-        }
-
-        .modal-grade {
-            display: flex;
-            align-items: center;
-            gap: 1rem;
-        }
-
-        .modal-grade-percent {
-            font-size: 1.8rem;
-            font-weight: 700;
-            background: white;
-            padding: 0.5rem 0.5rem;
-            border-radius: 8px;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-        }
-
-        .toggle-btn {
-            background: #0ea5e9;
-            color: white;
-            border: none;
-            padding: 0.5rem 1rem;
-            border-radius: 8px;
-            cursor: pointer;
-            font-size: 0.85rem;
-            font-weight: 500;
-            transition: all 0.2s;
-        }
-
-        .toggle-btn:hover {
-            background: #0284c7;
-        }
-
-        .modal-body {
-            max-height: 80vh;
-            overflow-y: auto;
-        }
-
-        .assignments-view {
-            padding: 2rem;
-        }
-
-        .categories-view {
-            padding: 2rem;
-            border-bottom: 1px solid #e2e8f0;
-        }
-
-        .assignments-table {
-            width: 100%;
-            border-collapse: collapse;
-        }
-
-        .assignments-table th {
-            background: #374151;
-            color: white;
-            padding: 1rem;
-            text-align: left;
-            font-size: 0.75rem;
-            font-weight: 600;
-            letter-spacing: 0.05em;
-            text-transform: uppercase;
-            border-bottom: none;
-        }
-
-        .assignments-table td {
-            padding: 1rem;
-            border-bottom: 1px solid #e2e8f0;
-            color: #1e293b;
-        }
-
-        .assignments-table tr:hover {
-            background: #f1f5f9;
-        }
-
-        .due-header { width: 15%; }
-        .category-header { width: 25%; }
-        .assignment-header { width: 45%; }
-        .grade-header { width: 15%; }
-
-        .date-col { color: #64748b; font-size: 0.9rem; }
-        .category-col { color: #0ea5e9; font-weight: 500; }
-        .assignment-col { color: #1e293b; }
-        .grade-col { font-weight: 600; }
-
-        .no-data {
-            text-align: center;
-            color: #64748b;
-            font-style: italic;
-            padding: 2rem !important;
-        }
-
-        /* Category Averages Styles */
-        .categories-container {
-            display: flex;
-            flex-direction: column;
-            gap: 1rem;
-        }
-
-        .category-bar {
-            background: white;
-            border-radius: 8px;
-            padding: 1rem;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
-            border: 1px solid #e2e8f0;
-        }
-
-        .category-info {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 0.75rem;
-        }
-
-        .category-name {
-            color: #1e293b;
-            font-weight: 500;
-            font-size: 0.9rem;
-        }
-
-        .progress-bar {
-            width: 100%;
-            height: 8px;
-            background: #e2e8f0;
-            border-radius: 4px;
-            overflow: hidden;
-        }
-
-        .progress-fill {
-            height: 100%;
-            border-radius: 4px;
-            transition: width 0.6s ease;
-        }
-
-        @media (max-width: 768px) {
-            .container {
-                padding: 1rem;
-            }
-
-            .summary-table th,
-            .course-name,
-            .course-average,
-            .course-grade {
-                padding: 1rem;
-            }
-
-            .modal-content {
-                width: 95%;
-                margin: 5% auto;
-            }
-
-            .modal-header {
-                padding: 1rem;
-                flex-direction: column;
-                align-items: stretch;
-            }
-
-            .modal-title-section {
-                justify-content: space-between;
-            }
-
-            .assignments-view, .categories-view {
-                padding: 1rem;
-            }
-
-            .assignments-table {
-                font-size: 0.85rem;
-            }
-
-            .assignments-table th,
-            .assignments-table td {
-                padding: 0.75rem 0.5rem;
-            }
-        }
-    </style>
+    <link rel="stylesheet" href="$css_href">
+    <script src="$js_href"></script>
 </head>
-<body>
+<body data-data-script="$data_script">
     <div class="container">
         <header class="header">
             <h1>Grades Dashboard</h1>
-            <div class="subtitle">$schoolName • Grade $grade • Student ID: $studentID</div>
+            <div id="subtitle" class="subtitle"></div>
         </header>
 
         <div class="controls">
             <button id="update-btn" class="update-btn" onclick="updateGrades()">Update Grades</button>
-            <select id="main-mp-select" class="mp-select" onchange="updateMainMP()">
-                <option value="MP1">MP1</option>
-                <option value="MP2">MP2</option>
-                <option value="MP3">MP3</option>
-                <option value="MP4">MP4</option>
-            </select>
+            <select id="main-mp-select" class="mp-select" onchange="updateMainMP()"></select>
+            <span id="gpa" class="gpa"></span>
+            <div class="search-box">
+                <input id="search-input" class="search-input" type="search" placeholder="Search assignments"
+                       oninput="onSearchInput()">
+                <div id="search-results" class="search-results"></div>
+            </div>
         </div>
 
+        <div id="changes-banner" class="changes-banner" onclick="showChanges()"></div>
+
         <main>
             <table class="summary-table">
                 <thead>
@@ -608,275 +1105,342 @@ def generate_dashboard(json_file="output.json", html_file="dashboard.html"):
                         <th>COURSE</th>
                         <th>AVERAGE</th>
                         <th>GRADE</th>
+                        <th>YEAR</th>
                     </tr>
                 </thead>
                 <tbody id="summary-tbody">
-                    $summary_rows
+                    <!-- Courses will be populated by JavaScript -->
                 </tbody>
             </table>
         </main>
     </div>
 
-    $modal_content
+    <div id="modal" class="modal">
+        <div class="modal-content">
+            <div class="modal-header">
+                <div class="modal-title-section">
+                    <h2 id="modal-title" class="modal-title"></h2>
+                    <button class="close-btn" onclick="closeModal()">&times;</button>
+                </div>
+                <div class="modal-controls">
+                    <select id="modal-mp-select" class="mp-select" onchange="updateModalMP()"></select>
+                    <select id="modal-category-filter" class="mp-select" onchange="filterAssignments()">
+                        <option value="">All categories</option>
+                    </select>
+                    <div class="modal-grade">
+                        <span id="modal-grade-percent" class="modal-grade-percent"></span>
+                        <button id="toggle-categories" class="toggle-btn" onclick="toggleCategories()">
+                            Show Category Averages
+                        </button>
+                    </div>
+                </div>
+            </div>
 
-    <script>
-        const classesData = $classes_data_json;
-        const activeMP = '$active_mp';
-        let currentMainMP = activeMP;
-        let currentModalMP = {};
+            <div id="modal-body" class="modal-body">
+                <div id="categories-view" class="categories-view" style="display: none;">
+                    <div id="categories-container" class="categories-container">
+                        <!-- Categories will be populated by JavaScript -->
+                    </div>
+                </div>
 
-        // Initialize the dashboard
-        document.addEventListener('DOMContentLoaded', function() {
-            // Set active MP in main dropdown
-            document.getElementById('main-mp-select').value = activeMP;
-            updateMainMP();
-        });
+                <div id="assignments-view" class="assignments-view">
+                    <table class="assignments-table">
+                        <thead>
+                            <tr>
+                                <th class="due-header sortable" data-sort="date" onclick="sortAssignments('date')">DUE</th>
+                                <th class="category-header sortable" data-sort="category" onclick="sortAssignments('category')">CATEGORY</th>
+                                <th class="assignment-header">ASSIGNMENT</th>
+                                <th class="grade-header">GRADE</th>
+                            </tr>
+                        </thead>
+                        <tbody id="assignments-tbody">
+                            <!-- Assignments will be populated by JavaScript -->
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+_ASSET_CACHE = {}
+# ((filename, bytes), ...) of the minified CSS and JS, built once per process
+_STATIC_ASSETS = None
+
+def _minify_css(css):
+    """Strips comments and insignificant whitespace from CSS."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+def _minify_js(js):
+    """Drops indentation, blank lines and whole-line comments. Line breaks are kept so ASI still applies."""
+    lines = []
+    for line in js.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith("//"):
+            lines.append(stripped)
+    return "\n".join(lines)
+
+def _write_if_changed(path, content):
+    """Writes bytes to path unless the file already holds exactly those bytes. Returns True if written."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, "wb") as f:
+        f.write(content)
+    return True
 
-        function updateGrades() {
-            const updateBtn = document.getElementById('update-btn');
-            
-            // Disable button and show loading state
-            updateBtn.disabled = true;
-            updateBtn.textContent = 'Updating...';
-            
-            // Call the Python function via pywebview
-            if (window.pywebview && window.pywebview.api) {
-                window.pywebview.api.update_grades().then(function(result) {
-                    // Re-enable button
-                    updateBtn.disabled = false;
-                    updateBtn.textContent = 'Update Grades';
-                    
-                    // Reload the page to show updated data
-                    window.location.reload();
-                }).catch(function(error) {
-                    console.error('Error updating grades:', error);
-                    
-                    // Re-enable button on error
-                    updateBtn.disabled = false;
-                    updateBtn.textContent = 'Update Grades';
-                    
-                    alert('Error updating grades. Please try again.');
-                });
-            } else {
-                // Fallback for development/testing
-                console.log('pywebview not available, update_grades() would be called');
-                updateBtn.disabled = false;
-                updateBtn.textContent = 'Update Grades';
-            }
-        }
+def static_assets():
+    """
+    Returns the minified CSS and JS as ((filename, bytes), (filename, bytes)), named
+    by content hash. Computed once per process (or handed to worker processes).
+    """
+    global _STATIC_ASSETS
+    if _STATIC_ASSETS is None:
+        assets = []
+        for extension, content in (("css", _minify_css(DASHBOARD_CSS)), ("js", _minify_js(DASHBOARD_JS))):
+            encoded = content.encode("utf-8")
+            assets.append((f"dashboard.{hashlib.sha256(encoded).hexdigest()[:12]}.{extension}", encoded))
+        _STATIC_ASSETS = tuple(assets)
+    return _STATIC_ASSETS
+
+def write_static_assets(output_dir="."):
+    """
+    Writes the minified dashboard CSS/JS into ASSETS_DIRECTORY under output_dir,
+    named by content hash, and removes stale versions. Returns the
+    (css_href, js_href) paths relative to output_dir. Done once per process.
+    """
+    output_dir = os.path.abspath(output_dir)
+    if output_dir in _ASSET_CACHE:
+        return _ASSET_CACHE[output_dir]
+
+    assets_dir = os.path.join(output_dir, ASSETS_DIRECTORY)
+    if not os.path.exists(assets_dir):
+        os.makedirs(assets_dir)
+
+    hrefs = []
+    current_files = set()
+    for filename, encoded in static_assets():
+        filepath = os.path.join(assets_dir, filename)
+        if not os.path.exists(filepath):
+            with open(filepath, "wb") as f:
+                f.write(encoded)
+        current_files.add(filename)
+        hrefs.append(f"{ASSETS_DIRECTORY}/{filename}")
+
+    for filename in os.listdir(assets_dir):
+        if re.match(r"^dashboard\.[0-9a-f]{12}\.(css|js)$", filename) and filename not in current_files:
+            try:
+                os.remove(os.path.join(assets_dir, filename))
+            except OSError:
+                pass
 
-        function updateMainMP() {
-            currentMainMP = document.getElementById('main-mp-select').value;
-            updateSummaryTable();
-        }
+    _ASSET_CACHE[output_dir] = tuple(hrefs)
+    return _ASSET_CACHE[output_dir]
 
-        function updateSummaryTable() {
-            const rows = document.querySelectorAll('[data-class-index]');
-            rows.forEach((row, index) => {
-                const classData = classesData[index];
-                const mpData = classData.mp_data[currentMainMP];
-                
-                const gradeCell = row.querySelector('[data-mp-grade]');
-                const letterCell = row.querySelector('[data-mp-letter]');
-                
-                const gradeDisplay = mpData.overall_pct !== null ? mpData.overall_pct + '%' : 'No Grades';
-                
-                gradeCell.textContent = gradeDisplay;
-                gradeCell.style.color = mpData.grade_color;
-                
-                letterCell.textContent = mpData.letter_grade;
-                letterCell.style.color = mpData.grade_color;
-            });
-        }
+def generate_dashboard(json_file="output.json", html_file="dashboard.html", data=None, data_json=None):
+    """
+    Generate a clean, table-based dashboard matching the provided design mockups.
 
-        function openModal(index) {
-            document.getElementById('modal-' + index).style.display = 'block';
-            document.body.style.overflow = 'hidden';
-            
-            // Set modal MP to current main MP
-            currentModalMP[index] = currentMainMP;
-            document.getElementById('modal-mp-select-' + index).value = currentMainMP;
-            updateModalContent(index);
-        }
+    If the caller already holds the data (and the JSON bytes it wrote to json_file),
+    pass them as data/data_json so the file isn't re-read and nothing is serialized twice.
+    """
+    if data is None:
+        try:
+            data, data_json = load_file(json_file)
+        except FileNotFoundError:
+            print(f"Error: '{json_file}' not found.")
+            return
+        except ValueError as e:
+            print(f"Error parsing JSON: {e}")
+            return
+    elif data_json is None:
+        data_json = dumps(data)
 
-        function closeModal(index) {
-            document.getElementById('modal-' + index).style.display = 'none';
-            document.body.style.overflow = 'auto';
-        }
+    user = data.get("user", {})
+    classes = load_class_models(data.get("classes", {}))
 
-        function updateModalMP(index) {
-            currentModalMP[index] = document.getElementById('modal-mp-select-' + index).value;
-            updateModalContent(index);
-        }
+    def get_grade_color(pct):
+        if pct is None:
+            return "#64748b"
+        if pct >= 90: return "#10b981"
+        if pct >= 80: return "#06b6d4"
+        if pct >= 70: return "#f59e0b"
+        if pct >= 60: return "#f97316"
+        return "#ef4444"
 
-        function updateModalContent(index) {
-            const classData = classesData[index];
-            const mp = currentModalMP[index] || currentMainMP;
-            const mpData = classData.mp_data[mp];
-            
-            // Update grade display
-            const gradeElement = document.getElementById('modal-grade-percent-' + index);
-            const gradeDisplay = mpData.overall_pct !== null ? mpData.overall_pct + '%' : 'N/A';
-            gradeElement.textContent = gradeDisplay;
-            gradeElement.style.color = mpData.grade_color;
-            gradeElement.style.borderColor = mpData.grade_color;
-            
-            // Update assignments table
-            updateAssignmentsTable(index, mpData.grades);
-            
-            // Update categories
-            updateCategoriesView(index, mpData.cat_weights, mpData.cat_scores);
-        }
+    # Every marking period any class meets in (or has data for), in order
+    marking_periods = set()
+    for class_info in classes.values():
+        marking_periods.update(class_info.get("markingPeriods") or [])
+        marking_periods.update(class_info.get("grades") or {})
+        if class_info.get("markingPeriod"):
+            marking_periods.add(class_info["markingPeriod"])
+    marking_periods = sorted(marking_periods or DEFAULT_MARKING_PERIODS, key=marking_period_sort_key)
 
-        function updateAssignmentsTable(index, grades) {
-            const tbody = document.getElementById('assignments-tbody-' + index);
-            
-            if (grades.length === 0) {
-                tbody.innerHTML = '<tr><td colspan="4" class="no-data">No assignments yet</td></tr>';
-                return;
-            }
-            
-            let rows = '';
-            grades.forEach(g => {
-                const name = escapeHtml(g.name || '');
-                const category = escapeHtml(g.category || '');
-                const date = escapeHtml(g.date || '');
-                
-                let gradeDisplay = 'N/A';
-                try {
-                    if (g.totalPoints && g.totalPoints > 0) {
-                        const pct = (g.pointsEarned / g.totalPoints) * 100;
-                        gradeDisplay = pct.toFixed(1) + '%';
-                    }
-                } catch (e) {
-                    gradeDisplay = 'N/A';
-                }
-                
-                rows += `
-                    <tr>
-                        <td class="date-col">${date}</td>
-                        <td class="category-col">${category}</td>
-                        <td class="assignment-col">${name}</td>
-                        <td class="grade-col">${gradeDisplay}</td>
-                    </tr>
-                `;
-            });
-            
-            tbody.innerHTML = rows;
-        }
+    # Year averages and GPA, from the stored per-marking-period category totals
+    year = year_summary(classes)
 
-        function updateCategoriesView(index, catWeights, catScores) {
-            const container = document.getElementById('categories-container-' + index);
-            
-            let html = '';
-            Object.entries(catWeights).forEach(([cat, weight]) => {
-                const score = catScores[cat];
-                let catDisplay = 'No Grades';
-                let color = '#64748b';
-                let barWidth = 0;
-                
-                if (score !== null && score !== undefined) {
-                    catDisplay = (score * 100).toFixed(1) + '%';
-                    color = getGradeColor(score * 100);
-                    barWidth = score * 100;
-                }
-                
-                const weightDisplay = `(${(weight * 100).toFixed(0)}%)`;
-                
-                html += `
-                    <div class="category-bar">
-                        <div class="category-info">
-                            <span class="category-name">${escapeHtml(cat)} ${weightDisplay}</span>
-                        </div>
-                        <div class="progress-bar">
-                            <div class="progress-fill" style="width: ${barWidth}%; background-color: ${color};"></div>
-                        </div>
-                    </div>
-                `;
-            });
+    # Process classes data
+    classes_data = []
+    active_mp = None
+    
+    for class_name, class_info in classes.items():
+        course_code = class_info.get("courseCode", "")
+        marking_period = class_info.get("markingPeriod", "")
+        if active_mp is None:
+            active_mp = marking_period  # Set active MP from first class
+        
+        class_year = year["classes"][class_name]
+        stale_mps = class_info.get("staleMarkingPeriods", [])
+        
+        # Calculate grades for all marking periods
+        mp_data = {}
+        for mp in marking_periods:
+            overall_pct, cat_scores = mp_grade(class_info, mp)
             
-            container.innerHTML = html;
-        }
-
-        function toggleCategories(index) {
-            const categoriesView = document.getElementById('categories-view-' + index);
-            const toggleBtn = document.getElementById('toggle-categories-' + index);
-
-            if (categoriesView.style.display === 'none') {
-                categoriesView.style.display = 'block';
-                toggleBtn.textContent = 'Hide Category Averages';
-                
-                // Animate progress bars when showing categories
-                setTimeout(() => {
-                    const progressBars = categoriesView.querySelectorAll('.progress-fill');
-                    progressBars.forEach(bar => {
-                        const width = bar.style.width;
-                        bar.style.width = '0%';
-                        setTimeout(() => bar.style.width = width, 100);
-                    });
-                }, 50);
-            } else {
-                categoriesView.style.display = 'none';
-                toggleBtn.textContent = 'Show Category Averages';
-            }
-        }
-
-        function getGradeColor(pct) {
-            if (pct === null || pct === undefined) return "#64748b";
-            if (pct >= 90) return "#10b981";
-            if (pct >= 80) return "#06b6d4";
-            if (pct >= 70) return "#f59e0b";
-            if (pct >= 60) return "#f97316";
-            return "#ef4444";
-        }
-
-        function escapeHtml(text) {
-            const div = document.createElement('div');
-            div.textContent = text;
-            return div.innerHTML;
-        }
-
-        // Close modal when clicking outside
-        window.onclick = function(event) {
-            if (event.target.classList.contains('modal')) {
-                event.target.style.display = 'none';
-                document.body.style.overflow = 'auto';
+            # Assignments and weights are read from the embedded output.json payload
+            mp_data[mp] = {
+                "overall_pct": overall_pct,
+                "letter_grade": letter_grade(overall_pct),
+                "grade_color": get_grade_color(overall_pct),
+                "cat_scores": cat_scores,
+                "stale": mp in stale_mps
             }
-        }
 
-        // Close modal with Escape key
-        document.addEventListener('keydown', function(e) {
-            if (e.key === 'Escape') {
-                const modals = document.querySelectorAll('.modal');
-                modals.forEach(modal => {
-                    if (modal.style.display === 'block') {
-                        modal.style.display = 'none';
-                        document.body.style.overflow = 'auto';
-                    }
-                });
+        classes_data.append({
+            "name": class_name,
+            "course_code": course_code,
+            "active_marking_period": marking_period,
+            "mp_data": mp_data,
+            "year": {
+                "average": class_year["yearAverage"],
+                "letter": class_year["letter"],
+                "grade_color": get_grade_color(class_year["yearAverage"]),
+                "level": class_year["level"]
             }
-        });
-    </script>
-</body>
-</html>
-    """)
-
-    html_filled = page_template.safe_substitute(
-        schoolName=escape(user.get("schoolName", "")),
-        grade=escape(str(user.get("grade", ""))),
-        studentID=escape(str(user.get("studentID", ""))),
-        summary_rows="\n".join(summary_rows),
-        modal_content="\n".join(modal_content),
-        classes_data_json=json.dumps(classes_data),
-        active_mp=active_mp or "MP1"
-    )
+        })
 
+    # Static shell: only rewritten when the asset hashes change
+    output_dir = os.path.dirname(os.path.abspath(html_file))
+    css_href, js_href = write_static_assets(output_dir)
+    shell = SHELL_TEMPLATE.substitute(css_href=css_href, js_href=js_href, data_script=DATA_SCRIPT_FILE)
     path = Path(html_file).resolve()
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html_filled)
+    _write_if_changed(str(path), shell.encode("utf-8"))
+
+    # Data script: the raw output.json bytes plus the computed per-class summary
+    summary = {
+        "user": user,
+        "activeMP": active_mp or marking_periods[0],
+        "markingPeriods": marking_periods,
+        "classes": classes_data,
+        "gpa": {"unweighted": year["gpa"], "weighted": year["weightedGpa"], "credits": year["credits"]}
+    }
+    data_script = b"window.gradesData=" + data_json + b";\nwindow.dashboardSummary=" + dumps(summary) + b";\n"
+    with open(os.path.join(output_dir, DATA_SCRIPT_FILE), "wb") as f:
+        f.write(data_script)
 
     # webbrowser.open(f"file://{path}")
     print(f"Dashboard generated: {path}")
 
+def _read_fingerprint(html_file):
+    try:
+        with open(os.path.join(os.path.dirname(os.path.abspath(html_file)), FINGERPRINT_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+def _write_fingerprint(html_file, fingerprint):
+    path = os.path.join(os.path.dirname(os.path.abspath(html_file)), FINGERPRINT_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fingerprint, f)
+
+def _init_render_worker(assets):
+    """Pool initializer: reuses the parent's minified assets instead of rebuilding them."""
+    global _STATIC_ASSETS
+    _STATIC_ASSETS = assets
+
+def _render_dashboard(json_file, html_file, data_json):
+    """Worker: renders one dashboard from the JSON bytes the parent already read."""
+    generate_dashboard(json_file, html_file, data=loads(data_json), data_json=data_json)
+
+def generate_dashboards(jobs, max_workers=RENDER_WORKERS, force=False):
+    """
+    Renders many students' dashboards in parallel worker processes. jobs holds
+    output.json paths (rendered to dashboard.html in the same directory) or
+    (json_file, html_file) pairs; each dashboard needs its own directory.
+
+    A dashboard is skipped if its data and the static assets have the same
+    fingerprint as when it was last rendered (and its files still exist), unless
+    force is set. Returns {html_file: "rendered", "skipped" or "failed"}.
+    """
+    assets = static_assets()
+    asset_names = [name for name, _ in assets]
+    results = {}
+    pending = []
+    for job in jobs:
+        json_file, html_file = (job, os.path.join(os.path.dirname(job), "dashboard.html")) if isinstance(job, str) else job
+        previous = _read_fingerprint(html_file)
+        try:
+            stat = os.stat(json_file)
+            file_key = [stat.st_mtime_ns, stat.st_size]
+            current = not force and previous.get("assets") == asset_names and os.path.exists(html_file) and \
+                os.path.exists(os.path.join(os.path.dirname(os.path.abspath(html_file)), DATA_SCRIPT_FILE))
+            if current and previous.get("file") == file_key:
+                results[html_file] = "skipped"
+                continue
+            with open(json_file, "rb") as f:
+                data_json = f.read()
+        except (IOError, OSError) as e:
+            print(f"Error: Could not read '{json_file}'. Reason: {e}")
+            results[html_file] = "failed"
+            continue
+
+        fingerprint = {"assets": asset_names, "file": file_key, "sha256": hashlib.sha256(data_json).hexdigest()}
+        if current and previous.get("sha256") == fingerprint["sha256"]:
+            # Rewritten with the same contents
+            _write_fingerprint(html_file, fingerprint)
+            results[html_file] = "skipped"
+            continue
+        pending.append((json_file, html_file, data_json, fingerprint))
+
+    if len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker, initargs=(assets,)) as pool:
+            futures = [pool.submit(_render_dashboard, *job[:3]) for job in pending]
+            errors = [future.exception() for future in futures]
+    else:
+        # A single dashboard isn't worth starting a pool for
+        errors = []
+        for job in pending:
+            try:
+                _render_dashboard(*job[:3])
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+
+    for (json_file, html_file, _, fingerprint), error in zip(pending, errors):
+        if error is not None:
+            print(f"Error: Could not render the dashboard for '{json_file}'. Reason: {error}")
+            results[html_file] = "failed"
+            continue
+        _write_fingerprint(html_file, fingerprint)
+        results[html_file] = "rendered"
+    return results
+
 if __name__ == "__main__":
-    generate_dashboard("output.json")
+    import sys
+
+    if len(sys.argv) > 1:
+        # Batch mode: python dashboardHelper.py students/*/output.json
+        statuses = list(generate_dashboards(sys.argv[1:]).values())
+        print(f"Rendered {statuses.count('rendered')}, skipped {statuses.count('skipped')} unchanged, "
+              f"{statuses.count('failed')} failed.")
+    else:
+        generate_dashboard("output.json")
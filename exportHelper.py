@@ -0,0 +1,203 @@
+# exportHelper.py
+#
+# Columnar export of the scraped grades for analytics. Three tables are written
+# under EXPORT_DIRECTORY, Hive-partitioned by student and marking period so
+# readers (pyarrow.dataset, pandas, polars, DuckDB) can prune what they load:
+#     assignments/student=<id>/mp=<MP>/part-<time>.parquet
+#     category_weights/student=<id>/mp=<MP>/part-<time>.parquet
+#     mp_averages/student=<id>/mp=<MP>/part-<time>.parquet
+#
+# Files are only ever added. After each refresh, every partition whose rows
+# changed gets one new part file holding its complete current rows, stamped with
+# observed_at; unchanged partitions are skipped. All parts of a partition are its
+# history, and the part with the latest observed_at is its current state.
+# Parquet needs the optional `pyarrow` package; without it the same columns are
+# written as CSV (ISO dates, empty fields for missing numbers, 1/0 booleans).
+
+import csv
+import datetime
+import hashlib
+import json
+import os
+import time
+from urllib.parse import quote
+from modelHelper import assignments_from_dicts, calculate_grade_for_mp, marking_period_sort_key
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Failures that skip the export instead of failing the save it follows (ValueError and
+# TypeError also cover values pyarrow can't convert, e.g. a mixed-type column)
+_EXPORT_ERRORS = (IOError, OSError, ImportError, TypeError, ValueError)
+if pyarrow is not None:
+    _EXPORT_ERRORS += (pyarrow.lib.ArrowException,)
+
+# --- Configuration ---
+EXPORT_DIRECTORY = "export"
+# "auto" writes Parquet when pyarrow is installed and CSV otherwise; "parquet" or "csv" forces one
+EXPORT_FORMAT = "auto"
+PARQUET_COMPRESSION = "zstd"
+# Digest of each partition's last exported rows, used to skip unchanged partitions
+STATE_FILE = "_exported.json"
+
+# Columns of each table, in order, with their types
+TABLE_COLUMNS = {
+    "assignments": (
+        ("class_name", "string"), ("course_code", "string"), ("name", "string"), ("category", "string"),
+        ("description", "string"), ("date", "string"), ("due_date", "date"), ("points_earned", "float64"), ("total_points", "float64"),
+        ("percent", "float64"), ("observed_at", "timestamp"),
+    ),
+    "category_weights": (
+        ("class_name", "string"), ("course_code", "string"), ("category", "string"), ("weight", "float64"),
+        ("score_pct", "float64"), ("observed_at", "timestamp"),
+    ),
+    "mp_averages": (
+        ("class_name", "string"), ("course_code", "string"), ("average_pct", "float64"),
+        ("assignment_count", "int64"), ("stale", "bool"), ("observed_at", "timestamp"),
+    ),
+}
+
+def _export_format():
+    if EXPORT_FORMAT == "auto":
+        return "parquet" if pyarrow is not None else "csv"
+    if EXPORT_FORMAT == "parquet" and pyarrow is None:
+        raise ImportError("Parquet export requires pyarrow. Install it with: pip install pyarrow")
+    return EXPORT_FORMAT
+
+def _partition_rows(classes, marking_period):
+    """Builds every table's rows (without observed_at) for one marking period."""
+    rows = {table: [] for table in TABLE_COLUMNS}
+    for class_name, class_info in classes.items():
+        if marking_period not in (class_info.get("grades") or {}):
+            continue
+        course_code = class_info.get("courseCode", "")
+        grades = assignments_from_dicts(class_info["grades"][marking_period])
+        weights = (class_info.get("categoryWeights") or {}).get(marking_period, {})
+        average_pct, cat_scores = calculate_grade_for_mp(grades, weights)
+
+        for g in grades:
+            percent = g.points_earned / g.total_points * 100 if g.total_points > 0 else None
+            rows["assignments"].append({
+                "class_name": class_name, "course_code": course_code, "name": g.name, "category": g.category,
+                "description": g.description, "date": g.date, "due_date": g.due_date, "points_earned": g.points_earned,
+                "total_points": g.total_points, "percent": percent
+            })
+        for category, weight in weights.items():
+            score = cat_scores.get(category)
+            rows["category_weights"].append({
+                "class_name": class_name, "course_code": course_code, "category": category,
+                "weight": float(weight), "score_pct": score * 100 if score is not None else None
+            })
+        rows["mp_averages"].append({
+            "class_name": class_name, "course_code": course_code, "average_pct": average_pct,
+            "assignment_count": len(grades),
+            "stale": marking_period in class_info.get("staleMarkingPeriods", [])
+        })
+    return rows
+
+def _rows_digest(rows):
+    return hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _write_parquet(path, table, rows):
+    types = {
+        "string": pyarrow.string(), "float64": pyarrow.float64(), "int64": pyarrow.int64(),
+        "bool": pyarrow.bool_(), "date": pyarrow.date32(), "timestamp": pyarrow.timestamp("s", tz="UTC"),
+    }
+    schema = pyarrow.schema([(name, types[kind]) for name, kind in TABLE_COLUMNS[table]])
+    columns = {name: [row[name] for row in rows] for name, _ in TABLE_COLUMNS[table]}
+    pyarrow.parquet.write_table(
+        pyarrow.Table.from_pydict(columns, schema=schema), path, compression=PARQUET_COMPRESSION
+    )
+
+def _csv_value(value, kind):
+    if value is None:
+        return ""
+    if kind == "bool":
+        return "1" if value else "0"
+    if kind == "timestamp":
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if kind == "date":
+        return value.isoformat()
+    if kind == "float64":
+        return repr(float(value))
+    return value
+
+def _write_csv(path, table, rows):
+    columns = TABLE_COLUMNS[table]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in columns])
+        for row in rows:
+            writer.writerow([_csv_value(row[name], kind) for name, kind in columns])
+
+def _load_state(directory):
+    try:
+        with open(os.path.join(directory, STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+def _save_state(directory, state):
+    path = os.path.join(directory, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+def export_data(data, directory=EXPORT_DIRECTORY, observed_at=None):
+    """
+    Appends the current state of data ({"user": ..., "classes": ...}) to the
+    columnar export: one new part file per table for each student/marking period
+    partition whose rows changed since the last export. Returns the number of
+    partitions written, or None if the export failed.
+    """
+    observed_at = observed_at or time.time()
+    timestamp = datetime.datetime.fromtimestamp(int(observed_at), datetime.timezone.utc)
+    student_id = str((data.get("user") or {}).get("studentID") or "unknown")
+    classes = data.get("classes") or {}
+    marking_periods = sorted(
+        {mp for class_info in classes.values() for mp in (class_info.get("grades") or {})}, key=marking_period_sort_key
+    )
+
+    try:
+        export_format = _export_format()
+        state = _load_state(directory)
+        written = 0
+        for mp in marking_periods:
+            partition = f"student={quote(student_id, safe='')}/mp={quote(mp, safe='')}"
+            rows = _partition_rows(classes, mp)
+            digest = _rows_digest(rows)
+            if state.get(partition) == digest:
+                continue
+
+            filename = f"part-{timestamp.strftime('%Y%m%dT%H%M%SZ')}-{digest[:8]}.{export_format}"
+            for table, table_rows in rows.items():
+                table_directory = os.path.join(directory, table, *partition.split("/"))
+                os.makedirs(table_directory, exist_ok=True)
+                for row in table_rows:
+                    row["observed_at"] = timestamp
+                if export_format == "parquet":
+                    _write_parquet(os.path.join(table_directory, filename), table, table_rows)
+                else:
+                    _write_csv(os.path.join(table_directory, filename), table, table_rows)
+            state[partition] = digest
+            written += 1
+
+        if written:
+            _save_state(directory, state)
+        return written
+    except _EXPORT_ERRORS as e:
+        print(f"  - Warning: Could not export grades for analytics. Reason: {e}")
+        return None
+
+# --- Main execution: export the saved output.json once ---
+if __name__ == "__main__":
+    import sys
+    from jsonHelper import load_file
+
+    saved_data, _ = load_file(sys.argv[1] if len(sys.argv) > 1 else "output.json")
+    count = export_data(saved_data)
+    if count is not None:
+        print(f"Exported {count} changed partitions to '{EXPORT_DIRECTORY}' as {_export_format()}.")
@@ -0,0 +1,174 @@
+# fetchHelper.py
+
+import asyncio
+import random
+import time
+import requests
+from metricsHelper import REQUEST_DURATION, REQUEST_RETRIES, REQUESTS_TOTAL, RESPONSE_BYTES, SESSION_EXPIRIES
+from throttleHelper import get_throttle
+
+# --- Configuration ---
+# Total attempts per GET (1 = no retries). Timeouts, connection errors, 429 and 5xx are retried.
+RETRY_ATTEMPTS = 4
+RETRY_BASE_DELAY_SECONDS = 0.5
+RETRY_MAX_DELAY_SECONDS = 8.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class SessionExpiredError(requests.exceptions.RequestException):
+    """Genesis answered with the login page and the session could not be logged in again."""
+
+def _backoff_delay(attempt):
+    """Exponential backoff with full jitter for the given 0-based retry number."""
+    return random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * (2 ** attempt)))
+
+def _is_login_page(response, check_body=True):
+    """
+    True if Genesis answered with (or redirected to) the login page instead of the
+    requested page. With check_body=False only the final URL is checked, so a
+    streamed body is left unread.
+    """
+    return "gohome=true" in str(response.url) or (check_body and "j_username" in response.text)
+
+def _is_breaker_failure(error):
+    """Timeouts and connection failures count against the circuit breaker; other errors don't."""
+    return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+
+def _record_response(throttle, trial, page_type, response, count_bytes=True):
+    throttle.record(failed=response.status_code >= 500, trial=trial)
+    REQUESTS_TOTAL.inc(page_type=page_type, status=str(response.status_code))
+    if count_bytes:
+        RESPONSE_BYTES.inc(len(response.content), page_type=page_type)
+
+def _send_once(send, page_type, url, **kwargs):
+    throttle = get_throttle(url)
+    trial = throttle.wait()
+    start = time.perf_counter()
+    try:
+        response = send(url, **kwargs)
+    except requests.exceptions.RequestException as e:
+        throttle.record(failed=_is_breaker_failure(e), trial=trial)
+        REQUESTS_TOTAL.inc(page_type=page_type, status="error")
+        raise
+    else:
+        # Streamed bodies are counted by whoever reads them
+        _record_response(throttle, trial, page_type, response, count_bytes=not kwargs.get("stream"))
+        return response
+    finally:
+        REQUEST_DURATION.observe(time.perf_counter() - start, page_type=page_type)
+        throttle.release(trial)
+
+def _send(send, page_type, url, attempts, **kwargs):
+    for attempt in range(attempts):
+        last_attempt = attempt == attempts - 1
+        try:
+            response = _send_once(send, page_type, url, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            if last_attempt:
+                raise
+        else:
+            if last_attempt or response.status_code not in RETRY_STATUS_CODES:
+                return response
+            response.close()
+        REQUEST_RETRIES.inc(page_type=page_type)
+        time.sleep(_backoff_delay(attempt))
+
+def get_page(session, page_type, url, relogin=True, **kwargs):
+    """
+    Performs session.get(url, **kwargs) under the host's rate limiter and circuit
+    breaker, retrying transient failures with jittered exponential backoff, and
+    records request metrics under page_type. Exceptions from requests are re-raised
+    unchanged once retries are exhausted so callers keep their handling.
+
+    If the response is the login page, the session is re-authenticated once (shared
+    by all workers using it) and the request is replayed. SessionExpiredError is
+    raised if that login fails or the replayed request still gets the login page,
+    so the login page is never handed out as the requested page. Pass relogin=False
+    for the login checks themselves.
+
+    With stream=True the body is not read here: only a redirect to the login page
+    is detected, and the caller records RESPONSE_BYTES as it reads.
+    """
+    generation = getattr(session, "genesis_generation", 0)
+    check_body = not kwargs.get("stream")
+    response = _send(session.get, page_type, url, RETRY_ATTEMPTS, **kwargs)
+    if relogin and response.ok:
+        from loginHelper import reauthenticate, touch_session
+
+        if not _is_login_page(response, check_body):
+            touch_session(session)
+            return response
+        SESSION_EXPIRIES.inc(page_type=page_type)
+        response.close()
+        if not reauthenticate(session, generation):
+            raise SessionExpiredError(f"Session expired and could not be renewed ({page_type})")
+        response = _send(session.get, page_type, url, RETRY_ATTEMPTS, **kwargs)
+        if response.ok and _is_login_page(response, check_body):
+            response.close()
+            raise SessionExpiredError(f"Still logged out after logging in again ({page_type})")
+    return response
+
+def post_page(session, page_type, url, **kwargs):
+    """session.post counterpart of get_page. POSTs are sent once and never retried."""
+    return _send(session.post, page_type, url, 1, **kwargs)
+
+async def _get_once_async(client, page_type, url, **kwargs):
+    import httpx
+
+    throttle = get_throttle(url)
+    trial = await throttle.wait_async()
+    start = time.perf_counter()
+    try:
+        response = await client.get(url, **kwargs)
+    except httpx.HTTPError as e:
+        throttle.record(failed=isinstance(e, (httpx.TimeoutException, httpx.NetworkError)), trial=trial)
+        REQUESTS_TOTAL.inc(page_type=page_type, status="error")
+        raise
+    else:
+        _record_response(throttle, trial, page_type, response)
+        return response
+    finally:
+        REQUEST_DURATION.observe(time.perf_counter() - start, page_type=page_type)
+        throttle.release(trial)
+
+async def get_page_async(client, page_type, url, **kwargs):
+    """
+    Async counterpart of get_page for an httpx.AsyncClient: awaits client.get(url, **kwargs)
+    under the same rate limiter, circuit breaker, retry and re-login policy and records
+    the same metrics. Transport errors are re-raised unchanged once retries are exhausted;
+    SessionExpiredError is raised as in get_page.
+    """
+    session = getattr(client, "genesis_session", None)
+    generation = getattr(session, "genesis_generation", 0)
+    response = await _get_with_retries_async(client, page_type, url, **kwargs)
+    if session is not None and response.is_success:
+        from loginHelper import reauthenticate, touch_session
+
+        if not _is_login_page(response):
+            touch_session(session)
+            return response
+        SESSION_EXPIRIES.inc(page_type=page_type)
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, reauthenticate, session, generation):
+            raise SessionExpiredError(f"Session expired and could not be renewed ({page_type})")
+        for cookie in session.cookies:
+            client.cookies.set(cookie.name, cookie.value, domain=cookie.domain, path=cookie.path)
+        response = await _get_with_retries_async(client, page_type, url, **kwargs)
+        if response.is_success and _is_login_page(response):
+            raise SessionExpiredError(f"Still logged out after logging in again ({page_type})")
+    return response
+
+async def _get_with_retries_async(client, page_type, url, **kwargs):
+    import httpx
+
+    for attempt in range(RETRY_ATTEMPTS):
+        last_attempt = attempt == RETRY_ATTEMPTS - 1
+        try:
+            response = await _get_once_async(client, page_type, url, **kwargs)
+        except (httpx.TimeoutException, httpx.NetworkError):
+            if last_attempt:
+                raise
+        else:
+            if last_attempt or response.status_code not in RETRY_STATUS_CODES:
+                return response
+        REQUEST_RETRIES.inc(page_type=page_type)
+        await asyncio.sleep(_backoff_delay(attempt))
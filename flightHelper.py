@@ -0,0 +1,120 @@
+# flightHelper.py
+#
+# Single-flight coalescing: when the same work is requested again while it is
+# still running (e.g. the auto-update thread and the dashboard button fetching
+# the same class page), the later callers wait for the running call and share
+# its result instead of repeating it. Nothing is cached once a call finishes.
+
+import threading
+from metricsHelper import COALESCED_CALLS
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # (event loop, future) of each coroutine waiting for the call in do_async
+        self.waiters = []
+
+    def outcome(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one. The first caller runs
+    the function; callers arriving while it runs block until it finishes and get
+    the same return value (or exception). Works across threads, and coroutines
+    on different event loops can join the same call through do_async.
+    """
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key, kind):
+        """Returns (call, is_leader) for key, registering a new call if none is running."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                COALESCED_CALLS.inc(flight=self.name, kind=kind)
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _finish(self, key, call):
+        with self._lock:
+            self._calls.pop(key, None)
+            call.done.set()
+            waiters, call.waiters = call.waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                pass  # That event loop has already closed
+
+    def do(self, key, func, kind=""):
+        """Runs func() unless a call with the same key is running, in which case its outcome is shared."""
+        call, leader = self._join(key, kind)
+        if leader:
+            try:
+                call.result = func()
+            except BaseException as e:
+                call.error = e
+            finally:
+                self._finish(key, call)
+        else:
+            call.done.wait()
+        return call.outcome()
+
+    async def do_async(self, key, coroutine_function, kind=""):
+        """Coroutine version of do: awaits coroutine_function() or the running call with the same key."""
+        import asyncio
+
+        call, leader = self._join(key, kind)
+        if leader:
+            try:
+                call.result = await coroutine_function()
+            except BaseException as e:
+                call.error = e
+            finally:
+                self._finish(key, call)
+        else:
+            # Waits on a future of this event loop, which the leader wakes from its own thread or loop
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            with self._lock:
+                waiting = not call.done.is_set()
+                if waiting:
+                    call.waiters.append((loop, future))
+            if waiting:
+                await future
+        return call.outcome()
+
+    def wait(self, key, kind=""):
+        """
+        If a call with key is running, waits for it and returns (True, result);
+        otherwise returns (False, None) immediately.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                return False, None
+            COALESCED_CALLS.inc(flight=self.name, kind=kind)
+        call.done.wait()
+        return True, call.outcome()
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+# Page fetches (and their parsing), shared by the sync and async scrapers
+PAGE_FLIGHTS = SingleFlight("page")
+
+def page_key(session, page_type, *params):
+    """Single-flight key for a page fetch: the session's account, the page type and the request parameters."""
+    credentials = getattr(session, "genesis_credentials", None)
+    return (credentials[0] if credentials else id(session), page_type) + params
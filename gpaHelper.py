@@ -0,0 +1,150 @@
+# gpaHelper.py
+#
+# Year-long averages and GPA, built from per-marking-period aggregates instead of
+# the assignments themselves:
+#     per-MP category totals -> MP averages -> year average per class -> GPA
+# The totals are kept in output.json as class_info['mpTotals'][mp] =
+# {category: [points earned, total points]} and are re-summed only for the
+# marking period whose grades were just stored (see gradeHelper._store_mp_result),
+# so refreshing one marking period never re-reads the assignments of the others.
+
+import os
+import re
+import threading
+from modelHelper import assignments_from_dicts, category_totals, grade_from_totals, letter_grade
+
+# --- Configuration ---
+# Relative weight of each marking period in the year average, e.g. {"MP1": 1, "MP2": 1, "FE": 0.5};
+# None weighs all marking periods equally. Only marking periods with an average count.
+MARKING_PERIOD_WEIGHTS = None
+# Course level by class name or course code; classes not listed are matched against COURSE_LEVEL_PATTERNS
+COURSE_LEVELS = {}
+COURSE_LEVEL_PATTERNS = (
+    ("AP", r"\b(AP|IB)\b"),
+    ("Honors", r"\b(Honors|Hon|H)\b"),
+)
+DEFAULT_COURSE_LEVEL = "CP"
+# Added to the grade points of a course's level in the weighted GPA
+LEVEL_BONUS = {"AP": 1.0, "Honors": 0.5}
+GRADE_POINTS = {"A": 4.0, "B": 3.0, "C": 2.0, "D": 1.0, "F": 0.0}
+# Credits by class name or course code (classes not listed count DEFAULT_CREDITS)
+COURSE_CREDITS = {}
+DEFAULT_CREDITS = 1.0
+
+def update_mp_totals(class_info, marking_period):
+    """Re-sums the category totals of one marking period from its stored grades."""
+    grades = assignments_from_dicts((class_info.get('grades') or {}).get(marking_period, []))
+    class_info.setdefault('mpTotals', {})[marking_period] = category_totals(grades)
+
+def mp_totals(class_info, marking_period):
+    """
+    Returns the stored category totals of one marking period, or sums them from
+    its grades if none are stored (data saved before totals were kept).
+    """
+    totals = (class_info.get('mpTotals') or {}).get(marking_period)
+    if totals is None:
+        totals = category_totals(assignments_from_dicts((class_info.get('grades') or {}).get(marking_period, [])))
+    return totals
+
+def mp_grade(class_info, marking_period):
+    """(overall_pct, cat_scores) of one marking period, as calculate_grade_for_mp returns them."""
+    weights = (class_info.get('categoryWeights') or {}).get(marking_period, {})
+    return grade_from_totals(mp_totals(class_info, marking_period), weights)
+
+def course_level(class_name, class_info):
+    """Returns the configured or name-derived course level of a class."""
+    course_code = class_info.get('courseCode', '')
+    if class_name in COURSE_LEVELS:
+        return COURSE_LEVELS[class_name]
+    if course_code in COURSE_LEVELS:
+        return COURSE_LEVELS[course_code]
+    for level, pattern in COURSE_LEVEL_PATTERNS:
+        if re.search(pattern, class_name, re.IGNORECASE):
+            return level
+    return DEFAULT_COURSE_LEVEL
+
+def course_credits(class_name, class_info):
+    """Returns the configured credits of a class."""
+    return float(COURSE_CREDITS.get(class_name, COURSE_CREDITS.get(class_info.get('courseCode', ''), DEFAULT_CREDITS)))
+
+def year_average(mp_averages, mp_weights=None):
+    """
+    Weighted mean of {mp: overall_pct or None} over the marking periods that have
+    an average, rounded to 0.1. Returns None if none of them does.
+    """
+    mp_weights = MARKING_PERIOD_WEIGHTS if mp_weights is None else mp_weights
+    total_weight = 0.0
+    weighted_sum = 0.0
+    for mp, pct in mp_averages.items():
+        weight = float(mp_weights.get(mp, 0)) if mp_weights else 1.0
+        if pct is not None and weight > 0:
+            total_weight += weight
+            weighted_sum += pct * weight
+    if total_weight == 0:
+        return None
+    return round(weighted_sum / total_weight, 1)
+
+def class_year_summary(class_name, class_info, mp_weights=None):
+    """Year average, letter, grade points, level and credits of one class."""
+    mp_averages = {mp: mp_grade(class_info, mp)[0] for mp in (class_info.get('grades') or {})}
+    average = year_average(mp_averages, mp_weights)
+    letter = letter_grade(average)
+    level = course_level(class_name, class_info)
+    points = GRADE_POINTS.get(letter)
+    return {
+        "mpAverages": mp_averages,
+        "yearAverage": average,
+        "letter": letter,
+        "level": level,
+        "credits": course_credits(class_name, class_info),
+        "gradePoints": points,
+        "weightedGradePoints": points + LEVEL_BONUS.get(level, 0.0) if points is not None else None,
+    }
+
+def year_summary(classes, mp_weights=None):
+    """
+    Returns {"classes": {name: class_year_summary}, "gpa": ..., "weightedGpa": ...,
+    "credits": ...}. GPAs are credit-weighted over the classes with a year average
+    (None if there are none), rounded to 0.01.
+    """
+    class_summaries = {name: class_year_summary(name, info, mp_weights) for name, info in classes.items()}
+    credits = 0.0
+    points = 0.0
+    weighted_points = 0.0
+    for summary in class_summaries.values():
+        if summary["gradePoints"] is None or summary["credits"] <= 0:
+            continue
+        credits += summary["credits"]
+        points += summary["gradePoints"] * summary["credits"]
+        weighted_points += summary["weightedGradePoints"] * summary["credits"]
+    return {
+        "classes": class_summaries,
+        "gpa": round(points / credits, 2) if credits else None,
+        "weightedGpa": round(weighted_points / credits, 2) if credits else None,
+        "credits": credits,
+    }
+
+_SUMMARY_CACHE = {}
+_SUMMARY_LOCK = threading.Lock()
+
+def load_year_summary(json_file="output.json"):
+    """
+    year_summary of a saved output.json, cached until the file changes. Returns
+    None if the file can't be read.
+    """
+    from jsonHelper import load_file
+
+    try:
+        stat = os.stat(json_file)
+        key = (os.path.abspath(json_file), stat.st_mtime_ns, stat.st_size)
+        with _SUMMARY_LOCK:
+            if _SUMMARY_CACHE.get("key") == key:
+                return _SUMMARY_CACHE["summary"]
+        data, _ = load_file(json_file)
+    except (IOError, OSError, ValueError) as e:
+        print(f"  - Could not load '{json_file}' for the year summary: {e}")
+        return None
+    summary = year_summary(data.get("classes") or {})
+    with _SUMMARY_LOCK:
+        _SUMMARY_CACHE.update(key=key, summary=summary)
+    return summary
@@ -3,85 +3,42 @@
 import requests
 import os
 import re
-import time
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from archiveHelper import PAGE_COURSE, archive_page
+from fetchHelper import get_page
+from flightHelper import PAGE_FLIGHTS, page_key
+from changeHelper import class_change, publish_grade_changes
+from gpaHelper import mp_grade, update_mp_totals
+from modelHelper import marking_period_sort_key
+from parserHelper import get_parser
 
 # --- Configuration ---
 OUTPUT_HTML_DIRECTORY = "classes"
 BASE_URL = "https://students.ww-p.org/genesis/parents"
+# Assumed for a class until one of its pages lists the marking periods it meets in
+MARKING_PERIODS = ['MP1', 'MP2', 'MP3', 'MP4']
+# Class pages fetched in parallel while class discovery is still streaming (see GradePrefetcher)
+MAX_FETCH_WORKERS = 4
 
 def sanitize_filename(name):
     """Removes invalid characters from a string to make it a valid filename."""
     return re.sub(r'[\\/*?:"<>|]', "", name)
 
 def _parse_grades_from_html(html_content):
-    # This function does not need changes
-    soup = BeautifulSoup(html_content, 'lxml')
-    assignments = []
-    
-    if soup.find('td', class_='cellCenter', string=re.compile(r'No graded assignments found')):
-        return []
-
-    assignments_header = soup.find('b', string='Assignments')
-    if not assignments_header or not assignments_header.find_parent('table'):
-        return []
-
-    assignment_rows = assignments_header.find_parent('table').find_all('tr', class_=['listroweven', 'listrowodd'])
-    
-    for row in assignment_rows:
-        try:
-            cells = row.find_all('td', recursive=False)
-            if len(cells) < 3: continue
-            name_tag = cells[1].find('b')
-            if not name_tag: continue
-            name = name_tag.text.strip()
-            description_tag = cells[1].find('input', id=re.compile(r'^assignmentDescription'))
-            description = description_tag['value'].strip() if description_tag else ""
-            date = cells[0].find_all('div')[1].text.strip() if len(cells[0].find_all('div')) > 1 else cells[0].text.strip()
-            category_div = cells[1].find('div', style=lambda s: 'italic' in s if s else False)
-            category = category_div.text.strip() if category_div else "N/A"
-            points_earned, total_points = 0.0, 0.0
-            grade_cell_text = cells[2].get_text(separator=' ', strip=True)
-            cleaned_text = re.sub(r'\s+', ' ', grade_cell_text)
-            points_match = re.search(r'([\d.]+)\s*/\s*([\d.]+)', cleaned_text)
-            if points_match:
-                points_earned = float(points_match.group(1))
-                total_points = float(points_match.group(2))
-            assignments.append({
-                "name": name, "category": category, "date": date,
-                "description": description, "totalPoints": total_points,
-                "pointsEarned": points_earned
-            })
-        except (AttributeError, IndexError, ValueError):
-            continue
-    return assignments
+    """Parses a class page's assignments into Assignment objects with the configured parser backend."""
+    return get_parser().parse_assignments(html_content)
 
 def _parse_category_weights(html_content):
-    # This function does not need changes
-    soup = BeautifulSoup(html_content, 'lxml')
-    weights = {}
-    grading_header = soup.find('b', string='Grading Information')
-    if not grading_header: return {}
-    weight_table = grading_header.find_parent('table')
-    if not weight_table: return {}
-    weight_rows = weight_table.find_all('tr', class_=['listroweven', 'listrowodd'])
-    for row in weight_rows:
-        try:
-            cells = row.find_all('td', recursive=False)
-            if len(cells) < 2: continue
-            category_name = cells[0].get_text(strip=True)
-            weight_str = cells[1].get_text(strip=True)
-            if '%' in weight_str:
-                weight_value = float(weight_str.replace('%', '').strip()) / 100.0
-                weights[category_name] = weight_value
-        except (IndexError, ValueError):
-            continue
-    return weights
+    """Parses a class page's category weights ({category: fraction}) with the configured parser backend."""
+    return get_parser().parse_category_weights(html_content)
 
-def _process_class_page_for_mp(session, class_name, class_details, student_id, marking_period, save_html):
-    """
-    (Internal helper) Fetches a single class page for a specific marking period.
-    """
+def _parse_marking_periods(html_content):
+    """Parses the marking periods a class meets in from its page's marking period selector."""
+    return get_parser().parse_marking_periods(html_content)
+
+def _build_course_page_request(class_details, student_id, marking_period):
+    """Returns the (params, headers) used to fetch one class page for one marking period."""
     params = {
         'tab1': 'studentdata', 'tab2': 'gradebook', 'tab3': 'coursesummary', 'studentid': student_id,
         'action': 'form', 'courseCode': class_details['courseCode'],
@@ -91,62 +48,299 @@ def _process_class_page_for_mp(session, class_name, class_details, student_id, m
         "Accept": "text/html,application/xhtml+xml",
         "Referer": f"https://students.ww-p.org/genesis/parents?tab1=studentdata&tab2=gradebook&tab3=weeklysummary&action=form&studentid={student_id}"
     }
+    return params, headers
+
+def _handle_course_page(class_name, marking_period, html_content, save_html):
+    """Optionally saves a fetched class page, then parses it into (grades, weights, marking_periods)."""
+    if save_html:
+        if not os.path.exists(OUTPUT_HTML_DIRECTORY):
+            os.makedirs(OUTPUT_HTML_DIRECTORY)
+        safe_filename = sanitize_filename(f"{class_name}_{marking_period}") + ".html"
+        output_filepath = os.path.join(OUTPUT_HTML_DIRECTORY, safe_filename)
+        with open(output_filepath, "w", encoding="utf-8") as f:
+            f.write(html_content)
+    
+    grades = _parse_grades_from_html(html_content)
+    weights = _parse_category_weights(html_content)
+    return grades, weights, _parse_marking_periods(html_content)
+
+def _store_mp_result(class_info, marking_period, grades_list, weights_dict, previous_info=None, marking_periods=None):
+    """
+    Stores one marking period's grades and weights in class_info. If the fetch
+    failed (grades_list is None), the previously stored data for that marking
+    period is kept (from previous_info, or from class_info itself) and the
+    marking period is listed in class_info['staleMarkingPeriods']. Marking
+    periods discovered on the page are cached in class_info['markingPeriods'].
+    The marking period's category totals (class_info['mpTotals']) are re-summed.
+    """
+    grades = class_info.setdefault('grades', {})
+    weights = class_info.setdefault('categoryWeights', {})
+    stale = [mp for mp in class_info.get('staleMarkingPeriods', []) if mp != marking_period]
+
+    if grades_list is None:
+        source = previous_info if previous_info is not None else class_info
+        grades[marking_period] = source.get('grades', {}).get(marking_period, [])
+        weights[marking_period] = source.get('categoryWeights', {}).get(marking_period, {})
+        stale.append(marking_period)
+    else:
+        grades[marking_period] = grades_list
+        weights[marking_period] = weights_dict
+    update_mp_totals(class_info, marking_period)
+    if marking_periods:
+        class_info['markingPeriods'] = marking_periods
+
+    if stale:
+        class_info['staleMarkingPeriods'] = stale
+    else:
+        class_info.pop('staleMarkingPeriods', None)
+
+def _course_page_key(session, class_details, student_id, marking_period):
+    return page_key(
+        session, PAGE_COURSE, student_id, class_details['courseCode'], class_details['courseSelection'], marking_period
+    )
+
+def _process_class_page_for_mp(session, class_name, class_details, student_id, marking_period, save_html):
+    """
+    (Internal helper) Fetches a single class page for a specific marking period.
+    Returns (grades, weights, marking_periods), or (None, None, None) if the page
+    could not be fetched after retries. A request for a page that is already being
+    fetched for the same account waits for that fetch and shares its result.
+    """
+    return PAGE_FLIGHTS.do(
+        _course_page_key(session, class_details, student_id, marking_period),
+        lambda: _fetch_class_page_for_mp(session, class_name, class_details, student_id, marking_period, save_html),
+        kind=PAGE_COURSE
+    )
+
+def _fetch_class_page_for_mp(session, class_name, class_details, student_id, marking_period, save_html):
+    params, headers = _build_course_page_request(class_details, student_id, marking_period)
     try:
-        response = session.get(BASE_URL, params=params, headers=headers)
+        response = get_page(session, PAGE_COURSE, BASE_URL, params=params, headers=headers)
         response.raise_for_status()
-
-        # Save HTML if requested
-        if save_html:
-            if not os.path.exists(OUTPUT_HTML_DIRECTORY):
-                os.makedirs(OUTPUT_HTML_DIRECTORY)
-            safe_filename = sanitize_filename(f"{class_name}_{marking_period}") + ".html"
-            output_filepath = os.path.join(OUTPUT_HTML_DIRECTORY, safe_filename)
-            with open(output_filepath, "w", encoding="utf-8") as f:
-                f.write(response.text)
-        
-        grades = _parse_grades_from_html(response.text)
-        weights = _parse_category_weights(response.text)
-        return grades, weights
+        archive_page(session, PAGE_COURSE, response.text, class_name, marking_period)
+        return _handle_course_page(class_name, marking_period, response.text, save_html)
         
     except requests.exceptions.RequestException as e:
         print(f"  - An error occurred while fetching data for '{class_name}' {marking_period}: {e}")
-        return [], {}
+        print("    Keeping previously saved data for this marking period.")
+        return None, None, None
+
+class GradePrefetcher:
+    """
+    Starts fetching a class's pages on a thread pool as soon as the class is
+    discovered (pass add_class as get_all_classes' on_class), so class discovery
+    overlaps with grade fetching. get_all_grades then collects the results instead
+    of fetching. Each class's own active marking period is requested first; unless
+    previous_classes already lists the marking periods the class meets in, the rest
+    are queued once that first page has shown which ones exist.
+    """
+    def __init__(self, session, student_id, save_html=True, max_workers=MAX_FETCH_WORKERS, previous_classes=None):
+        self.session = session
+        self.student_id = student_id
+        self.save_html = save_html
+        self.previous_classes = previous_classes or {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="grade-fetch")
+        self._jobs = {}
+        self._discovery = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, class_name, details, marking_period, discover=False):
+        if self._jobs.get((class_name, marking_period), (None,))[0] == details:
+            return None
+        try:
+            future = self._pool.submit(self._fetch, class_name, details, marking_period, discover)
+        except RuntimeError:
+            # Closed while a discovery fetch was still queuing pages
+            return None
+        self._jobs[(class_name, marking_period)] = (details, future)
+        return future
+
+    def _fetch(self, class_name, details, marking_period, discover):
+        result = _process_class_page_for_mp(
+            self.session, class_name, details, self.student_id, marking_period, self.save_html
+        )
+        if discover:
+            # Queued before the result is handed out, so result() never races the queueing
+            with self._lock:
+                for mp in class_marking_periods(dict(details, markingPeriods=result[2])):
+                    if mp != marking_period:
+                        self._submit(class_name, details, mp)
+        return result
+
+    def add_class(self, class_name, class_details):
+        """Queues the pages of a newly discovered class."""
+        details = dict(class_details)
+        known_periods = self.previous_classes.get(class_name, {}).get('markingPeriods')
+        with self._lock:
+            if known_periods:
+                for mp in class_marking_periods(dict(details, markingPeriods=known_periods)):
+                    self._submit(class_name, details, mp)
+            else:
+                first_mp = class_marking_periods(details)[0]
+                future = self._submit(class_name, details, first_mp, discover=True)
+                if future is not None:
+                    self._discovery[class_name] = future
+
+    def result(self, class_name, class_details, marking_period):
+        """
+        Returns (grades, weights, marking_periods) for one class page, waiting for
+        the prefetch if one was queued with the same course details, otherwise
+        fetching it now.
+        """
+        key = (class_name, marking_period)
+        with self._lock:
+            details, future = self._jobs.pop(key, (None, None))
+            discovery = self._discovery.get(class_name)
+        if future is None and discovery is not None:
+            # The page may be queued once the class's first page is in
+            discovery.result()
+            with self._lock:
+                details, future = self._jobs.pop(key, (None, None))
+        if future is not None and all(details.get(k) == class_details.get(k) for k in ('courseCode', 'courseSelection')):
+            return future.result()
+        return _process_class_page_for_mp(
+            self.session, class_name, class_details, self.student_id, marking_period, self.save_html
+        )
+
+    def close(self):
+        """Cancels fetches nobody collected and shuts the pool down."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+def prioritized_marking_periods(active_mp, marking_periods=None):
+    """Returns marking_periods (default MARKING_PERIODS) in order, with active_mp moved to the front."""
+    return sorted(marking_periods or MARKING_PERIODS, key=lambda mp: (mp != active_mp, marking_period_sort_key(mp)))
+
+def class_marking_periods(class_info):
+    """
+    Returns the marking periods a class meets in, its own active one first: those
+    listed on its pages (class_info['markingPeriods']), or MARKING_PERIODS if none
+    of its pages has been fetched yet.
+    """
+    periods = list(class_info.get('markingPeriods') or MARKING_PERIODS)
+    active_mp = class_info.get('markingPeriod')
+    if active_mp and active_mp not in periods:
+        periods.append(active_mp)
+    return prioritized_marking_periods(active_mp, periods)
 
-def get_all_grades(session, all_classes_data, student_id, save_html=True):
+def next_marking_period(all_classes_data, active_mp, done):
     """
-    Iterates through classes and fetches grades for all marking periods.
+    Returns the next marking period to fetch across all classes (active_mp first),
+    skipping those in done, or None once every class's marking periods are done.
     """
+    pending = {mp for class_info in all_classes_data.values() for mp in class_marking_periods(class_info)}
+    pending.difference_update(done)
+    return prioritized_marking_periods(active_mp, pending)[0] if pending else None
+
+def _seed_from_previous(all_classes_data, previous_classes):
+    """
+    Starts each class from its last saved grades, so data handed out before every
+    marking period has been fetched still shows the older ones, and from the
+    marking periods it was last seen to meet in.
+    """
+    for class_name, class_info in all_classes_data.items():
+        previous_info = previous_classes.get(class_name, {})
+        class_info['grades'] = dict(previous_info.get('grades', {}))
+        class_info['categoryWeights'] = dict(previous_info.get('categoryWeights', {}))
+        if previous_info.get('mpTotals'):
+            class_info['mpTotals'] = dict(previous_info['mpTotals'])
+        if previous_info.get('markingPeriods'):
+            class_info['markingPeriods'] = list(previous_info['markingPeriods'])
+
+def get_all_grades(session, all_classes_data, student_id, save_html=True, previous_classes=None,
+                   active_mp=None, on_marking_period=None, prefetcher=None):
+    """
+    Fetches grades one marking period at a time across every class, starting with
+    active_mp (default: the first class's current marking period). Each class is
+    only fetched for the marking periods it meets in, which are discovered from its
+    first page and cached in class_info['markingPeriods'].
+    If a page can't be fetched, that class/MP keeps its data from previous_classes
+    (the last saved "classes" dict) and is marked stale.
+
+    on_marking_period(mp, all_classes_data), if given, is called as each marking
+    period but the last finishes; periods not yet fetched still hold their previous
+    data. Pages already queued on a GradePrefetcher are collected from it, and the
+    prefetcher is closed when done.
+    """
+    previous_classes = previous_classes or {}
     if not student_id:
         print("Error in get_all_grades: student_id was not provided.")
         return all_classes_data
 
-    marking_periods = ['MP1', 'MP2', 'MP3', 'MP4']
+    _seed_from_previous(all_classes_data, previous_classes)
+    if active_mp is None:
+        active_mp = next((c.get('markingPeriod') for c in all_classes_data.values() if c.get('markingPeriod')), None)
     
-    for class_name, class_info in all_classes_data.items():
-        print(f"  - Fetching grades for: {class_name}")
-        
-        # Initialize grades dictionary for all marking periods
-        class_info['grades'] = {}
-        class_info['categoryWeights'] = {}
-        
-        # Fetch grades for each marking period
-        for mp in marking_periods:
-            print(f"    - Fetching {mp} grades...")
-            grades_list, weights_dict = _process_class_page_for_mp(
-                session, class_name, class_info, student_id, mp, save_html
-            )
+    try:
+        done = []
+        mp = next_marking_period(all_classes_data, active_mp, done)
+        while mp:
+            print(f"  - Fetching {mp} grades...")
+            for class_name, class_info in all_classes_data.items():
+                if mp not in class_marking_periods(class_info):
+                    continue
+                print(f"    - {class_name}")
+                if prefetcher is not None:
+                    grades_list, weights_dict, periods = prefetcher.result(class_name, class_info, mp)
+                else:
+                    grades_list, weights_dict, periods = _process_class_page_for_mp(
+                        session, class_name, class_info, student_id, mp, save_html
+                    )
+                _store_mp_result(
+                    class_info, mp, grades_list, weights_dict, previous_classes.get(class_name, {}), periods
+                )
+            # Request pacing is handled by the shared per-host limiter in throttleHelper
             
-            class_info['grades'][mp] = grades_list
-            class_info['categoryWeights'][mp] = weights_dict
-            # time.sleep(0.3)  # Shorter delay between MP requests
-        
-        # time.sleep(0.5)  # Longer delay between classes
+            done.append(mp)
+            mp = next_marking_period(all_classes_data, active_mp, done)
+            if on_marking_period and mp:
+                on_marking_period(done[-1], all_classes_data)
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
     
     return all_classes_data
 
+def _store_refreshed_mp(class_name, class_info, marking_period, grades_list, weights_dict, periods):
+    """
+    Stores a refreshed marking period like _store_mp_result and returns what changed
+    in it (see changeHelper.class_change), or None. A failed fetch changes nothing.
+    """
+    old_grades = class_info.get('grades', {}).get(marking_period, [])
+    previous_average = mp_grade(class_info, marking_period)[0]
+    _store_mp_result(class_info, marking_period, grades_list, weights_dict, marking_periods=periods)
+    if grades_list is None:
+        return None
+    return class_change(class_name, old_grades, grades_list, previous_average, mp_grade(class_info, marking_period)[0])
+
+def publish_scrape_changes(previous_classes, all_classes_data):
+    """
+    Compares a full scrape with the last saved classes and publishes one change
+    event per marking period that changed, as update_active_mp_grades does for the
+    active one. Classes and marking periods with no saved grades to compare against
+    (e.g. on the first scrape) are skipped rather than reported as all new.
+    """
+    changes_by_mp = {}
+    for class_name, class_info in all_classes_data.items():
+        previous_info = previous_classes.get(class_name)
+        if not previous_info:
+            continue
+        previous_grades = previous_info.get('grades', {})
+        for marking_period, grades_list in class_info.get('grades', {}).items():
+            if marking_period not in previous_grades:
+                continue
+            change = class_change(
+                class_name, previous_grades[marking_period], grades_list,
+                mp_grade(previous_info, marking_period)[0], mp_grade(class_info, marking_period)[0]
+            )
+            if change:
+                changes_by_mp.setdefault(marking_period, []).append(change)
+    for marking_period in sorted(changes_by_mp, key=marking_period_sort_key):
+        publish_grade_changes(marking_period, changes_by_mp[marking_period])
+
 def update_active_mp_grades(session, all_classes_data, student_id, active_mp, save_html=True):
     """
-    Updates grades for only the active marking period across all classes.
+    Updates grades for only the active marking period across all classes, and
+    publishes the assignments that were added, changed or removed on the change feed.
     """
     if not student_id:
         print("Error in update_active_mp_grades: student_id was not provided.")
@@ -156,23 +350,22 @@ def update_active_mp_grades(session, all_classes_data, student_id, active_mp, sa
         print("Error in update_active_mp_grades: active_mp was not provided.")
         return all_classes_data
     
+    changes = []
     for class_name, class_info in all_classes_data.items():
+        # Courses that don't meet in the active marking period have nothing to update
+        if active_mp not in class_marking_periods(class_info):
+            continue
         print(f"  - Updating {active_mp} grades for: {class_name}")
         
         # Fetch grades for the active marking period only
-        grades_list, weights_dict = _process_class_page_for_mp(
+        grades_list, weights_dict, periods = _process_class_page_for_mp(
             session, class_name, class_info, student_id, active_mp, save_html
         )
         
-        # Update only the active MP data
-        if 'grades' not in class_info:
-            class_info['grades'] = {}
-        if 'categoryWeights' not in class_info:
-            class_info['categoryWeights'] = {}
-            
-        class_info['grades'][active_mp] = grades_list
-        class_info['categoryWeights'][active_mp] = weights_dict
-        
-        # time.sleep(0.3)  # Short delay between classes
+        # Update only the active MP data (kept as-is and marked stale if the fetch failed)
+        change = _store_refreshed_mp(class_name, class_info, active_mp, grades_list, weights_dict, periods)
+        if change:
+            changes.append(change)
     
+    publish_grade_changes(active_mp, changes)
     return all_classes_data
\ No newline at end of file
@@ -0,0 +1,74 @@
+# jsonHelper.py
+
+import json
+from modelHelper import json_default
+
+# --- Configuration ---
+# Preferred encoders in order; the first one that is installed is used.
+PREFERRED_BACKENDS = ("orjson", "msgspec", "json")
+
+def _load_backend():
+    for name in PREFERRED_BACKENDS:
+        if name == "orjson":
+            try:
+                import orjson
+            except ImportError:
+                continue
+
+            def dumps(obj, pretty):
+                option = orjson.OPT_INDENT_2 if pretty else 0
+                return orjson.dumps(obj, default=json_default, option=option)
+            return name, dumps, orjson.loads
+
+        if name == "msgspec":
+            try:
+                import msgspec
+            except ImportError:
+                continue
+            encoder = msgspec.json.Encoder(enc_hook=json_default)
+            decoder = msgspec.json.Decoder()
+
+            def dumps(obj, pretty):
+                encoded = encoder.encode(obj)
+                return msgspec.json.format(encoded, indent=2) if pretty else encoded
+
+            def loads(data):
+                try:
+                    return decoder.decode(data)
+                except msgspec.DecodeError as e:
+                    raise ValueError(str(e)) from e
+            return name, dumps, loads
+
+        if name == "json":
+            def dumps(obj, pretty):
+                if pretty:
+                    text = json.dumps(obj, indent=2, default=json_default)
+                else:
+                    text = json.dumps(obj, separators=(",", ":"), default=json_default)
+                return text.encode("utf-8")
+            return name, dumps, json.loads
+
+    raise ValueError(f"No usable JSON backend in {PREFERRED_BACKENDS}")
+
+BACKEND_NAME, _dumps, _loads = _load_backend()
+
+def dumps(obj, pretty=False):
+    """Serializes obj (including model objects) to UTF-8 JSON bytes. Compact unless pretty is set."""
+    return _dumps(obj, pretty)
+
+def loads(data):
+    """Parses JSON from bytes or str. Raises ValueError on invalid input."""
+    return _loads(data)
+
+def load_file(path):
+    """Reads a JSON file and returns (data, raw_bytes) so the bytes can be reused."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    return _loads(raw), raw
+
+def write_file(path, obj, pretty=False):
+    """Serializes obj once, writes it to path and returns the bytes that were written."""
+    encoded = _dumps(obj, pretty)
+    with open(path, "wb") as f:
+        f.write(encoded)
+    return encoded
@@ -1,23 +1,203 @@
 # loginHelper.py
 
 import requests
-import pickle
+import json
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from fetchHelper import get_page, post_page
+from metricsHelper import LOGIN_ATTEMPTS
 
 # --- Configuration ---
 LOGIN_URL = "https://students.ww-p.org/genesis/sis/j_security_check?parents=Y"
 HOME_URL = "https://students.ww-p.org/genesis/sis/view?gohome=true"
-COOKIE_FILE = "cookies.pkl"
+COOKIE_FILE = "cookies.json"
+# Older versions pickled the cookie jar here; it is never loaded and is removed on the next save
+LEGACY_COOKIE_FILE = "cookies.pkl"
+# A session last known to be good this recently is reused without a verification request
+SESSION_TRUST_SECONDS = 10 * 60
+# Cookies without an expiry date are treated as expired this long after the session was last known good
+SESSION_MAX_IDLE_SECONDS = 60 * 60
+# Minimum time between writes when recording that a session is still good
+TOUCH_INTERVAL_SECONDS = 60
+# Assumed idle timeout of a Genesis session until a shorter one is observed
+DEFAULT_SESSION_TIMEOUT_SECONDS = 30 * 60
+# Observed timeouts are never taken to be shorter than this
+MIN_SESSION_TIMEOUT_SECONDS = 5 * 60
+# Logouts needed before the timeout estimate is lowered, so a single early one
+# (e.g. a server restart) can't shorten it
+EXPIRY_OBSERVATIONS_REQUIRED = 3
+# Logouts older than this are forgotten, so a lowered estimate grows back
+EXPIRY_OBSERVATION_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+# The keep-alive pings a session once it has been idle for this fraction of its timeout
+KEEPALIVE_FRACTION = 0.5
+# After a failed re-login, expired requests fail at once for this long instead of each logging in again
+RELOGIN_RETRY_SECONDS = 5 * 60
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
 # --- Credentials have been REMOVED from this file ---
 
+# Serializes re-logins so concurrent workers that hit an expired session log in only once
+_RELOGIN_LOCK = threading.Lock()
+_STORE_LOCK = threading.Lock()
+# The most recent good session for each account, shared by updates and the keep-alive
+_LIVE_SESSIONS = {}
+_KEEPALIVE_THREADS = {}
+
+def _read_cookie_store():
+    """Returns the saved cookie store: {"accounts": {username: {"lastGood": ts, "cookies": [...]}}}."""
+    try:
+        with open(COOKIE_FILE, "r", encoding="utf-8") as f:
+            store = json.load(f)
+        if isinstance(store.get("accounts"), dict):
+            return store
+    except (IOError, ValueError, AttributeError):
+        pass
+    return {"accounts": {}}
+
+def _write_cookie_store(store):
+    """Atomically replaces the cookie store, readable by the current user only."""
+    temp_file = COOKIE_FILE + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(store, f)
+    try:
+        os.chmod(temp_file, 0o600)
+    except OSError:
+        pass
+    os.replace(temp_file, COOKIE_FILE)
+    if os.path.exists(LEGACY_COOKIE_FILE):
+        try:
+            os.remove(LEGACY_COOKIE_FILE)
+        except OSError:
+            pass
+
+def _save_session(username, session):
+    """Saves the session's cookies (with their expiry) for username and marks it as good now."""
+    cookies = [{
+        "name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+        "expires": c.expires, "secure": bool(c.secure)
+    } for c in session.cookies]
+    now = time.time()
+    with _STORE_LOCK:
+        store = _read_cookie_store()
+        account = store["accounts"].setdefault(username, {})
+        account.update({"lastGood": now, "cookies": cookies})
+        try:
+            _write_cookie_store(store)
+        except (IOError, OSError) as e:
+            print(f"  - Warning: Could not save session cookies. Reason: {e}")
+    session.genesis_last_saved = now
+
+def _cookies_alive(cookies, last_good, now):
+    """True if no saved cookie has passed its expiry and session cookies haven't idled out."""
+    if not cookies:
+        return False
+    for cookie in cookies:
+        expires = cookie.get("expires")
+        if expires is None:
+            if now - last_good > SESSION_MAX_IDLE_SECONDS:
+                return False
+        elif expires <= now:
+            return False
+    return True
+
+def touch_session(session):
+    """
+    Records that a session just served a real page, so the next run can reuse it
+    without a verification request. Writes at most once per TOUCH_INTERVAL_SECONDS.
+    """
+    now = time.time()
+    session.genesis_last_active = now
+    credentials = getattr(session, "genesis_credentials", None)
+    if credentials and now - getattr(session, "genesis_last_saved", 0) >= TOUCH_INTERVAL_SECONDS:
+        _save_session(credentials[0], session)
+
+def _attach_credentials(session, username, password, last_active=None):
+    """
+    Remembers the account on the session so fetches can re-authenticate it in place,
+    and makes it the account's live session.
+    """
+    session.genesis_credentials = (username, password)
+    session.genesis_generation = getattr(session, "genesis_generation", 0)
+    session.genesis_last_active = last_active or time.time()
+    _LIVE_SESSIONS[username] = session
+    return session
+
+def _timeout_estimate(account, now=None):
+    """
+    Estimates an account's session idle timeout from the logouts saved in its store
+    entry. Each logout's idle time is an upper bound on the timeout, but one can come
+    early (a server restart), so the estimate is the longest of the last
+    EXPIRY_OBSERVATIONS_REQUIRED recent ones, and the default until there are that many.
+    """
+    now = now or time.time()
+    recent = [
+        idle for seen_at, idle in account.get("expiryObservations") or []
+        if now - seen_at < EXPIRY_OBSERVATION_MAX_AGE_SECONDS
+    ]
+    if len(recent) < EXPIRY_OBSERVATIONS_REQUIRED:
+        return DEFAULT_SESSION_TIMEOUT_SECONDS
+    return min(DEFAULT_SESSION_TIMEOUT_SECONDS, max(recent[-EXPIRY_OBSERVATIONS_REQUIRED:]))
+
+def get_session_timeout(username):
+    """Returns the estimated idle timeout of the account's sessions, in seconds."""
+    with _STORE_LOCK:
+        account = _read_cookie_store()["accounts"].get(username) or {}
+    return _timeout_estimate(account)
+
+def _update_expiry_observations(username, update):
+    """Applies update(observations) to the account's saved logouts and reports a changed estimate."""
+    now = time.time()
+    with _STORE_LOCK:
+        store = _read_cookie_store()
+        account = store["accounts"].setdefault(username, {})
+        # Replaced by expiryObservations; it was lowered by any single logout
+        account.pop("sessionTimeout", None)
+        before = _timeout_estimate(account, now)
+        observations = [
+            [seen_at, idle] for seen_at, idle in account.get("expiryObservations") or []
+            if now - seen_at < EXPIRY_OBSERVATION_MAX_AGE_SECONDS
+        ]
+        observations = update(observations)[-EXPIRY_OBSERVATIONS_REQUIRED:]
+        if observations == account.get("expiryObservations"):
+            return
+        account["expiryObservations"] = observations
+        after = _timeout_estimate(account, now)
+        if after != before:
+            print(f"  - Genesis sessions appear to time out after about {after / 60:.0f} minutes idle.")
+        try:
+            _write_cookie_store(store)
+        except (IOError, OSError):
+            pass
+
+def _observe_expiry(session):
+    """
+    Called when a session is found logged out. Its idle time is saved as an upper
+    bound on the server's timeout (see _timeout_estimate).
+    """
+    credentials = getattr(session, "genesis_credentials", None)
+    last_active = getattr(session, "genesis_last_active", None)
+    if not credentials or last_active is None:
+        return
+    now = time.time()
+    idle = max(MIN_SESSION_TIMEOUT_SECONDS, now - last_active)
+    _update_expiry_observations(credentials[0], lambda observations: observations + [[now, idle]])
+
+def _observe_alive(username, idle):
+    """
+    Called when a session idle for `idle` seconds is found still logged in. That is
+    a lower bound on the timeout, so saved logouts after shorter idle times (which
+    must have come early) are dropped.
+    """
+    _update_expiry_observations(
+        username, lambda observations: [entry for entry in observations if entry[1] > idle]
+    )
+
 def _verify_session(session):
     """
     Internal function to verify if a session is active by checking the home page.
     """
     try:
-        response = session.get(HOME_URL, allow_redirects=False)
+        response = get_page(session, "home", HOME_URL, relogin=False, allow_redirects=False)
         response.raise_for_status()
         if response.status_code == 200 and 'j_username' not in response.text:
             return True
@@ -35,40 +215,142 @@ def _login_and_save_cookies(username, password):
     headers = {"Referer": HOME_URL, "Content-Type": "application/x-www-form-urlencoded"}
 
     try:
-        response = session.post(LOGIN_URL, data=form_data, headers=headers, allow_redirects=False)
+        response = post_page(session, "login", LOGIN_URL, data=form_data, headers=headers, allow_redirects=False)
         response.raise_for_status()
         
         if not _verify_session(session):
+            LOGIN_ATTEMPTS.inc(result="rejected")
             print("  - Login failed. Please check your credentials.")
             return None
 
     except requests.exceptions.RequestException as e:
+        LOGIN_ATTEMPTS.inc(result="error")
         print(f"  - An error occurred during login: {e}")
         return None
 
-    with open(COOKIE_FILE, "wb") as f:
-        pickle.dump(session.cookies, f)
-    return session
+    LOGIN_ATTEMPTS.inc(result="success")
+
+    _save_session(username, session)
+    return _attach_credentials(session, username, password)
 
 def get_session(username, password):
     """
-    Gets a session by loading recent cookies and verifying them.
-    If cookies are old, invalid, or missing, it performs a new login.
-    """
-    if os.path.exists(COOKIE_FILE):
-        file_mod_time = datetime.fromtimestamp(os.path.getmtime(COOKIE_FILE))
-        if datetime.now() - file_mod_time < timedelta(hours=1):
-            session = requests.Session()
-            session.headers.update({"User-Agent": USER_AGENT})
-            with open(COOKIE_FILE, "rb") as f:
-                session.cookies.update(pickle.load(f))
-            
-            if _verify_session(session):
-                return session
+    Gets a session from the account's saved cookies. A session that was known to be
+    good within SESSION_TRUST_SECONDS is used as-is; an older one whose cookies have
+    not expired is verified first. If cookies are expired, invalid, or missing, it
+    performs a new login.
+
+    While the keep-alive is running, the account's live session is returned directly.
+    """
+    with _STORE_LOCK:
+        account = _read_cookie_store()["accounts"].get(username) or {}
+    cookies = account.get("cookies") or []
+    last_good = account.get("lastGood") or 0
+    now = time.time()
+
+    live = _LIVE_SESSIONS.get(username)
+    timeout = _timeout_estimate(account, now)
+    if live is not None and live.genesis_credentials[1] == password and now - live.genesis_last_active < timeout:
+        return live
+
+    if _cookies_alive(cookies, last_good, now):
+        session = requests.Session()
+        session.headers.update({"User-Agent": USER_AGENT})
+        for cookie in cookies:
+            session.cookies.set(
+                cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path"),
+                expires=cookie.get("expires"), secure=cookie.get("secure", False)
+            )
+        
+        if now - last_good < SESSION_TRUST_SECONDS:
+            session.genesis_last_saved = last_good
+            return _attach_credentials(session, username, password, last_active=last_good)
+        if _verify_session(session):
+            _observe_alive(username, now - last_good)
+            _save_session(username, session)
+            return _attach_credentials(session, username, password)
 
     print("  - Cookies are missing, old, or invalid. Performing new login...")
     return _login_and_save_cookies(username, password)
 
+def reauthenticate(session, seen_generation):
+    """
+    Logs the session's account in again and swaps the fresh cookies into the
+    existing session object, so every worker sharing it recovers at once.
+    seen_generation is the session's genesis_generation when the caller's request
+    was sent; if another worker has already re-logged in since then, no new login
+    is made. A failed login is recorded on the session, and for RELOGIN_RETRY_SECONDS
+    other workers fail without sending one of their own (repeated failed logins can
+    lock the account). Returns True if the caller should replay its request.
+    """
+    with _RELOGIN_LOCK:
+        if getattr(session, "genesis_generation", 0) != seen_generation:
+            return True
+        credentials = getattr(session, "genesis_credentials", None)
+        if not credentials:
+            return False
+        failed_generation, failed_at = getattr(session, "genesis_failed_login", (None, 0))
+        if failed_generation == seen_generation and time.time() - failed_at < RELOGIN_RETRY_SECONDS:
+            return False
+
+        _observe_expiry(session)
+        print("  - Session expired. Logging in again...")
+        fresh_session = _login_and_save_cookies(*credentials)
+        if not fresh_session:
+            session.genesis_failed_login = (seen_generation, time.time())
+            return False
+        session.cookies.clear()
+        session.cookies.update(fresh_session.cookies)
+        session.genesis_generation = seen_generation + 1
+        session.genesis_last_active = time.time()
+        _LIVE_SESSIONS[credentials[0]] = session
+        return True
+
+def _keepalive_worker(username, password):
+    """
+    Keeps the account's live session from timing out: once it has been idle for
+    KEEPALIVE_FRACTION of the observed timeout, the home page is requested. A session
+    found logged out is re-authenticated here, in the background, so the next update
+    starts with a working session instead of paying for a login.
+    """
+    while True:
+        try:
+            session = _LIVE_SESSIONS.get(username)
+            if session is None:
+                session = get_session(username, password)
+                if session is None:
+                    time.sleep(MIN_SESSION_TIMEOUT_SECONDS)
+                    continue
+
+            interval = get_session_timeout(username) * KEEPALIVE_FRACTION
+            wait = session.genesis_last_active + interval - time.time()
+            if wait > 0:
+                time.sleep(wait)
+                continue
+
+            generation = session.genesis_generation
+            idle = time.time() - session.genesis_last_active
+            if _verify_session(session):
+                _observe_alive(username, idle)
+                touch_session(session)
+            elif not reauthenticate(session, generation):
+                time.sleep(MIN_SESSION_TIMEOUT_SECONDS)
+        except Exception as e:
+            print(f"  - Error in session keep-alive: {e}")
+            time.sleep(MIN_SESSION_TIMEOUT_SECONDS)
+
+def start_keepalive(username, password):
+    """
+    Starts the background keep-alive for an account (once per process) and returns
+    its thread. The first session is obtained on that thread if there isn't one yet.
+    """
+    thread = _KEEPALIVE_THREADS.get(username)
+    if thread is None:
+        thread = threading.Thread(target=_keepalive_worker, args=(username, password), daemon=True)
+        _KEEPALIVE_THREADS[username] = thread
+        thread.start()
+    return thread
+
 def perform_login(username, password):
     """
     Forces a new login, bypassing any existing cookies, and returns a new session.
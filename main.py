@@ -1,32 +1,67 @@
 # main.py
 
-import json
 import os
 import threading
 import time
-from loginHelper import get_session, perform_login
-from classHelper import get_all_classes
-from dotenv import load_dotenv
-from gradeHelper import get_all_grades, update_active_mp_grades
-from userHelper import get_user_summary_data
-from dashboardHelper import generate_dashboard
 from app import start_dashboard
+from flightHelper import SingleFlight
+from profileHelper import get_env_profile_mode, parse_profile_mode, profiled, run_profiled
+from metricsHelper import start_metrics_server, track_refresh
+from modelHelper import current_school_year, load_class_models
+from jsonHelper import load_file, write_file
 
 
+# The scraping helpers pull in requests, BeautifulSoup/lxml and dotenv, so they are
+# imported inside the functions that need them. This keeps `--dashboard-only`
+# startup down to the webview itself.
+STARTUP_TIME = time.perf_counter()
+
 # --- Configuration ---
 OUTPUT_JSON_FILE = "output.json"
+DASHBOARD_HTML_FILE = "dashboard.html"
 SAVE_HTML_FILES = False
+# --- Scraping backend: "sync" (requests, one page at a time) or "async" (httpx, pages fetched concurrently) ---
+SCRAPE_BACKEND = "sync"
+# --- Pretty-print output.json (compact output is smaller and faster to write) ---
+OUTPUT_JSON_PRETTY = False
 # --- Auto-update interval in minutes (set to 0 to disable automatic updates) ---
 AUTO_UPDATE_INTERVAL_MINUTES = 0
+# --- Profiling mode ("cprofile", "sample" or None). Set with --profile[=sample]; only "sample" sees worker threads ---
+PROFILE_MODE = None
+# --- Local port for the Prometheus-style /metrics endpoint (set to 0 to disable) ---
+METRICS_PORT = 0
+# --- Keep the Genesis session alive in the background while the dashboard is open ---
+KEEP_SESSION_ALIVE = True
+# --- Open the dashboard from the last saved data and refresh it in the background ---
+WARM_START = True
+# --- Start fetching each class's grades while the class list is still downloading (sync backend) ---
+STREAM_CLASS_DISCOVERY = True
+# --- Append changed grades to the columnar analytics export (see exportHelper) after each save ---
+EXPORT_ANALYTICS = False
+# --- Keep the assignment search index (see searchHelper) up to date after each save ---
+INDEX_SEARCH = True
+
+# Refreshes requested while an identical one is running (auto-update and the
+# Update button at once) wait for it and share its result
+_REFRESHES = SingleFlight("refresh")
+# on_update callbacks of the callers sharing the running full scrape
+_SCRAPE_LISTENERS = []
+_SCRAPE_LISTENERS_LOCK = threading.Lock()
 
-def get_credentials():
-    """Get credentials from .env file or prompt user for input."""
+def get_credentials(prompt=True):
+    """
+    Get credentials from .env file or prompt user for input.
+    With prompt=False, returns (None, None) instead of prompting.
+    """
+    from dotenv import load_dotenv
     load_dotenv()
     username = os.getenv("GENESIS_USERNAME")
     password = os.getenv("GENESIS_PASSWORD")
     
     # If credentials are missing, prompt user
     if not username or not password:
+        if not prompt:
+            return None, None
         print("Credentials not found in .env file or incomplete.")
         username = input("Enter your Genesis username/email: ").strip()
         password = input("Enter your Genesis password: ").strip()
@@ -43,8 +78,79 @@ def get_credentials():
     
     return username, password
 
-def scrape_grades():
-    """Scrape grades and generate dashboard. Returns True on success, False on failure."""
+def load_previous_classes():
+    """Return the "classes" dict from the last saved output.json, or {} if there is none."""
+    if not os.path.exists(OUTPUT_JSON_FILE):
+        return {}
+    try:
+        data, _ = load_file(OUTPUT_JSON_FILE)
+        return data.get("classes", {})
+    except (IOError, ValueError):
+        return {}
+
+def scrape_grades(on_update=None):
+    """
+    Scrape grades and generate dashboard. Returns True on success, False on failure.
+    If on_update is given, the active marking period is fetched first and the data
+    and dashboard are saved after each marking period, calling on_update() each time.
+    A call made while a full scrape is already running waits for that one instead;
+    its on_update is called for the marking periods saved from then on (if that
+    scrape streams them) and once the shared result arrives.
+    """
+    if on_update:
+        with _SCRAPE_LISTENERS_LOCK:
+            _SCRAPE_LISTENERS.append(on_update)
+    try:
+        success = _REFRESHES.do(
+            "full",
+            lambda: track_refresh("full", lambda: _scrape_grades(_notify_scrape_listeners if on_update else None)),
+            kind="full"
+        )
+    finally:
+        if on_update:
+            with _SCRAPE_LISTENERS_LOCK:
+                _SCRAPE_LISTENERS.remove(on_update)
+    if success and on_update:
+        on_update()
+    return success
+
+def _notify_scrape_listeners():
+    """Calls the on_update of every caller sharing the running full scrape."""
+    with _SCRAPE_LISTENERS_LOCK:
+        listeners = list(_SCRAPE_LISTENERS)
+    for listener in listeners:
+        try:
+            listener()
+        except Exception as e:
+            print(f"  - Warning: Could not push the saved grades to a caller. Reason: {e}")
+
+def save_and_generate(data):
+    """
+    Write output.json and regenerate the dashboard from it (and update the search
+    index and append to the analytics export, if enabled). Returns True on success.
+    """
+    from dashboardHelper import generate_dashboard
+    
+    try:
+        data_json = write_file(OUTPUT_JSON_FILE, data, pretty=OUTPUT_JSON_PRETTY)
+    except IOError as e:
+        print(f"Error: Could not write to file '{OUTPUT_JSON_FILE}'. Reason: {e}")
+        return False
+    generate_dashboard(OUTPUT_JSON_FILE, data=data, data_json=data_json)
+    if INDEX_SEARCH:
+        from searchHelper import update_search_index
+        update_search_index(data)
+    if EXPORT_ANALYTICS:
+        from exportHelper import export_data
+        export_data(data)
+    return True
+
+def _scrape_grades(on_update=None):
+    from loginHelper import get_session, perform_login
+    from classHelper import get_all_classes
+    from gradeHelper import GradePrefetcher, get_all_grades, publish_scrape_changes
+    from userHelper import get_user_summary_data
+    
     try:
         # --- Step 1: Get Credentials ---
         username, password = get_credentials()
@@ -59,17 +165,39 @@ def scrape_grades():
 
         # --- Step 3: Get User Data and Student ID ---
         print("\n--- Fetching User Summary Data ---")
-        user_data = get_user_summary_data(session)
+        if SCRAPE_BACKEND == "async":
+            from asyncHelper import get_user_summary_data_async, run_with_session
+            user_data = run_with_session(session, get_user_summary_data_async)
+        else:
+            user_data = get_user_summary_data(session)
         if not user_data or "studentID" not in user_data or not user_data["studentID"]:
             print("  - Failed to fetch or parse user data, or studentID is missing. Aborting.")
             return False
         
         student_id = user_data["studentID"]
         print(f"  - Successfully parsed user data. Student ID: {student_id}")
+        # Saved with the grades, so they stay filed under this school year once the next one starts
+        school_year = current_school_year()
 
         # --- Step 4: Discover All Classes using the Student ID ---
         print("\n--- Discovering Classes ---")
-        classes_data = get_all_classes(session, student_id)
+        # Pages that can't be fetched keep their last saved data instead of being emptied,
+        # and each class's saved marking periods decide which of its pages are fetched
+        previous_classes = load_previous_classes()
+        
+        # Class pages start downloading as each class appears in the streamed class list
+        prefetcher = None
+        if STREAM_CLASS_DISCOVERY and SCRAPE_BACKEND != "async":
+            prefetcher = GradePrefetcher(
+                session, student_id, save_html=SAVE_HTML_FILES, previous_classes=previous_classes
+            )
+        on_class = prefetcher.add_class if prefetcher else None
+        def discover_classes():
+            if SCRAPE_BACKEND == "async":
+                from asyncHelper import get_all_classes_async, run_with_session
+                return run_with_session(session, get_all_classes_async, student_id)
+            return get_all_classes(session, student_id, on_class=on_class)
+        classes_data = discover_classes()
 
         # Validate session and re-login if necessary
         if classes_data is None:
@@ -80,9 +208,13 @@ def scrape_grades():
                 return False
             
             print("  - Re-authentication successful. Retrying class discovery...")
-            classes_data = get_all_classes(session, student_id)
+            if prefetcher:
+                prefetcher.session = session
+            classes_data = discover_classes()
 
         if classes_data is None or not classes_data:
+            if prefetcher:
+                prefetcher.close()
             print("Failed to discover any classes. Aborting.")
             return False
 
@@ -90,8 +222,25 @@ def scrape_grades():
         
         # --- Step 5: Fetch Detailed Grades for Each Class ---
         print("\n--- Fetching Grades for Each Class ---")
+        # When streaming, publish each marking period (the active one comes first) as it lands
+        def on_marking_period(mp, partial_classes):
+            if save_and_generate({"user": user_data, "schoolYear": school_year, "classes": partial_classes}):
+                print(f"  - {mp} grades saved. Updating the dashboard...")
+                on_update()
+        
         # Pass the SAVE_HTML_FILES setting to the grade helper
-        final_class_data = get_all_grades(session, classes_data, student_id, save_html=SAVE_HTML_FILES)
+        if SCRAPE_BACKEND == "async":
+            from asyncHelper import get_all_grades_async, run_with_session
+            final_class_data = run_with_session(
+                session, get_all_grades_async, classes_data, student_id,
+                save_html=SAVE_HTML_FILES, previous_classes=previous_classes,
+                on_marking_period=on_marking_period if on_update else None
+            )
+        else:
+            final_class_data = get_all_grades(
+                session, classes_data, student_id, save_html=SAVE_HTML_FILES, previous_classes=previous_classes,
+                on_marking_period=on_marking_period if on_update else None, prefetcher=prefetcher
+            )
         
         # --- Step 6: Combine and Save All Retrieved Data ---
         print("\n--- Combining and Saving Data ---")
@@ -99,20 +248,15 @@ def scrape_grades():
         # Create the final, combined dictionary structure
         combined_data = {
             "user": user_data,
+            "schoolYear": school_year,
             "classes": final_class_data
         }
 
-        # Save the single combined file
-        try:
-            with open(OUTPUT_JSON_FILE, "w", encoding="utf-8") as f:
-                json.dump(combined_data, f, indent=2)
-            print(f"Successfully saved all combined data to '{OUTPUT_JSON_FILE}'.")
-        except IOError as e:
-            print(f"Error: Could not write to file '{OUTPUT_JSON_FILE}'. Reason: {e}")
+        # Save the single combined file and generate the dashboard from it
+        if not save_and_generate(combined_data):
             return False
-
-        # Generate the dashboard
-        generate_dashboard(OUTPUT_JSON_FILE)
+        print(f"Successfully saved all combined data to '{OUTPUT_JSON_FILE}'.")
+        publish_scrape_changes(previous_classes, final_class_data)
         print("\nProcess complete.")
         return True
         
@@ -120,33 +264,120 @@ def scrape_grades():
         print(f"Error during grade scraping: {e}")
         return False
 
+def start_metrics():
+    """Start the metrics endpoint if a port is configured."""
+    if METRICS_PORT > 0:
+        start_metrics_server(METRICS_PORT)
+
+def start_change_consumers():
+    """Subscribe the configured desktop notification and webhook consumers to the grade change feed."""
+    from changeHelper import start_default_consumers
+    start_default_consumers()
+
+def start_session_keepalive():
+    """
+    Keep the session warm so dashboard updates don't wait on a login.
+    Skipped if disabled or if credentials would have to be prompted for.
+    """
+    if not KEEP_SESSION_ALIVE:
+        return
+    username, password = get_credentials(prompt=False)
+    if username and password:
+        from loginHelper import start_keepalive
+        start_keepalive(username, password)
+
+def start_background_services():
+    """Start the session keep-alive and, if enabled, the auto-update thread."""
+    start_session_keepalive()
+    
+    if AUTO_UPDATE_INTERVAL_MINUTES > 0:
+        auto_update_thread = threading.Thread(target=auto_update_worker, daemon=True)
+        auto_update_thread.start()
+
+def start_dashboard_services(window):
+    """
+    Runs on the webview's background thread once the window has started, so the
+    keep-alive's login imports don't delay opening the dashboard.
+    """
+    start_background_services()
+
+def warm_start_refresh(window):
+    """
+    Runs on the webview's background thread once the window has started: scrapes
+    with the active marking period first and pushes each saved stage into the
+    open window, then starts the background services.
+    """
+    print("\n--- Refreshing Grades in the Background ---")
+    window.evaluate_js("setUpdating(true)")
+    try:
+        success = run_profiled(
+            lambda: scrape_grades(on_update=lambda: window.evaluate_js("loadData()")),
+            "scrape_grades", PROFILE_MODE
+        )
+        if not success:
+            print("Background refresh failed. The dashboard is showing the last saved grades.")
+    finally:
+        window.evaluate_js("setUpdating(false)")
+    start_background_services()
+
 def main():
     """Main function - scrape grades and start dashboard."""
+    start_metrics()
+    start_change_consumers()
+    
+    # Show the last saved grades immediately and refresh them behind the open window
+    if WARM_START and os.path.exists(OUTPUT_JSON_FILE):
+        if not os.path.exists(DASHBOARD_HTML_FILE):
+            from dashboardHelper import generate_dashboard
+            generate_dashboard(OUTPUT_JSON_FILE, DASHBOARD_HTML_FILE)
+        
+        print("\n--- Starting Dashboard (last saved data) ---")
+        start_dashboard(
+            update_callback=profiled(update_active_mp_only, "update_active_mp_only", PROFILE_MODE),
+            dashboard_file=DASHBOARD_HTML_FILE,
+            startup_time=STARTUP_TIME,
+            background_task=warm_start_refresh,
+            data_file=OUTPUT_JSON_FILE
+        )
+        return
+    
     # First, scrape grades and generate dashboard
-    success = scrape_grades()
+    success = run_profiled(scrape_grades, "scrape_grades", PROFILE_MODE)
     
     if success:
-        # Start auto-update thread if enabled
-        if AUTO_UPDATE_INTERVAL_MINUTES > 0:
-            auto_update_thread = threading.Thread(target=auto_update_worker, daemon=True)
-            auto_update_thread.start()
+        start_background_services()
         
         # Start the dashboard with update callback
         print("\n--- Starting Dashboard ---")
-        start_dashboard(update_callback=update_active_mp_only)
+        start_dashboard(
+            update_callback=profiled(update_active_mp_only, "update_active_mp_only", PROFILE_MODE),
+            startup_time=STARTUP_TIME,
+            data_file=OUTPUT_JSON_FILE
+        )
     else:
         print("Failed to generate dashboard. Please check the errors above.")
 
 def update_active_mp_only():
-    """Update only the active marking period grades. Returns True on success, False on failure."""
+    """
+    Update only the active marking period grades. Returns True on success, False on failure.
+    Joins an update that is already running, or a running full scrape, which covers it.
+    """
+    joined, success = _REFRESHES.wait("full", kind="active_mp")
+    if joined:
+        return success
+    return _REFRESHES.do("active_mp", lambda: track_refresh("active_mp", _update_active_mp_only), kind="active_mp")
+
+def _update_active_mp_only():
+    from loginHelper import get_session
+    from gradeHelper import update_active_mp_grades
+    
     try:
         # Load existing data to get active MP and class info
         if not os.path.exists(OUTPUT_JSON_FILE):
             print("No existing data found. Running full scrape instead.")
             return scrape_grades()
         
-        with open(OUTPUT_JSON_FILE, "r", encoding="utf-8") as f:
-            existing_data = json.load(f)
+        existing_data, _ = load_file(OUTPUT_JSON_FILE)
         
         # Get credentials and authenticate
         username, password = get_credentials()
@@ -166,7 +397,7 @@ def update_active_mp_only():
         
         # Determine active marking period from existing data
         active_mp = None
-        classes = existing_data.get("classes", {})
+        classes = load_class_models(existing_data.get("classes", {}))
         for class_name, class_info in classes.items():
             if class_info.get("markingPeriod"):
                 active_mp = class_info.get("markingPeriod")
@@ -179,7 +410,13 @@ def update_active_mp_only():
         print(f"\n--- Updating {active_mp} Grades Only ---")
         
         # Update grades for active MP only
-        updated_classes = update_active_mp_grades(session, classes, student_id, active_mp, save_html=SAVE_HTML_FILES)
+        if SCRAPE_BACKEND == "async":
+            from asyncHelper import run_with_session, update_active_mp_grades_async
+            updated_classes = run_with_session(
+                session, update_active_mp_grades_async, classes, student_id, active_mp, save_html=SAVE_HTML_FILES
+            )
+        else:
+            updated_classes = update_active_mp_grades(session, classes, student_id, active_mp, save_html=SAVE_HTML_FILES)
         
         if updated_classes is None:
             print("Failed to update grades.")
@@ -188,17 +425,10 @@ def update_active_mp_only():
         # Update the existing data with new grades
         existing_data["classes"] = updated_classes
         
-        # Save updated data
-        try:
-            with open(OUTPUT_JSON_FILE, "w", encoding="utf-8") as f:
-                json.dump(existing_data, f, indent=2)
-            print(f"Successfully updated {active_mp} grades in '{OUTPUT_JSON_FILE}'.")
-        except IOError as e:
-            print(f"Error: Could not write to file '{OUTPUT_JSON_FILE}'. Reason: {e}")
+        # Save updated data and regenerate the dashboard with it
+        if not save_and_generate(existing_data):
             return False
-        
-        # Regenerate dashboard with updated data
-        generate_dashboard(OUTPUT_JSON_FILE)
+        print(f"Successfully updated {active_mp} grades in '{OUTPUT_JSON_FILE}'.")
         print(f"\n{active_mp} grades update complete.")
         return True
         
@@ -212,6 +442,7 @@ def auto_update_worker():
         return  # Auto-update disabled
     
     print(f"Auto-update enabled: will update grades every {AUTO_UPDATE_INTERVAL_MINUTES} minutes")
+    profile_mode = get_env_profile_mode() or PROFILE_MODE
     
     while True:
         try:
@@ -220,7 +451,7 @@ def auto_update_worker():
             
             # Perform the update
             print(f"\n--- Automatic Grade Update ({time.strftime('%Y-%m-%d %H:%M:%S')}) ---")
-            success = update_active_mp_only()
+            success = run_profiled(update_active_mp_only, "update_active_mp_only", profile_mode)
             
             if success:
                 print("Automatic grade update completed successfully.")
@@ -232,20 +463,78 @@ def auto_update_worker():
             # Continue running even if there's an error
 
 def run_dashboard_only():
-    """Start dashboard without scraping (assumes dashboard.html exists)."""
+    """Start dashboard without scraping, using the last generated dashboard or cached output.json."""
     print("--- Starting Dashboard (existing data) ---")
+    start_metrics()
+    start_change_consumers()
     
-    # Start auto-update thread if enabled
-    if AUTO_UPDATE_INTERVAL_MINUTES > 0:
-        auto_update_thread = threading.Thread(target=auto_update_worker, daemon=True)
-        auto_update_thread.start()
+    # Rebuild the page from cached data if only output.json survived
+    if not os.path.exists(DASHBOARD_HTML_FILE) and os.path.exists(OUTPUT_JSON_FILE):
+        from dashboardHelper import generate_dashboard
+        generate_dashboard(OUTPUT_JSON_FILE, DASHBOARD_HTML_FILE)
+    
+    start_dashboard(
+        update_callback=profiled(update_active_mp_only, "update_active_mp_only", PROFILE_MODE),
+        dashboard_file=DASHBOARD_HTML_FILE,
+        startup_time=STARTUP_TIME,
+        background_task=start_dashboard_services,
+        data_file=OUTPUT_JSON_FILE
+    )
+
+def run_reparse():
+    """
+    Rebuild output.json and the dashboard from the archived Genesis pages, without
+    any network access. Used after a parser fix or a change in the Genesis markup.
+    Returns True on success, False on failure.
+    """
+    from archiveHelper import ARCHIVE_PAGES, list_archived_accounts, reparse_archive
+    
+    print("--- Re-parsing Archived Pages ---")
+    username, _ = get_credentials(prompt=False)
+    accounts = list_archived_accounts()
+    if not username:
+        if len(accounts) != 1:
+            print("  - Set GENESIS_USERNAME to choose which archived account to re-parse.")
+            return False
+        username = accounts[0]
     
-    start_dashboard(update_callback=update_active_mp_only)
+    previous_data = {}
+    if os.path.exists(OUTPUT_JSON_FILE):
+        try:
+            previous_data, _ = load_file(OUTPUT_JSON_FILE)
+        except (IOError, ValueError):
+            pass
+    
+    start = time.perf_counter()
+    data = reparse_archive(username, previous_classes=previous_data.get("classes"))
+    if data is None:
+        print(f"  - No archived pages found for '{username}'.")
+        if not ARCHIVE_PAGES:
+            print("  - Page archiving is off. Set ARCHIVE_PAGES = True in archiveHelper.py to archive future scrapes.")
+        return False
+    if not data["user"]:
+        data["user"] = previous_data.get("user")
+    if previous_data.get("schoolYear"):
+        data["schoolYear"] = previous_data["schoolYear"]
+    
+    if not save_and_generate(data):
+        return False
+    print(f"Rebuilt {len(data['classes'])} classes from the archive in {time.perf_counter() - start:.1f}s.")
+    return True
 
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) > 1 and sys.argv[1] == "--dashboard-only":
+    for arg in sys.argv[1:]:
+        if arg == "--profile":
+            PROFILE_MODE = "cprofile"
+        elif arg.startswith("--profile="):
+            PROFILE_MODE = parse_profile_mode(arg.split("=", 1)[1] or "cprofile", "--profile")
+    
+    if "--reparse" in sys.argv[1:]:
+        # Rebuild the saved data from archived pages, then exit
+        sys.exit(0 if run_reparse() else 1)
+    elif "--dashboard-only" in sys.argv[1:]:
         # Just start dashboard with existing data
         run_dashboard_only()
     else:
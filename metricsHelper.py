@@ -0,0 +1,197 @@
+# metricsHelper.py
+
+import threading
+import time
+
+# --- Configuration ---
+METRICS_HOST = "127.0.0.1"
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_REFRESH_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+DEFAULT_WAIT_BUCKETS = (0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 30.0)
+
+_REGISTRY = []
+_REGISTRY_LOCK = threading.Lock()
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape_label_value(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        with _REGISTRY_LOCK:
+            _REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+class Counter(_Metric):
+    """A monotonically increasing value, optionally split by labels."""
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+class Gauge(_Metric):
+    """A value that can go up and down, optionally split by labels."""
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+class Histogram(_Metric):
+    """Counts observations into cumulative buckets and tracks their sum."""
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+            entry["sum"] += value
+
+    def _render_samples(self, items):
+        lines = []
+        for key, entry in items:
+            for bound, count in zip(self.buckets, entry["counts"]):
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(entry['sum'])}")
+            lines.append(f"{self.name}_count{labels} {entry['counts'][-1]}")
+        return lines
+
+# --- Application metrics ---
+REQUESTS_TOTAL = Counter(
+    "genesis_requests_total", "HTTP requests sent to Genesis by page type and status.", ("page_type", "status"))
+REQUEST_DURATION = Histogram(
+    "genesis_request_duration_seconds", "Latency of HTTP requests to Genesis.", ("page_type",))
+REQUEST_RETRIES = Counter(
+    "genesis_request_retries_total", "Requests retried after a timeout, connection error, 429 or 5xx.", ("page_type",))
+RESPONSE_BYTES = Counter(
+    "genesis_response_bytes_total", "Response body bytes downloaded from Genesis.", ("page_type",))
+SESSION_EXPIRIES = Counter(
+    "genesis_session_expiries_total", "Fetches that landed on the login page because the session had expired.", ("page_type",))
+LOGIN_ATTEMPTS = Counter(
+    "genesis_login_attempts_total", "Full login attempts and their outcome.", ("result",))
+PARSE_FAILURES = Counter(
+    "genesis_parse_failures_total", "Table rows skipped because they could not be parsed.", ("parser",))
+REFRESHES_TOTAL = Counter(
+    "genesis_refreshes_total", "Grade refresh runs by kind and outcome.", ("kind", "result"))
+REFRESH_DURATION = Histogram(
+    "genesis_refresh_duration_seconds", "Wall-clock duration of grade refresh runs.", ("kind",),
+    buckets=DEFAULT_REFRESH_BUCKETS)
+RATE_LIMIT_WAIT = Histogram(
+    "genesis_rate_limit_wait_seconds", "Time fetches spent waiting on the rate limiter or an open circuit.", ("host",),
+    buckets=DEFAULT_WAIT_BUCKETS)
+CIRCUIT_OPEN = Gauge(
+    "genesis_circuit_open", "1 while fetches to the host are paused by the circuit breaker.", ("host",))
+CIRCUIT_OPENS_TOTAL = Counter(
+    "genesis_circuit_opens_total", "Times the circuit breaker paused fetches to the host.", ("host",))
+COALESCED_CALLS = Counter(
+    "genesis_coalesced_calls_total", "Fetches and refreshes that joined an identical one already in flight.",
+    ("flight", "kind"))
+GRADE_CHANGES = Counter(
+    "genesis_grade_changes_total", "Assignments found new, changed or removed by active marking period refreshes.",
+    ("kind",))
+
+def render_metrics():
+    """Returns every registered metric in the Prometheus text exposition format."""
+    with _REGISTRY_LOCK:
+        metrics = list(_REGISTRY)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def track_refresh(kind, func):
+    """Runs a refresh function, recording its duration and whether it returned success."""
+    start = time.perf_counter()
+    success = False
+    try:
+        success = func()
+        return success
+    finally:
+        REFRESH_DURATION.observe(time.perf_counter() - start, kind=kind)
+        REFRESHES_TOTAL.inc(kind=kind, result="success" if success else "failure")
+
+def start_metrics_server(port, host=METRICS_HOST):
+    """
+    Serves /metrics on a daemon thread. Returns the server, or None if the port
+    could not be bound.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render_metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep scrape requests out of the console
+
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"Warning: Could not start metrics server on {host}:{port}. Reason: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Metrics available at http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,166 @@
+# modelHelper.py
+
+import re
+import sys
+from datetime import date as Date
+from functools import lru_cache
+
+# --- Configuration ---
+# Genesis often shows due dates without a year; months from this one onward
+# belong to the first calendar year of the school year.
+SCHOOL_YEAR_START_MONTH = 8
+# Lowest percentage for each letter grade, highest first; anything below the last is an F
+LETTER_GRADE_CUTOFFS = ((89.5, "A"), (79.5, "B"), (69.5, "C"), (59.5, "D"))
+
+def current_school_year(today=None):
+    """Returns the calendar year in which the current (or today's) school year started."""
+    today = today or Date.today()
+    return today.year if today.month >= SCHOOL_YEAR_START_MONTH else today.year - 1
+
+@lru_cache(maxsize=4096)
+def parse_due_date(text, school_year_start=None):
+    """
+    Parses a Genesis due date ("MM/DD/YYYY", "MM/DD/YY" or "MM/DD") into a
+    datetime.date. Dates without a year are placed in the school year that
+    starts in school_year_start (defaults to the current school year).
+    Returns None if the text is not a date.
+    """
+    parts = text.strip().split("/")
+    if len(parts) not in (2, 3):
+        return None
+    try:
+        month, day = int(parts[0]), int(parts[1])
+        if len(parts) == 3:
+            year = int(parts[2])
+            if year < 100:
+                year += 2000
+        else:
+            if school_year_start is None:
+                school_year_start = current_school_year()
+            year = school_year_start if month >= SCHOOL_YEAR_START_MONTH else school_year_start + 1
+        return Date(year, month, day)
+    except ValueError:
+        return None
+
+class Assignment:
+    """
+    A single graded assignment. Uses __slots__ instead of a per-instance dict and
+    interns the category name, since the same handful of categories repeats across
+    every assignment of every class and marking period.
+    """
+    __slots__ = ("name", "category", "date", "description", "total_points", "points_earned", "due_date")
+
+    def __init__(self, name, category, date, description, total_points, points_earned):
+        self.name = name
+        self.category = sys.intern(category)
+        self.date = date
+        self.description = description
+        self.total_points = total_points
+        self.points_earned = points_earned
+        self.due_date = parse_due_date(date)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds an Assignment from its JSON representation."""
+        try:
+            total_points = float(data.get("totalPoints", 0) or 0)
+            points_earned = float(data.get("pointsEarned", 0) or 0)
+        except (TypeError, ValueError):
+            total_points = points_earned = 0.0
+        return cls(
+            data.get("name", "") or "", data.get("category", "") or "", data.get("date", "") or "",
+            data.get("description", "") or "", total_points, points_earned
+        )
+
+    def to_dict(self):
+        """Returns the assignment in the existing output.json shape."""
+        return {
+            "name": self.name, "category": self.category, "date": self.date,
+            "description": self.description, "totalPoints": self.total_points,
+            "pointsEarned": self.points_earned
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, Assignment):
+            return NotImplemented
+        return (self.name, self.category, self.date, self.description, self.total_points, self.points_earned) == \
+            (other.name, other.category, other.date, other.description, other.total_points, other.points_earned)
+
+    def __repr__(self):
+        return f"Assignment({self.name!r}, {self.category!r}, {self.date!r}, {self.points_earned}/{self.total_points})"
+
+def marking_period_sort_key(marking_period):
+    """Natural sort key for marking period codes, so "MP2" sorts before "MP10" and "T1" before "T2"."""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", marking_period)]
+
+def category_totals(grades):
+    """Sums a marking period's Assignments per category: {category: [points earned, total points]}."""
+    totals = {}
+    for g in grades:
+        cat_entry = totals.setdefault(g.category, [0.0, 0.0])
+        cat_entry[0] += g.points_earned
+        cat_entry[1] += g.total_points
+    return totals
+
+def calculate_grade_for_mp(grades, cat_weights):
+    """
+    Calculates one marking period's weighted average from its Assignments and
+    category weights. Returns (overall_pct rounded to 0.1, or None if no weighted
+    category has points; {category: fraction or None}).
+    """
+    return grade_from_totals(category_totals(grades), cat_weights)
+
+def grade_from_totals(totals, cat_weights):
+    """calculate_grade_for_mp for category totals that were already summed by category_totals."""
+    cat_scores = {}
+    for cat, weight in cat_weights.items():
+        earned, total = totals.get(cat, (0.0, 0.0))
+        if total > 0:
+            cat_scores[cat] = earned / total
+        else:
+            cat_scores[cat] = None
+
+    effective_weight = 0.0
+    weighted_sum = 0.0
+    for cat, weight in cat_weights.items():
+        frac = cat_scores.get(cat)
+        if frac is not None:
+            effective_weight += float(weight)
+            weighted_sum += frac * float(weight)
+
+    overall_pct = None
+    if effective_weight > 0:
+        overall_pct = round((weighted_sum / effective_weight) * 100, 1)
+
+    return overall_pct, cat_scores
+
+def letter_grade(pct):
+    """Returns the letter grade for a percentage, or "N/A" for None."""
+    if pct is None:
+        return "N/A"
+    for cutoff, letter in LETTER_GRADE_CUTOFFS:
+        if pct >= cutoff:
+            return letter
+    return "F"
+
+def assignments_from_dicts(items):
+    """Converts a list of assignment dicts (or Assignments) into Assignments."""
+    return [item if isinstance(item, Assignment) else Assignment.from_dict(item) for item in items]
+
+def load_class_models(classes):
+    """
+    Converts the grade lists of a loaded "classes" dict into Assignments in place
+    and returns the same dict.
+    """
+    for class_info in classes.values():
+        grades = class_info.get("grades")
+        if grades:
+            for mp, items in grades.items():
+                grades[mp] = assignments_from_dicts(items)
+    return classes
+
+def json_default(obj):
+    """`default` hook for json.dump/json.dumps that serializes model objects."""
+    if isinstance(obj, Assignment):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
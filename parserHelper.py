@@ -0,0 +1,502 @@
+# parserHelper.py
+#
+# HTML extractors for the Genesis pages, behind interchangeable backends. The
+# BeautifulSoup backend is the reference implementation; the lxml backend walks
+# the same libxml2 tree directly and must produce identical results, which
+# `python parserHelper.py [directory]` checks against saved pages (and
+# check_parsers.py against the fixture pages in fixtures/genesis).
+
+import os
+import re
+import sys
+import threading
+import time
+from metricsHelper import PARSE_FAILURES
+from modelHelper import Assignment
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# --- Configuration ---
+# "auto" uses lxml directly when it is installed and BeautifulSoup otherwise; "lxml" or "bs4" forces one
+PARSER_BACKEND = "auto"
+# Saved class pages (see gradeHelper.SAVE_HTML_FILES) used by verify_parsers()
+CORPUS_DIRECTORY = "classes"
+
+CLASS_PATTERN = re.compile(r"goToCourseSummary\('([^']*)','([^']*)','([^']*)'\)\">(.*?)<\/span>")
+NO_ASSIGNMENTS_PATTERN = re.compile(r'No graded assignments found')
+DESCRIPTION_ID_PATTERN = re.compile(r'^assignmentDescription')
+POINTS_PATTERN = re.compile(r'([\d.]+)\s*/\s*([\d.]+)')
+STUDENT_ID_PATTERN = re.compile(r'Student ID:')
+GRADE_LABEL_PATTERN = re.compile(r'Grade:')
+ROW_CLASSES = ('listroweven', 'listrowodd')
+# Name of the marking period <select> on a class page; its options are the periods the course meets in
+MARKING_PERIOD_SELECT = 'fldMarkingPeriod'
+# Options of that <select> that are marking periods ("MP1", "T2", "S1"); others such as
+# "ALL" or the final grade ("FG") are not fetched or shown as marking periods
+MARKING_PERIOD_OPTION_PATTERN = re.compile(r'^[A-Z]{1,2}\d+$')
+
+def _parse_classes(html_content):
+    """Extracts every goToCourseSummary(...) entry from the weekly summary page."""
+    matches = CLASS_PATTERN.findall(html_content)
+
+    classes_data = {}
+    if not matches:
+        return {}
+
+    for match in matches:
+        course_code, course_selection, marking_period, class_name = match
+        class_name = class_name.strip()
+        if class_name:
+            classes_data[class_name] = {
+                "courseCode": course_code,
+                "courseSelection": course_selection,
+                "markingPeriod": marking_period
+            }
+
+    return classes_data
+
+def _marking_period_options(values):
+    """Keeps the option values that are marking periods, without duplicates, in page order."""
+    periods = []
+    for value in values:
+        value = value.strip()
+        if MARKING_PERIOD_OPTION_PATTERN.match(value) and value not in periods:
+            periods.append(value)
+    return periods
+
+def _parse_points(grade_cell_text):
+    """Returns (points_earned, total_points) from a grade cell's text, or (0.0, 0.0)."""
+    cleaned_text = re.sub(r'\s+', ' ', grade_cell_text)
+    points_match = POINTS_PATTERN.search(cleaned_text)
+    if points_match:
+        return float(points_match.group(1)), float(points_match.group(2))
+    return 0.0, 0.0
+
+class BeautifulSoupParser:
+    """Reference backend: BeautifulSoup on top of lxml."""
+    name = "bs4"
+
+    def parse_assignments(self, html_content):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html_content, 'lxml')
+        assignments = []
+
+        if soup.find('td', class_='cellCenter', string=NO_ASSIGNMENTS_PATTERN):
+            return []
+
+        assignments_header = soup.find('b', string='Assignments')
+        if not assignments_header or not assignments_header.find_parent('table'):
+            return []
+
+        assignment_rows = assignments_header.find_parent('table').find_all('tr', class_=list(ROW_CLASSES))
+
+        for row in assignment_rows:
+            try:
+                cells = row.find_all('td', recursive=False)
+                if len(cells) < 3: continue
+                name_tag = cells[1].find('b')
+                if not name_tag: continue
+                name = name_tag.text.strip()
+                description_tag = cells[1].find('input', id=DESCRIPTION_ID_PATTERN)
+                description = description_tag['value'].strip() if description_tag else ""
+                date = cells[0].find_all('div')[1].text.strip() if len(cells[0].find_all('div')) > 1 else cells[0].text.strip()
+                category_div = cells[1].find('div', style=lambda s: 'italic' in s if s else False)
+                category = category_div.text.strip() if category_div else "N/A"
+                points_earned, total_points = _parse_points(cells[2].get_text(separator=' ', strip=True))
+                assignments.append(Assignment(name, category, date, description, total_points, points_earned))
+            except (AttributeError, IndexError, ValueError):
+                PARSE_FAILURES.inc(parser="assignments")
+                continue
+        return assignments
+
+    def parse_category_weights(self, html_content):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html_content, 'lxml')
+        weights = {}
+        grading_header = soup.find('b', string='Grading Information')
+        if not grading_header: return {}
+        weight_table = grading_header.find_parent('table')
+        if not weight_table: return {}
+        weight_rows = weight_table.find_all('tr', class_=list(ROW_CLASSES))
+        for row in weight_rows:
+            try:
+                cells = row.find_all('td', recursive=False)
+                if len(cells) < 2: continue
+                category_name = cells[0].get_text(strip=True)
+                weight_str = cells[1].get_text(strip=True)
+                if '%' in weight_str:
+                    weight_value = float(weight_str.replace('%', '').strip()) / 100.0
+                    weights[category_name] = weight_value
+            except (IndexError, ValueError):
+                PARSE_FAILURES.inc(parser="category_weights")
+                continue
+        return weights
+
+    def parse_user_data(self, html_content):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html_content, 'lxml')
+
+        anchor_text = soup.find(string=STUDENT_ID_PATTERN)
+        if not anchor_text:
+            return None
+        main_info_table = anchor_text.find_parent('table')
+        if not main_info_table:
+            return None
+
+        student_id_text = main_info_table.find(string=STUDENT_ID_PATTERN)
+        student_id = student_id_text.find_next('span').get_text(strip=True) if student_id_text else None
+
+        grade_label_span = main_info_table.find('span', string=GRADE_LABEL_PATTERN)
+        grade = grade_label_span.find_next_sibling('span').get_text(strip=True) if grade_label_span else None
+
+        school_name = None
+        rows = main_info_table.find_all('tr', recursive=False)
+        if len(rows) > 1 and rows[1].find('td'):
+            school_name = rows[1].find('td').get_text(strip=True)
+
+        if all(v is None for v in [student_id, grade, school_name]):
+            return None
+
+        return {
+            "studentID": student_id,
+            "grade": grade,
+            "schoolName": school_name
+        }
+
+    def parse_classes(self, html_content):
+        return _parse_classes(html_content)
+
+    def parse_marking_periods(self, html_content):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html_content, 'lxml')
+        select = soup.find('select', attrs={'name': MARKING_PERIOD_SELECT})
+        if not select:
+            return []
+        return _marking_period_options(option.get('value') or option.get_text() for option in select.find_all('option'))
+
+# --- lxml backend ---
+# BeautifulSoup's get_text() leaves out comments and anything inside these tags
+_NON_TEXT_TAGS = ("script", "style", "template", "rt", "rp")
+# ...and collapses whitespace-only strings to " " or "\n" outside these
+_PRESERVE_WHITESPACE_TAGS = ("pre", "textarea")
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+_LOCAL = threading.local()
+
+def _parse_document(html_content):
+    """Parses html_content with a per-thread lxml HTML parser. Returns None if lxml can't."""
+    parser = getattr(_LOCAL, "parser", None)
+    if parser is None:
+        parser = _LOCAL.parser = etree.HTMLParser(recover=True)
+    try:
+        return etree.fromstring(html_content, parser)
+    except (etree.LxmlError, ValueError):
+        return None
+
+def _is_element(node):
+    """False for comments and processing instructions."""
+    return isinstance(node.tag, str)
+
+def _as_bs4_string(text, parent):
+    """A text node as BeautifulSoup stores it (see _PRESERVE_WHITESPACE_TAGS)."""
+    if text.strip(_ASCII_SPACES):
+        return text
+    while parent is not None:
+        if parent.tag in _PRESERVE_WHITESPACE_TAGS:
+            return text
+        parent = parent.getparent()
+    return "\n" if "\n" in text else " "
+
+def _strings(element):
+    """Yields the text nodes that BeautifulSoup's get_text() joins, in document order."""
+    if element.text:
+        yield _as_bs4_string(element.text, element)
+    for child in element:
+        if _is_element(child) and child.tag not in _NON_TEXT_TAGS:
+            yield from _strings(child)
+        if child.tail:
+            yield _as_bs4_string(child.tail, element)
+
+def _get_text(element, separator="", strip=False):
+    """Equivalent of BeautifulSoup's Tag.get_text(separator, strip)."""
+    if any(ancestor.tag in _NON_TEXT_TAGS for ancestor in element.iterancestors()):
+        return ""
+    strings = _strings(element)
+    if strip:
+        strings = (s.strip() for s in strings)
+        strings = (s for s in strings if s)
+    return separator.join(strings)
+
+def _single_string(element):
+    """Equivalent of BeautifulSoup's Tag.string: the only string below a chain of only children."""
+    while True:
+        children = list(element)
+        count = len(children) + (1 if element.text else 0) + sum(1 for c in children if c.tail)
+        if count != 1:
+            return None
+        if element.text:
+            return _as_bs4_string(element.text, element)
+        element = children[0]
+        if not _is_element(element):
+            return _as_bs4_string(element.text, element.getparent())
+
+def _find_by_string(root, tag, match):
+    """First `tag` element under root whose Tag.string satisfies match(string)."""
+    for element in root.iter(tag):
+        string = _single_string(element)
+        if string is not None and match(string):
+            return element
+    return None
+
+def _has_class(element, class_names):
+    return any(c in class_names for c in (element.get('class') or '').split())
+
+def _child_cells(row):
+    return [cell for cell in row if cell.tag == 'td']
+
+def _first_descendant(element, tag, predicate=None):
+    for descendant in element.iterdescendants(tag):
+        if predicate is None or predicate(descendant):
+            return descendant
+    return None
+
+def _string_nodes(element):
+    """
+    Yields (string, kind, node) for every string under element in document order,
+    comments included, the way BeautifulSoup's find(string=...) walks them. kind is
+    "text" (node.text), "tail" (node.tail) or "comment" (node is the comment).
+    """
+    if element.text:
+        yield _as_bs4_string(element.text, element), "text", element
+    for child in element:
+        if _is_element(child):
+            yield from _string_nodes(child)
+        elif child.text:
+            yield _as_bs4_string(child.text, element), "comment", child
+        if child.tail:
+            yield _as_bs4_string(child.tail, element), "tail", child
+
+def _document_string_nodes(root):
+    """_string_nodes over the whole document, including comments outside <html>."""
+    for node in reversed(list(root.itersiblings(preceding=True))):
+        if node.text:
+            yield node.text, "comment", node
+    yield from _string_nodes(root)
+    for node in root.itersiblings():
+        if node.text:
+            yield node.text, "comment", node
+
+def _string_parent(kind, node):
+    return node if kind == "text" else node.getparent()
+
+def _find_parent(element, tag):
+    """Nearest element named tag among element and its ancestors."""
+    while element is not None and element.tag != tag:
+        element = element.getparent()
+    return element
+
+def _find_next(kind, node, tag):
+    """First `tag` element after a string in document order (BeautifulSoup's find_next)."""
+    if kind == "text":
+        found = node.xpath(f"(descendant::{tag} | following::{tag})[1]")
+    else:
+        found = node.xpath(f"following::{tag}[1]")
+    return found[0] if found else None
+
+class LxmlParser:
+    """
+    Fast backend that walks the lxml tree directly. Mirrors BeautifulSoupParser
+    step for step (same tree, same string rules); documents lxml can't parse are
+    handed to the BeautifulSoup backend.
+    """
+    name = "lxml"
+
+    def __init__(self):
+        self.fallback = BeautifulSoupParser()
+
+    def parse_assignments(self, html_content):
+        root = _parse_document(html_content)
+        if root is None:
+            return self.fallback.parse_assignments(html_content)
+        assignments = []
+
+        for cell in root.iter('td'):
+            if _has_class(cell, ('cellCenter',)):
+                string = _single_string(cell)
+                if string is not None and NO_ASSIGNMENTS_PATTERN.search(string):
+                    return []
+
+        assignments_header = _find_by_string(root, 'b', lambda s: s == 'Assignments')
+        table = _find_parent(assignments_header.getparent(), 'table') if assignments_header is not None else None
+        if table is None:
+            return []
+
+        for row in table.iterdescendants('tr'):
+            if not _has_class(row, ROW_CLASSES):
+                continue
+            try:
+                cells = _child_cells(row)
+                if len(cells) < 3: continue
+                name_tag = _first_descendant(cells[1], 'b')
+                if name_tag is None: continue
+                name = _get_text(name_tag).strip()
+                description_tag = _first_descendant(
+                    cells[1], 'input', lambda e: e.get('id') is not None and DESCRIPTION_ID_PATTERN.search(e.get('id'))
+                )
+                description = description_tag.attrib['value'].strip() if description_tag is not None else ""
+                date_divs = list(cells[0].iterdescendants('div'))
+                date = _get_text(date_divs[1]).strip() if len(date_divs) > 1 else _get_text(cells[0]).strip()
+                category_div = _first_descendant(cells[1], 'div', lambda e: 'italic' in (e.get('style') or ''))
+                category = _get_text(category_div).strip() if category_div is not None else "N/A"
+                points_earned, total_points = _parse_points(_get_text(cells[2], ' ', True))
+                assignments.append(Assignment(name, category, date, description, total_points, points_earned))
+            except (AttributeError, IndexError, ValueError):
+                PARSE_FAILURES.inc(parser="assignments")
+                continue
+        return assignments
+
+    def parse_category_weights(self, html_content):
+        root = _parse_document(html_content)
+        if root is None:
+            return self.fallback.parse_category_weights(html_content)
+        weights = {}
+        grading_header = _find_by_string(root, 'b', lambda s: s == 'Grading Information')
+        if grading_header is None: return {}
+        weight_table = _find_parent(grading_header.getparent(), 'table')
+        if weight_table is None: return {}
+        for row in weight_table.iterdescendants('tr'):
+            if not _has_class(row, ROW_CLASSES):
+                continue
+            try:
+                cells = _child_cells(row)
+                if len(cells) < 2: continue
+                category_name = _get_text(cells[0], strip=True)
+                weight_str = _get_text(cells[1], strip=True)
+                if '%' in weight_str:
+                    weight_value = float(weight_str.replace('%', '').strip()) / 100.0
+                    weights[category_name] = weight_value
+            except (IndexError, ValueError):
+                PARSE_FAILURES.inc(parser="category_weights")
+                continue
+        return weights
+
+    def parse_user_data(self, html_content):
+        root = _parse_document(html_content)
+        if root is None:
+            return self.fallback.parse_user_data(html_content)
+
+        anchor = next((n for n in _document_string_nodes(root) if STUDENT_ID_PATTERN.search(n[0])), None)
+        if anchor is None:
+            return None
+        main_info_table = _find_parent(_string_parent(anchor[1], anchor[2]), 'table')
+        if main_info_table is None:
+            return None
+
+        student_id_text = next((n for n in _string_nodes(main_info_table) if STUDENT_ID_PATTERN.search(n[0])), None)
+        student_id = _get_text(_find_next(student_id_text[1], student_id_text[2], 'span'), strip=True) if student_id_text else None
+
+        grade_label_span = _find_by_string(main_info_table, 'span', GRADE_LABEL_PATTERN.search)
+        grade = None
+        if grade_label_span is not None:
+            grade = _get_text(next(grade_label_span.itersiblings('span'), None), strip=True)
+
+        school_name = None
+        rows = [row for row in main_info_table if row.tag == 'tr']
+        if len(rows) > 1 and _first_descendant(rows[1], 'td') is not None:
+            school_name = _get_text(_first_descendant(rows[1], 'td'), strip=True)
+
+        if all(v is None for v in [student_id, grade, school_name]):
+            return None
+
+        return {
+            "studentID": student_id,
+            "grade": grade,
+            "schoolName": school_name
+        }
+
+    def parse_classes(self, html_content):
+        return _parse_classes(html_content)
+
+    def parse_marking_periods(self, html_content):
+        root = _parse_document(html_content)
+        if root is None:
+            return self.fallback.parse_marking_periods(html_content)
+        select = next((e for e in root.iter('select') if e.get('name') == MARKING_PERIOD_SELECT), None)
+        if select is None:
+            return []
+        return _marking_period_options(
+            option.get('value') or _get_text(option) for option in select.iterdescendants('option')
+        )
+
+PARSER_BACKENDS = {"bs4": BeautifulSoupParser, "lxml": LxmlParser}
+_PARSERS = {}
+
+def get_parser(name=None):
+    """Returns the parser backend named name (default PARSER_BACKEND, resolving "auto")."""
+    name = name or PARSER_BACKEND
+    if name == "auto":
+        name = "lxml" if etree is not None else "bs4"
+    parser = _PARSERS.get(name)
+    if parser is None:
+        if name not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend '{name}'. Choose from: {', '.join(PARSER_BACKENDS)}")
+        parser = _PARSERS[name] = PARSER_BACKENDS[name]()
+    return parser
+
+def _results(parser, html_content):
+    """Every extractor's output for one page, in a directly comparable form."""
+    results = {}
+    for extractor in ("parse_assignments", "parse_category_weights", "parse_user_data", "parse_classes",
+                      "parse_marking_periods"):
+        try:
+            value = getattr(parser, extractor)(html_content)
+        except Exception as e:
+            value = f"raised {type(e).__name__}"
+        if extractor == "parse_assignments" and isinstance(value, list):
+            value = [a.to_dict() for a in value]
+        results[extractor] = value
+    return results
+
+def verify_parsers(directory=CORPUS_DIRECTORY, candidate="lxml", reference="bs4"):
+    """
+    Runs every extractor of both backends over each saved .html page in directory,
+    reporting pages whose results differ and the time each backend took.
+    Returns the number of mismatched pages.
+    """
+    if not os.path.isdir(directory):
+        print(f"No saved pages found in '{directory}'. Set SAVE_HTML_FILES = True in main.py and scrape first.")
+        return 0
+
+    candidate_parser, reference_parser = get_parser(candidate), get_parser(reference)
+    timings = {candidate: 0.0, reference: 0.0}
+    pages = mismatches = 0
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".html"):
+            continue
+        with open(os.path.join(directory, filename), "r", encoding="utf-8") as f:
+            html_content = f.read()
+        pages += 1
+        outputs = {}
+        for name, parser in ((reference, reference_parser), (candidate, candidate_parser)):
+            start = time.perf_counter()
+            outputs[name] = _results(parser, html_content)
+            timings[name] += time.perf_counter() - start
+        if outputs[candidate] != outputs[reference]:
+            mismatches += 1
+            differing = [k for k in outputs[reference] if outputs[reference][k] != outputs[candidate][k]]
+            print(f"  - MISMATCH in {filename}: {', '.join(differing)}")
+
+    print(f"Checked {pages} pages: {mismatches} mismatched.")
+    for name, seconds in timings.items():
+        print(f"  - {name}: {seconds * 1000:.1f} ms")
+    return mismatches
+
+# --- Main execution: compare the backends on saved pages ---
+if __name__ == "__main__":
+    sys.exit(1 if verify_parsers(*sys.argv[1:2]) else 0)
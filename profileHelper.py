@@ -0,0 +1,161 @@
+# profileHelper.py
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# --- Configuration ---
+PROFILE_DIRECTORY = "profiles"
+# Set to "cprofile" or "sample" to profile every auto-update run
+PROFILE_ENV_VAR = "GENESIS_PROFILE"
+PROFILE_MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+# Numbers this process's profiles, so runs finishing in the same millisecond don't collide
+_RUN_NUMBERS = itertools.count(1)
+
+def parse_profile_mode(value, source):
+    """
+    Returns the profile mode named by value ("cprofile", "sample", or an on/off
+    word), or None if profiling is off. Unknown modes are reported, naming source,
+    and disable profiling.
+    """
+    mode = (value or "").strip().lower()
+    if not mode or mode in ("0", "off", "false", "no"):
+        return None
+    if mode in ("1", "on", "true", "yes"):
+        return "cprofile"
+    if mode not in PROFILE_MODES:
+        print(f"Warning: Unknown profile mode '{mode}' in {source}. Profiling disabled.")
+        return None
+    return mode
+
+def get_env_profile_mode():
+    """Returns the profile mode requested through the environment, or None."""
+    return parse_profile_mode(os.getenv(PROFILE_ENV_VAR, ""), PROFILE_ENV_VAR)
+
+def _output_path(label, extension):
+    """
+    Builds a timestamped file path inside the profile directory. The process ID
+    and a per-process run number keep runs with the same label apart, even when
+    they finish in the same second.
+    """
+    os.makedirs(PROFILE_DIRECTORY, exist_ok=True)
+    now = time.time()
+    timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f".{int(now * 1000) % 1000:03d}"
+    return os.path.join(PROFILE_DIRECTORY, f"{label}_{timestamp}_{os.getpid()}-{next(_RUN_NUMBERS)}.{extension}")
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class _StackSampler:
+    """
+    Samples the Python stacks of the profiled threads on a background thread.
+    Threads that were already running before the profile started (other than the
+    caller) are ignored so idle GUI or worker loops don't drown out the run.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        caller = threading.get_ident()
+        self._ignored = {t.ident for t in threading.enumerate() if t.ident != caller}
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        self._ignored.add(threading.get_ident())
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in self._ignored:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        """Writes samples in the collapsed-stack format used by flamegraph tools."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def run_profiled(func, label, mode=None):
+    """
+    Runs func() and returns its result. When mode is "cprofile" the run is
+    captured with cProfile (.prof plus a readable .txt summary); when mode is
+    "sample" a sampling profiler writes a .collapsed file for flamegraphs.
+    With no mode, func is called directly.
+
+    cProfile only sees the calling thread, so work done on GradePrefetcher and
+    class discovery worker threads is missing from its profile (a note says how
+    many threads ran). The sampling profiler covers every thread started during
+    the run, so use "sample" for the parallel scraping paths.
+    """
+    if not mode:
+        return func()
+
+    if mode == "sample":
+        sampler = _StackSampler(SAMPLE_INTERVAL_SECONDS)
+        sampler.start()
+        try:
+            return func()
+        finally:
+            sampler.stop()
+            try:
+                output_path = _output_path(label, "collapsed")
+                sampler.write_collapsed(output_path)
+                print(f"  - Sampling profile ({sum(sampler.stacks.values())} samples) saved to '{output_path}'.")
+            except IOError as e:
+                print(f"Warning: Could not save sampling profile. Reason: {e}")
+
+    import cProfile
+    import pstats
+
+    # Counts the threads started during the run; each is seen once and then unhooked
+    started_threads = []
+    def note_thread(frame, event, arg):
+        sys.setprofile(None)
+        started_threads.append(threading.current_thread().name)
+
+    previous_thread_hook = threading.getprofile()
+    threading.setprofile(note_thread)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return func()
+    finally:
+        profiler.disable()
+        threading.setprofile(previous_thread_hook)
+        if started_threads:
+            print(f"  - Note: {len(started_threads)} other threads ran during this profile and are not in it "
+                  "(cProfile only sees the calling thread). Use --profile=sample to include them.")
+        try:
+            output_path = _output_path(label, "prof")
+            profiler.dump_stats(output_path)
+            with open(output_path[:-len(".prof")] + ".txt", "w", encoding="utf-8") as f:
+                stats = pstats.Stats(profiler, stream=f)
+                stats.sort_stats("cumulative").print_stats(50)
+            print(f"  - Profile saved to '{output_path}'.")
+        except IOError as e:
+            print(f"Warning: Could not save profile. Reason: {e}")
+
+def profiled(func, label, mode=None):
+    """Returns func wrapped with run_profiled, or func itself when mode is None."""
+    if not mode:
+        return func
+    def wrapper():
+        return run_profiled(func, label, mode)
+    return wrapper
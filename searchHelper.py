@@ -0,0 +1,216 @@
+# searchHelper.py
+#
+# Full-text search over every assignment's name, description and category, across
+# all classes, marking periods and school years, using SQLite FTS5 (part of the
+# sqlite3 module in standard Python builds).
+#
+# The index lives in SEARCH_DATABASE and is maintained incrementally: each
+# (student, school year, class, marking period) keeps a digest of its assignments,
+# and only partitions whose assignments changed since the last save are rewritten.
+# Earlier school years stay in the index, so searches cover the whole history.
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from collections import Counter
+from modelHelper import assignments_from_dicts, current_school_year, parse_due_date
+
+# --- Configuration ---
+SEARCH_DATABASE = "search.db"
+SEARCH_RESULT_LIMIT = 50
+# Marks the matched words in nameHighlight/descriptionSnippet (the dashboard turns them into <mark>)
+HIGHLIGHT_START = "\x01"
+HIGHLIGHT_END = "\x02"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (
+    id INTEGER PRIMARY KEY,
+    student TEXT NOT NULL,
+    school_year INTEGER NOT NULL,
+    class_name TEXT NOT NULL,
+    mp TEXT NOT NULL,
+    name TEXT,
+    category TEXT,
+    date TEXT,
+    description TEXT,
+    points_earned REAL,
+    total_points REAL
+);
+CREATE INDEX IF NOT EXISTS assignments_partition ON assignments (student, school_year, class_name, mp);
+CREATE TABLE IF NOT EXISTS partitions (
+    student TEXT NOT NULL,
+    school_year INTEGER NOT NULL,
+    class_name TEXT NOT NULL,
+    mp TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (student, school_year, class_name, mp)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS assignments_fts USING fts5(
+    name, description, category, content='assignments', content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS assignments_ai AFTER INSERT ON assignments BEGIN
+    INSERT INTO assignments_fts(rowid, name, description, category)
+    VALUES (new.id, new.name, new.description, new.category);
+END;
+CREATE TRIGGER IF NOT EXISTS assignments_ad AFTER DELETE ON assignments BEGIN
+    INSERT INTO assignments_fts(assignments_fts, rowid, name, description, category)
+    VALUES ('delete', old.id, old.name, old.description, old.category);
+END;
+"""
+
+# Name matches rank above category and description matches
+_SEARCH_SQL = """
+SELECT a.student, a.school_year, a.class_name, a.mp, a.name, a.category, a.date, a.description,
+       a.points_earned, a.total_points,
+       highlight(assignments_fts, 0, :start, :end),
+       snippet(assignments_fts, 1, :start, :end, '…', 16)
+FROM assignments_fts JOIN assignments a ON a.id = assignments_fts.rowid
+WHERE assignments_fts MATCH :match {student_filter}
+ORDER BY bm25(assignments_fts, 10.0, 1.0, 2.0), a.school_year DESC
+LIMIT :limit
+"""
+
+# One connection per database, shared by every thread (pywebview runs each API call on a
+# new thread) and used only while holding _DATABASE_LOCK
+_DATABASE_LOCK = threading.RLock()
+_CONNECTIONS = {}
+
+def _connect(database):
+    """Returns the shared connection to database, creating the schema on first use. Hold _DATABASE_LOCK."""
+    connection = _CONNECTIONS.get(database)
+    if connection is None:
+        connection = sqlite3.connect(database, timeout=10, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        _CONNECTIONS[database] = connection
+    return connection
+
+def _match_expression(query):
+    """
+    Turns free text into an FTS5 query matching every word as a prefix, so user
+    input can't produce a syntax error: 'lab rep' -> '"lab"* "rep"*'.
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", query))
+
+def student_key(data):
+    """The student an output.json's assignments are indexed under (pass it to search's student filter)."""
+    return str((data.get("user") or {}).get("studentID") or "unknown")
+
+def data_school_year(data, saved_on=None):
+    """
+    Returns the school year data's assignments belong to: the one stamped on it when
+    it was scraped (data["schoolYear"]), else the most common school year of the due
+    dates that include a year, else the one saved_on (a date, default today) falls in.
+    """
+    if data.get("schoolYear"):
+        return int(data["schoolYear"])
+    years = Counter()
+    for class_info in (data.get("classes") or {}).values():
+        for items in (class_info.get("grades") or {}).values():
+            for item in items:
+                date = item.get("date") or ""
+                if date.count("/") == 2:
+                    due_date = parse_due_date(date)
+                    if due_date is not None:
+                        years[current_school_year(due_date)] += 1
+    if years:
+        return years.most_common(1)[0][0]
+    return current_school_year(saved_on)
+
+def _delete_partition(connection, partition):
+    """Removes one (student, school year, class, marking period) and its assignments from the index."""
+    where = " WHERE student = ? AND school_year = ? AND class_name = ? AND mp = ?"
+    connection.execute("DELETE FROM assignments" + where, partition)
+    connection.execute("DELETE FROM partitions" + where, partition)
+
+def update_search_index(data, database=SEARCH_DATABASE, school_year=None, saved_on=None):
+    """
+    Brings the index up to date with data ({"user": ..., "classes": ...}) for its
+    school year (default data_school_year(data, saved_on)), rewriting only the
+    class/marking period partitions whose assignments changed and dropping those
+    no longer in data (e.g. a dropped or renamed class). Returns the number of
+    partitions rewritten or dropped, or None if the index could not be updated.
+    """
+    student_id = student_key(data)
+    school_year = school_year or data_school_year(data, saved_on)
+    try:
+        with _DATABASE_LOCK, _connect(database) as connection:
+            known = dict(
+                ((class_name, mp), digest) for class_name, mp, digest in connection.execute(
+                    "SELECT class_name, mp, digest FROM partitions WHERE student = ? AND school_year = ?",
+                    (student_id, school_year)
+                )
+            )
+            rewritten = 0
+            for class_name, class_info in (data.get("classes") or {}).items():
+                for mp, items in (class_info.get("grades") or {}).items():
+                    known_digest = known.pop((class_name, mp), None)
+                    rows = [
+                        (a.name, a.category, a.date, a.description, a.points_earned, a.total_points)
+                        for a in assignments_from_dicts(items)
+                    ]
+                    digest = hashlib.sha1(json.dumps(rows).encode("utf-8")).hexdigest()
+                    if known_digest == digest:
+                        continue
+                    partition = (student_id, school_year, class_name, mp)
+                    _delete_partition(connection, partition)
+                    connection.executemany(
+                        "INSERT INTO assignments (student, school_year, class_name, mp, name, category, date, "
+                        "description, points_earned, total_points) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [partition + row for row in rows]
+                    )
+                    connection.execute("INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?, ?)", partition + (digest,))
+                    rewritten += 1
+            # Whatever is left in known is no longer in the data
+            for class_name, mp in known:
+                _delete_partition(connection, (student_id, school_year, class_name, mp))
+                rewritten += 1
+        return rewritten
+    except sqlite3.Error as e:
+        print(f"  - Warning: Could not update the search index. Reason: {e}")
+        return None
+
+def search(query, limit=SEARCH_RESULT_LIMIT, student=None, database=SEARCH_DATABASE):
+    """
+    Finds assignments whose name, description or category contain every word of
+    query (as word prefixes, with stemming), best matches first. Returns a list of
+    result dicts, or None if the index could not be searched.
+    """
+    match = _match_expression(query)
+    if not match:
+        return []
+    sql = _SEARCH_SQL.format(student_filter="AND a.student = :student" if student is not None else "")
+    params = {"match": match, "limit": limit, "student": student, "start": HIGHLIGHT_START, "end": HIGHLIGHT_END}
+    try:
+        with _DATABASE_LOCK:
+            rows = _connect(database).execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        print(f"  - Warning: Could not search assignments. Reason: {e}")
+        return None
+    return [
+        {
+            "student": row[0], "schoolYear": row[1], "class": row[2], "markingPeriod": row[3], "name": row[4],
+            "category": row[5], "date": row[6], "description": row[7], "pointsEarned": row[8], "totalPoints": row[9],
+            "nameHighlight": row[10], "descriptionSnippet": row[11]
+        }
+        for row in rows
+    ]
+
+# --- Main execution: index the saved output.json and run one search ---
+if __name__ == "__main__":
+    import sys
+    import time
+    from jsonHelper import load_file
+
+    saved_data, _ = load_file("output.json")
+    update_search_index(saved_data)
+    start = time.perf_counter()
+    results = search(" ".join(sys.argv[1:])) or []
+    elapsed = (time.perf_counter() - start) * 1000
+    for result in results:
+        name = result["nameHighlight"].replace(HIGHLIGHT_START, "[").replace(HIGHLIGHT_END, "]")
+        print(f"  - {result['class']} {result['markingPeriod']} {result['date']}: {name}")
+    print(f"{len(results)} results in {elapsed:.1f} ms.")
@@ -0,0 +1,173 @@
+# throttleHelper.py
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+from metricsHelper import CIRCUIT_OPEN, CIRCUIT_OPENS_TOTAL, RATE_LIMIT_WAIT
+
+# --- Configuration ---
+# Sustained requests per second and burst size for each host
+DEFAULT_RATE_PER_SECOND = 4.0
+DEFAULT_BURST = 8
+HOST_RATE_LIMITS = {
+    "students.ww-p.org": (4.0, 8),
+}
+# Consecutive 5xx responses/timeouts before all fetches to a host are paused
+FAILURE_THRESHOLD = 5
+# How long fetches stay paused before a single trial request is let through
+RESET_TIMEOUT_SECONDS = 30.0
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Each request reserves a token up front; when the
+    bucket is empty the reservation goes into debt and the caller sleeps until
+    its token has been refilled, so waiters are served in order.
+    """
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes one token and returns how many seconds the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+class CircuitBreaker:
+    """
+    Opens after FAILURE_THRESHOLD consecutive failures. While open, callers are
+    told to pause until the reset timeout has passed; then one trial request is
+    allowed through (half-open) and only its result closes or re-opens the circuit.
+    The trial's caller holds a token for it and must release() it when done, so a
+    trial that ends without a recorded result lets the next caller try instead.
+    """
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial = None
+        self._lock = threading.Lock()
+
+    def admit(self):
+        """
+        Returns (pause, trial). pause is 0 if a request may be sent now, otherwise how
+        long to wait before asking again. trial is a token when the admitted request
+        is the half-open trial (pass it to record and release), else None.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0, None
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                return remaining, None
+            if self._trial is not None:
+                return min(1.0, self.reset_timeout), None
+            self._trial = object()
+            return 0.0, self._trial
+
+    def release(self, trial):
+        """Ends a trial whose result was never recorded (e.g. its caller raised), so another may be sent."""
+        if trial is None:
+            return
+        with self._lock:
+            if self._trial is trial:
+                self._trial = None
+
+    def record(self, failed, trial=None):
+        """
+        Reports a request's outcome. While the circuit is open only the outcome of
+        the current trial counts; requests admitted before it opened are ignored.
+        """
+        with self._lock:
+            if self._opened_at is not None:
+                if trial is None or trial is not self._trial:
+                    return
+                self._trial = None
+            if not failed:
+                self._failures = 0
+                if self._opened_at is not None:
+                    self._opened_at = None
+                    CIRCUIT_OPEN.set(0, host=self.name)
+                    print(f"  - Requests to {self.name} are succeeding again. Resuming.")
+                return
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    CIRCUIT_OPENS_TOTAL.inc(host=self.name)
+                    CIRCUIT_OPEN.set(1, host=self.name)
+                    print(f"  - {self._failures} consecutive failures from {self.name}. "
+                          f"Pausing requests for {self.reset_timeout:.0f} seconds.")
+                self._opened_at = time.monotonic()
+
+class HostThrottle:
+    """Rate limiter and circuit breaker shared by every fetch to one host."""
+    def __init__(self, host, rate, burst):
+        self.host = host
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(host)
+
+    def wait(self):
+        """
+        Blocks until a request to this host may be sent. Returns the circuit breaker's
+        trial token (None unless this request is the half-open trial); pass it to
+        record() and release() it in a finally block.
+        """
+        waited = 0.0
+        pause, trial = self.breaker.admit()
+        while pause > 0:
+            time.sleep(pause)
+            waited += pause
+            pause, trial = self.breaker.admit()
+        delay = self.bucket.reserve()
+        if delay > 0:
+            time.sleep(delay)
+            waited += delay
+        RATE_LIMIT_WAIT.observe(waited, host=self.host)
+        return trial
+
+    async def wait_async(self):
+        """Coroutine version of wait() that sleeps without blocking the event loop."""
+        waited = 0.0
+        pause, trial = self.breaker.admit()
+        while pause > 0:
+            await asyncio.sleep(pause)
+            waited += pause
+            pause, trial = self.breaker.admit()
+        delay = self.bucket.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+        RATE_LIMIT_WAIT.observe(waited, host=self.host)
+        return trial
+
+    def record(self, failed, trial=None):
+        """Reports the outcome of a request (failed = 5xx or timeout/connection error)."""
+        self.breaker.record(failed, trial)
+
+    def release(self, trial):
+        """Releases the trial token returned by wait()."""
+        self.breaker.release(trial)
+
+_THROTTLES = {}
+_THROTTLES_LOCK = threading.Lock()
+
+def get_throttle(url):
+    """Returns the shared HostThrottle for the host of url."""
+    host = urlsplit(url).hostname or ""
+    with _THROTTLES_LOCK:
+        throttle = _THROTTLES.get(host)
+        if throttle is None:
+            rate, burst = HOST_RATE_LIMITS.get(host, (DEFAULT_RATE_PER_SECOND, DEFAULT_BURST))
+            throttle = _THROTTLES[host] = HostThrottle(host, rate, burst)
+        return throttle